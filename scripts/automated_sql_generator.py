@@ -2,8 +2,16 @@
 """
 Automated SQL Generator for Snowflake Tasty Bytes Assignment
 This script generates the exact SQL commands and provides step-by-step execution
+
+Each step declares the steps it depends on, so the assignment can also be run
+directly as a DAG with independent steps in parallel:
+    python automated_sql_generator.py --run [--workers N]
 """
 
+import sys
+
+from snowflake_schemas import create_table_sql
+
 def generate_sql_commands():
     """
     Generate all SQL commands for the Tasty Bytes assignment
@@ -13,6 +21,8 @@ def generate_sql_commands():
         "setup": [
             {
                 "step": 1,
+                # Session state: replayed on every connection instead of being a node in the DAG
+                "session": True,
                 "title": "Set Role and Warehouse",
                 "sql": """-- Set the Role
 USE ROLE accountadmin;
@@ -23,6 +33,7 @@ USE WAREHOUSE compute_wh;""",
             },
             {
                 "step": 2,
+                "depends_on": [],
                 "title": "Create Database and Schema",
                 "sql": """-- Create the Tasty Bytes Database
 CREATE OR REPLACE DATABASE tasty_bytes_sample_data;
@@ -33,26 +44,15 @@ CREATE OR REPLACE SCHEMA tasty_bytes_sample_data.raw_pos;""",
             },
             {
                 "step": 3,
+                "depends_on": [2],
                 "title": "Create Menu Table",
-                "sql": """-- Create the Raw Menu Table
-CREATE OR REPLACE TABLE tasty_bytes_sample_data.raw_pos.menu
-(
-    menu_id NUMBER(19,0),
-    menu_type_id NUMBER(38,0),
-    menu_type VARCHAR(16777216),
-    truck_brand_name VARCHAR(16777216),
-    menu_item_id NUMBER(38,0),
-    menu_item_name VARCHAR(16777216),
-    item_category VARCHAR(16777216),
-    item_subcategory VARCHAR(16777216),
-    cost_of_goods_usd NUMBER(38,4),
-    sale_price_usd NUMBER(38,4),
-    menu_item_health_metrics_obj VARIANT
-);""",
+                "sql": ("-- Create the Raw Menu Table\n"
+                        + create_table_sql('tasty_bytes_sample_data.raw_pos.menu', 'menu') + ";"),
                 "description": "Creates the menu table with all required columns and data types"
             },
             {
                 "step": 4,
+                "depends_on": [3],
                 "title": "Verify Empty Table",
                 "sql": """-- Confirm the empty Menu table exists
 SELECT * FROM tasty_bytes_sample_data.raw_pos.menu;""",
@@ -60,6 +60,7 @@ SELECT * FROM tasty_bytes_sample_data.raw_pos.menu;""",
             },
             {
                 "step": 5,
+                "depends_on": [2],
                 "title": "Create S3 Stage",
                 "sql": """-- Create the Stage referencing the Blob location and CSV File Format
 CREATE OR REPLACE STAGE tasty_bytes_sample_data.public.blob_stage
@@ -69,6 +70,7 @@ file_format = (type = csv);""",
             },
             {
                 "step": 6,
+                "depends_on": [5],
                 "title": "List Stage Files",
                 "sql": """-- Query the Stage to find the Menu CSV file
 LIST @tasty_bytes_sample_data.public.blob_stage/raw_pos/menu/;""",
@@ -76,6 +78,8 @@ LIST @tasty_bytes_sample_data.public.blob_stage/raw_pos/menu/;""",
             },
             {
                 "step": 7,
+                # Step 4 must see the table before the COPY fills it
+                "depends_on": [3, 4, 5],
                 "title": "Load Data into Table",
                 "sql": """-- Copy the Menu file into the Menu table
 COPY INTO tasty_bytes_sample_data.raw_pos.menu
@@ -86,6 +90,7 @@ FROM @tasty_bytes_sample_data.public.blob_stage/raw_pos/menu/;""",
         "verification": [
             {
                 "step": 8,
+                "depends_on": [7],
                 "title": "Count Total Rows",
                 "sql": """-- How many rows are in the table?
 SELECT COUNT(*) AS row_count FROM tasty_bytes_sample_data.raw_pos.menu;""",
@@ -93,6 +98,7 @@ SELECT COUNT(*) AS row_count FROM tasty_bytes_sample_data.raw_pos.menu;""",
             },
             {
                 "step": 9,
+                "depends_on": [7],
                 "title": "Show Sample Data",
                 "sql": """-- What do the top 10 rows look like?
 SELECT TOP 10 * FROM tasty_bytes_sample_data.raw_pos.menu;""",
@@ -100,6 +106,7 @@ SELECT TOP 10 * FROM tasty_bytes_sample_data.raw_pos.menu;""",
             },
             {
                 "step": 10,
+                "depends_on": [7],
                 "title": "Group by Truck Brand",
                 "sql": """-- Group by truck brand name
 SELECT TRUCK_BRAND_NAME, COUNT(*)
@@ -110,6 +117,7 @@ ORDER BY 2 DESC;""",
             },
             {
                 "step": 11,
+                "depends_on": [7],
                 "title": "Group by Truck Brand and Menu Type",
                 "sql": """-- Group by truck brand name and menu type
 SELECT
@@ -126,6 +134,24 @@ ORDER BY 3 DESC;""",
     
     return sql_commands
 
+def assignment_steps():
+    """
+    Setup and verification steps as one list, in step order
+    """
+    commands = generate_sql_commands()
+    return commands["setup"] + commands["verification"]
+
+def run_assignment(max_workers=4):
+    """
+    Execute the steps against Snowflake, running independent steps in parallel
+    """
+    # Only needed when executing; generating the files works without a connection
+    from snowflake_config import connection_config
+    from snowflake_dag import run_dag
+
+    results = run_dag(assignment_steps(), connection_config(workload='load'), max_workers)
+    return all(result.status == 'done' for result in results.values())
+
 def generate_complete_sql_file():
     """
     Generate a complete SQL file with all commands
@@ -292,4 +318,7 @@ def main():
     print("4. Follow STEP_BY_STEP_GUIDE.md if you need detailed instructions")
 
 if __name__ == "__main__":
+    if '--run' in sys.argv[1:]:
+        workers = int(sys.argv[sys.argv.index('--workers') + 1]) if '--workers' in sys.argv else 4
+        sys.exit(0 if run_assignment(workers) else 1)
     main()
@@ -1,48 +1,12 @@
-import snowflake.connector
-from snowflake.connector import DictCursor
-import os
-from dotenv import load_dotenv
+from snowflake_config import TASTY_BYTES_CONFIG
+from snowflake_pool import connect_to_snowflake
 
-# Load environment variables
-load_dotenv()
-
-def connect_to_snowflake():
-    """
-    Connect to Snowflake using password authentication
-    """
-    try:
-        # Get credentials from environment variables
-        user = os.getenv('SNOWFLAKE_USER')
-        password = os.getenv('SNOWFLAKE_PASSWORD')
-        account = os.getenv('SNOWFLAKE_ACCOUNT')
-        role = os.getenv('SNOWFLAKE_ROLE', 'ACCOUNTADMIN')
-        warehouse = os.getenv('SNOWFLAKE_WAREHOUSE', 'COMPUTE_WH')
-        database = os.getenv('SNOWFLAKE_DATABASE', 'tasty_bytes_sample_data')
-        schema = os.getenv('SNOWFLAKE_SCHEMA', 'raw_pos')
-        
-        if not all([user, password, account]):
-            raise ValueError("Missing required environment variables. Please check your .env file.")
-        
-        conn = snowflake.connector.connect(
-            user=user,
-            password=password,
-            account=account,
-            role=role,
-            warehouse=warehouse,
-            database=database,
-            schema=schema
-        )
-        print("Successfully connected to Snowflake!")
-        return conn
-    except Exception as e:
-        print(f"Error connecting to Snowflake: {e}")
-        return None
 
 def check_franchise_matching():
     """
     Check if truck and franchise tables have matching franchise_ids
     """
-    conn = connect_to_snowflake()
+    conn = connect_to_snowflake(TASTY_BYTES_CONFIG, schema='public')
     if not conn:
         return
     
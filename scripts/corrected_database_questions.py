@@ -1,73 +1,13 @@
-import snowflake.connector
-from snowflake.connector import DictCursor
-import os
-from dotenv import load_dotenv
+from snowflake_config import TASTY_BYTES_CONFIG
+from snowflake_executor import execute_query
+from snowflake_pool import connect_to_snowflake
 
-# Load environment variables
-load_dotenv()
-
-def connect_to_snowflake():
-    """
-    Connect to Snowflake using password authentication
-    """
-    try:
-        # Get credentials from environment variables
-        user = os.getenv('SNOWFLAKE_USER')
-        password = os.getenv('SNOWFLAKE_PASSWORD')
-        account = os.getenv('SNOWFLAKE_ACCOUNT')
-        role = os.getenv('SNOWFLAKE_ROLE', 'ACCOUNTADMIN')
-        warehouse = os.getenv('SNOWFLAKE_WAREHOUSE', 'COMPUTE_WH')
-        database = os.getenv('SNOWFLAKE_DATABASE', 'tasty_bytes_sample_data')
-        schema = os.getenv('SNOWFLAKE_SCHEMA', 'raw_pos')
-        
-        if not all([user, password, account]):
-            raise ValueError("Missing required environment variables. Please check your .env file.")
-        
-        conn = snowflake.connector.connect(
-            user=user,
-            password=password,
-            account=account,
-            role=role,
-            warehouse=warehouse,
-            database=database,
-            schema=schema
-        )
-        print("Successfully connected to Snowflake!")
-        return conn
-    except Exception as e:
-        print(f"Error connecting to Snowflake: {e}")
-        return None
-
-def execute_query(conn, query, description):
-    """
-    Execute a query and return results
-    """
-    try:
-        cursor = conn.cursor()
-        print(f"\n--- {description} ---")
-        print(f"Query: {query}")
-        
-        cursor.execute(query)
-        results = cursor.fetchall()
-        
-        if results:
-            print(f"Results: {results}")
-            return results
-        else:
-            print("Query executed successfully (no results to display)")
-            return []
-        
-        cursor.close()
-        
-    except Exception as e:
-        print(f"Error executing query: {e}")
-        return []
 
 def answer_database_questions():
     """
     Answer the Snowflake database management questions by executing SQL commands
     """
-    conn = connect_to_snowflake()
+    conn = connect_to_snowflake(TASTY_BYTES_CONFIG)
     if not conn:
         return
     
@@ -91,8 +31,7 @@ def answer_database_questions():
         print("Analyzing is_default column...")
         for row in results1:
             if 'test_database' in str(row).lower():
-                # is_default is at index 2
-                is_default = row[2]
+                is_default = row['is_default']
                 print(f"\nAnswer for Question 1: is_default = {is_default}")
                 if is_default == 'N':
                     print("✅ Correct! Answer is 'N'")
@@ -172,8 +111,7 @@ def answer_database_questions():
         print("Analyzing is_current column...")
         for row in results4:
             if 'test_schema' in str(row).lower():
-                # is_current is at index 3
-                is_current = row[3]
+                is_current = row['is_current']
                 print(f"\nAnswer for Question 4: is_current = {is_current}")
                 if is_current == 'Yes':
                     print("✅ Correct! Answer is 'Yes'")
@@ -200,8 +138,7 @@ def answer_database_questions():
         print("Analyzing kind column...")
         for row in results5:
             if 'test_schema' in str(row).lower():
-                # kind is at index 2
-                kind = row[2]
+                kind = row['kind']
                 print(f"\nAnswer for Question 5: kind = {kind}")
                 if kind == 'SCHEMA':
                     print("✅ Correct! Answer is 'SCHEMA'")
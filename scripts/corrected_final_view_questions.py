@@ -1,73 +1,13 @@
-import snowflake.connector
-from snowflake.connector import DictCursor
-import os
-from dotenv import load_dotenv
+from snowflake_config import TASTY_BYTES_CONFIG
+from snowflake_executor import execute_query
+from snowflake_pool import connect_to_snowflake
 
-# Load environment variables
-load_dotenv()
-
-def connect_to_snowflake():
-    """
-    Connect to Snowflake using password authentication
-    """
-    try:
-        # Get credentials from environment variables
-        user = os.getenv('SNOWFLAKE_USER')
-        password = os.getenv('SNOWFLAKE_PASSWORD')
-        account = os.getenv('SNOWFLAKE_ACCOUNT')
-        role = os.getenv('SNOWFLAKE_ROLE', 'ACCOUNTADMIN')
-        warehouse = os.getenv('SNOWFLAKE_WAREHOUSE', 'COMPUTE_WH')
-        database = os.getenv('SNOWFLAKE_DATABASE', 'tasty_bytes_sample_data')
-        schema = os.getenv('SNOWFLAKE_SCHEMA', 'raw_pos')
-        
-        if not all([user, password, account]):
-            raise ValueError("Missing required environment variables. Please check your .env file.")
-        
-        conn = snowflake.connector.connect(
-            user=user,
-            password=password,
-            account=account,
-            role=role,
-            warehouse=warehouse,
-            database=database,
-            schema=schema
-        )
-        print("Successfully connected to Snowflake!")
-        return conn
-    except Exception as e:
-        print(f"Error connecting to Snowflake: {e}")
-        return None
-
-def execute_query(conn, query, description):
-    """
-    Execute a query and return results
-    """
-    try:
-        cursor = conn.cursor()
-        print(f"\n--- {description} ---")
-        print(f"Query: {query}")
-        
-        cursor.execute(query)
-        results = cursor.fetchall()
-        
-        if results:
-            print(f"Results: {results}")
-            return results
-        else:
-            print("Query executed successfully (no results to display)")
-            return []
-        
-        cursor.close()
-        
-    except Exception as e:
-        print(f"Error executing query: {e}")
-        return []
 
 def answer_view_questions():
     """
     Answer the Snowflake view management questions by executing SQL commands
     """
-    conn = connect_to_snowflake()
+    conn = connect_to_snowflake(TASTY_BYTES_CONFIG)
     if not conn:
         return
     
@@ -153,8 +93,7 @@ WHERE franchisee_first_name = 'Sara' AND franchisee_last_name = 'Nicholson';"""
         print("Analyzing type column for TRUCK_ID...")
         for row in results2:
             if 'TRUCK_ID' in str(row).upper():
-                # type is typically at index 1
-                type_value = row[1]
+                type_value = row['type']
                 print(f"\nAnswer for Question 2: type = {type_value}")
                 if type_value == 'INT':
                     print("✅ Correct! Answer is 'INT'")
@@ -3,41 +3,11 @@ Snowflake Cortex LLM Functions Assignment
 Demonstrates various Cortex LLM capabilities including COMPLETE and SUMMARIZE functions
 """
 
-import snowflake.connector
-import os
-from dotenv import load_dotenv
+from snowflake_pool import connect_to_snowflake
 
-# Load environment variables
-load_dotenv()
-
-def connect_to_snowflake():
-    """
-    Connect to Snowflake using environment variables
-    """
-    try:
-        user = os.getenv('SNOWFLAKE_USER')
-        account = os.getenv('SNOWFLAKE_ACCOUNT')
-        password = os.getenv('SNOWFLAKE_PASSWORD')
-        role = os.getenv('SNOWFLAKE_ROLE', 'ACCOUNTADMIN')
-        warehouse = os.getenv('SNOWFLAKE_WAREHOUSE', 'COMPUTE_WH')
-        
-        if not all([user, account, password]):
-            raise ValueError("Missing required environment variables. Please check your .env file.")
-        
-        conn = snowflake.connector.connect(
-            user=user,
-            account=account,
-            password=password,
-            role=role,
-            warehouse=warehouse
-        )
-        
-        print("Successfully connected to Snowflake!")
-        return conn
-        
-    except Exception as e:
-        print(f"Error connecting to Snowflake: {e}")
-        return None
+# Seconds a COMPLETE call may run before it is cancelled server-side; one
+# generation per row can otherwise keep the warehouse busy for a long time
+CORTEX_TIMEOUT = 120
 
 def find_menu_table(conn):
     """
@@ -65,7 +35,7 @@ def execute_cortex_llm_assignment():
     """
     Execute all Cortex LLM function examples
     """
-    conn = connect_to_snowflake()
+    conn = connect_to_snowflake(database=None, schema=None)
     if not conn:
         return
     
@@ -92,7 +62,7 @@ def execute_cortex_llm_assignment():
             SELECT SNOWFLAKE.CORTEX.COMPLETE(
                 'mistral-7b', 'What are three reasons that Snowflake is positioned to become the go-to data platform?')
             """
-            cursor.execute(query1)
+            cursor.execute(query1, timeout=CORTEX_TIMEOUT)
             result1 = cursor.fetchone()
             print("\nResponse:")
             print(result1[0] if result1 else "No response")
@@ -106,7 +76,7 @@ def execute_cortex_llm_assignment():
             SELECT SNOWFLAKE.CORTEX.SUMMARIZE(SNOWFLAKE.CORTEX.COMPLETE(
                 'mistral-7b', 'What are three reasons that Snowflake is positioned to become the go-to data platform?'))
             """
-            cursor.execute(query2)
+            cursor.execute(query2, timeout=CORTEX_TIMEOUT)
             result2 = cursor.fetchone()
             print("\nSummary:")
             print(result2[0] if result2 else "No summary")
@@ -122,7 +92,7 @@ def execute_cortex_llm_assignment():
                 CONCAT('Tell me why this food is tasty: ', menu_item_name)
             ) FROM {menu_table} LIMIT 5
             """
-            cursor.execute(query3)
+            cursor.execute(query3, timeout=CORTEX_TIMEOUT)
             results3 = cursor.fetchall()
             print(f"\nResponses for {len(results3)} menu items:")
             for i, row in enumerate(results3, 1):
@@ -162,7 +132,7 @@ def execute_cortex_llm_assignment():
                 {}
             ) AS response
             """
-            cursor.execute(query5)
+            cursor.execute(query5, timeout=CORTEX_TIMEOUT)
             result5 = cursor.fetchone()
             print("\nResponse:")
             print(result5[0] if result5 else "No response")
@@ -188,7 +158,7 @@ def execute_cortex_llm_assignment():
                 {}
             ) AS response
             """
-            cursor.execute(query6)
+            cursor.execute(query6, timeout=CORTEX_TIMEOUT)
             result6 = cursor.fetchone()
             print("\nResponse:")
             print(result6[0] if result6 else "No response")
@@ -4,38 +4,8 @@ Generates the df_clean table with MONTH, DAY, and NEIGHBORHOOD columns
 based on the truck's visiting pattern
 """
 
-import snowflake.connector
-import os
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
-
-def connect_to_snowflake():
-    """Connect to Snowflake using environment variables"""
-    try:
-        user = os.getenv('SNOWFLAKE_USER')
-        account = os.getenv('SNOWFLAKE_ACCOUNT')
-        password = os.getenv('SNOWFLAKE_PASSWORD')
-        role = os.getenv('SNOWFLAKE_ROLE', 'ACCOUNTADMIN')
-        warehouse = os.getenv('SNOWFLAKE_WAREHOUSE', 'COMPUTE_WH')
-        
-        if not all([user, account, password]):
-            raise ValueError("Missing required environment variables.")
-        
-        conn = snowflake.connector.connect(
-            user=user,
-            account=account,
-            password=password,
-            role=role,
-            warehouse=warehouse
-        )
-        
-        print("Successfully connected to Snowflake!")
-        return conn
-    except Exception as e:
-        print(f"Error connecting to Snowflake: {e}")
-        return None
+from snowflake_config import connection_config
+from snowflake_pool import connect_to_snowflake
 
 def create_neighborhood_pattern():
     """Create the neighborhood visiting pattern dictionary"""
@@ -59,7 +29,7 @@ def create_neighborhood_pattern():
 
 def create_training_data_table():
     """Create the df_clean table in Snowflake"""
-    conn = connect_to_snowflake()
+    conn = connect_to_snowflake(connection_config(workload='ml'), database=None, schema=None)
     if not conn:
         return False
     
@@ -1,48 +1,17 @@
-import snowflake.connector
-from snowflake.connector import DictCursor
-import os
-from dotenv import load_dotenv
+import time
 
-# Load environment variables
-load_dotenv()
+from snowflake_config import TASTY_BYTES_CONFIG
+from snowflake_load_report import copy_reports, load_metrics
+from snowflake_pool import connect_to_snowflake
+from snowflake_rows import named_rows
+from snowflake_schemas import create_table_sql
 
-def connect_to_snowflake():
-    """
-    Connect to Snowflake using password authentication
-    """
-    try:
-        # Get credentials from environment variables
-        user = os.getenv('SNOWFLAKE_USER')
-        password = os.getenv('SNOWFLAKE_PASSWORD')
-        account = os.getenv('SNOWFLAKE_ACCOUNT')
-        role = os.getenv('SNOWFLAKE_ROLE', 'ACCOUNTADMIN')
-        warehouse = os.getenv('SNOWFLAKE_WAREHOUSE', 'COMPUTE_WH')
-        database = os.getenv('SNOWFLAKE_DATABASE', 'tasty_bytes_sample_data')
-        schema = os.getenv('SNOWFLAKE_SCHEMA', 'raw_pos')
-        
-        if not all([user, password, account]):
-            raise ValueError("Missing required environment variables. Please check your .env file.")
-        
-        conn = snowflake.connector.connect(
-            user=user,
-            password=password,
-            account=account,
-            role=role,
-            warehouse=warehouse,
-            database=database,
-            schema=schema
-        )
-        print("Successfully connected to Snowflake!")
-        return conn
-    except Exception as e:
-        print(f"Error connecting to Snowflake: {e}")
-        return None
 
 def debug_copy_results():
     """
-    Debug the COPY INTO results to find the correct column index
+    Show the COPY INTO result as typed LoadReports
     """
-    conn = connect_to_snowflake()
+    conn = connect_to_snowflake(TASTY_BYTES_CONFIG)
     if not conn:
         return
     
@@ -59,41 +28,20 @@ url = 's3://sfquickstarts/tasty-bytes-builder-education/raw_pos/truck'
 file_format = test_debug.public.csv_ff;""")
         
         # Create table
-        cursor.execute("""CREATE OR REPLACE TABLE test_debug.public.truck
-(
-    truck_id NUMBER(38,0),
-    menu_type_id NUMBER(38,0),
-    primary_city VARCHAR(16777216),
-    region VARCHAR(16777216),
-    iso_region VARCHAR(16777216),
-    country VARCHAR(16777216),
-    iso_country_code VARCHAR(16777216),
-    franchise_flag VARCHAR(16777216),
-    franchise_id NUMBER(38,0),
-    menu_type VARCHAR(16777216),
-    country_code_iso_2 VARCHAR(16777216),
-    country_code_iso_3 VARCHAR(16777216),
-    country_code_iso_numeric VARCHAR(16777216),
-    truck_brand_name VARCHAR(16777216)
-);""")
+        cursor.execute(create_table_sql('test_debug.public.truck', 'truck') + ";")
         
         # Copy data
+        started = time.perf_counter()
         cursor.execute("""COPY INTO test_debug.public.truck
 FROM @test_debug.public.test_stage;""")
         
-        # Get column names
-        columns = [desc[0] for desc in cursor.description]
-        print(f"COPY INTO result columns: {columns}")
-        
-        # Get the actual results
-        results = cursor.fetchall()
-        print(f"COPY INTO results: {results}")
-        
-        if results:
-            row = results[0]
-            print(f"Number of columns in result: {len(row)}")
-            for i, value in enumerate(row):
-                print(f"Column {i}: {value}")
+        # One typed report per file, so no column has to be worked out
+        reports = copy_reports(named_rows(cursor.fetchall(), cursor.description), time.perf_counter() - started)
+        for report in reports:
+            print(f"  {report}")
+        metrics = load_metrics(reports)
+        print(f"COPY INTO: {metrics['rows_loaded']} of {metrics['rows_parsed']} rows from {metrics['files']} "
+              f"file(s) in {metrics['seconds']:.2f}s ({metrics['rows_per_second'] or 0:.0f} rows/s)")
         
         # Clean up
         cursor.execute("DROP DATABASE test_debug;")
@@ -1,73 +1,15 @@
-import snowflake.connector
-from snowflake.connector import DictCursor
-import os
-from dotenv import load_dotenv
+from snowflake_config import TASTY_BYTES_CONFIG
+from snowflake_executor import execute_query
+from snowflake_load_report import copy_reports
+from snowflake_pool import connect_to_snowflake
+from snowflake_schemas import create_table_sql
 
-# Load environment variables
-load_dotenv()
-
-def connect_to_snowflake():
-    """
-    Connect to Snowflake using password authentication
-    """
-    try:
-        # Get credentials from environment variables
-        user = os.getenv('SNOWFLAKE_USER')
-        password = os.getenv('SNOWFLAKE_PASSWORD')
-        account = os.getenv('SNOWFLAKE_ACCOUNT')
-        role = os.getenv('SNOWFLAKE_ROLE', 'ACCOUNTADMIN')
-        warehouse = os.getenv('SNOWFLAKE_WAREHOUSE', 'COMPUTE_WH')
-        database = os.getenv('SNOWFLAKE_DATABASE', 'tasty_bytes_sample_data')
-        schema = os.getenv('SNOWFLAKE_SCHEMA', 'raw_pos')
-        
-        if not all([user, password, account]):
-            raise ValueError("Missing required environment variables. Please check your .env file.")
-        
-        conn = snowflake.connector.connect(
-            user=user,
-            password=password,
-            account=account,
-            role=role,
-            warehouse=warehouse,
-            database=database,
-            schema=schema
-        )
-        print("Successfully connected to Snowflake!")
-        return conn
-    except Exception as e:
-        print(f"Error connecting to Snowflake: {e}")
-        return None
-
-def execute_query(conn, query, description):
-    """
-    Execute a query and return results
-    """
-    try:
-        cursor = conn.cursor()
-        print(f"\n--- {description} ---")
-        print(f"Query: {query}")
-        
-        cursor.execute(query)
-        results = cursor.fetchall()
-        
-        if results:
-            print(f"Results: {results}")
-            return results
-        else:
-            print("Query executed successfully (no results to display)")
-            return []
-        
-        cursor.close()
-        
-    except Exception as e:
-        print(f"Error executing query: {e}")
-        return []
 
 def answer_ingestion_questions():
     """
     Answer the Snowflake ingestion questions by executing SQL commands
     """
-    conn = connect_to_snowflake()
+    conn = connect_to_snowflake(TASTY_BYTES_CONFIG)
     if not conn:
         return
     
@@ -123,9 +65,8 @@ file_format = test_ingestion.public.csv_ff;"""
         for row in results2:
             print(f"File details: {row}")
             if 'truck.csv.gz' in str(row):
-                # The size is typically in the second column (index 1)
                 try:
-                    size = row[1]
+                    size = row['size']
                     print(f"\nAnswer for Question 2: Size of truck.csv.gz is {size}")
                     if size == 5583:
                         print("✅ Correct! Answer is 5583")
@@ -146,23 +87,7 @@ file_format = test_ingestion.public.csv_ff;"""
     print("="*50)
     
     # Create a simplified truck table that matches the file structure (14 columns)
-    create_table_query = """CREATE OR REPLACE TABLE test_ingestion.public.truck
-(
-    truck_id NUMBER(38,0),
-    menu_type_id NUMBER(38,0),
-    primary_city VARCHAR(16777216),
-    region VARCHAR(16777216),
-    iso_region VARCHAR(16777216),
-    country VARCHAR(16777216),
-    iso_country_code VARCHAR(16777216),
-    franchise_flag VARCHAR(16777216),
-    franchise_id NUMBER(38,0),
-    menu_type VARCHAR(16777216),
-    country_code_iso_2 VARCHAR(16777216),
-    country_code_iso_3 VARCHAR(16777216),
-    country_code_iso_numeric VARCHAR(16777216),
-    truck_brand_name VARCHAR(16777216)
-);"""
+    create_table_query = create_table_sql('test_ingestion.public.truck', 'truck') + ";"
     
     execute_query(conn, create_table_query, "Creating truck table")
     
@@ -174,22 +99,20 @@ FROM @test_ingestion.public.test_stage;"""
     
     if results3:
         print("Analyzing copy results...")
-        for row in results3:
-            print(f"Copy result: {row}")
-            # rows_parsed is at index 2
-            if len(row) > 2:
-                rows_parsed = row[2]
-                print(f"\nAnswer for Question 3: rows_parsed = {rows_parsed}")
-                if rows_parsed == 900:
-                    print("✅ Correct! Answer is 900")
-                elif rows_parsed == 300:
-                    print("✅ Correct! Answer is 300")
-                elif rows_parsed == 150:
-                    print("✅ Correct! Answer is 150")
-                elif rows_parsed == 450:
-                    print("✅ Correct! Answer is 450")
-                else:
-                    print(f"❌ Unexpected rows_parsed: {rows_parsed}")
+        for report in copy_reports(results3):
+            print(f"Copy result: {report}")
+            rows_parsed = report.rows_parsed
+            print(f"\nAnswer for Question 3: rows_parsed = {rows_parsed}")
+            if rows_parsed == 900:
+                print("✅ Correct! Answer is 900")
+            elif rows_parsed == 300:
+                print("✅ Correct! Answer is 300")
+            elif rows_parsed == 150:
+                print("✅ Correct! Answer is 150")
+            elif rows_parsed == 450:
+                print("✅ Correct! Answer is 450")
+            else:
+                print(f"❌ Unexpected rows_parsed: {rows_parsed}")
     
     # Question 4: Knowledge question about external stages
     print("\n" + "="*50)
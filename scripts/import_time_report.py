@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Import-Time Report
+Runs `python -X importtime` on each script module and summarises where its
+cold-start time goes, so start-up regressions show up before they pile up.
+It also fails when a module in DEFERRED_IMPORTS ends up executing one of the
+heavy modules it is meant to defer (see lazy_imports.py).
+
+Usage:
+    python import_time_report.py                      # every script in this folder
+    python import_time_report.py table_questions.py   # selected scripts
+    python import_time_report.py --save baseline.json
+    python import_time_report.py --compare baseline.json
+"""
+
+import glob
+import json
+import os
+import subprocess
+import sys
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Flag a script when its import time grows by more than this versus the baseline
+REGRESSION_THRESHOLD = 0.20
+
+# Number of slowest top-level packages shown per script
+TOP_PACKAGES = 3
+
+# Modules that must not be in sys.modules once the script is imported; a
+# deferred snowflake.connector has not imported its submodules yet
+DEFERRED_IMPORTS = {
+    'snowflake_pool.py': ('snowflake.connector.connection',),
+    'snowflake_token_cache.py': ('snowflake.connector.connection',),
+    # Shipped with streamlit_app.py to Streamlit in Snowflake, which has no snowflake_config/.env
+    'snowflake_arrow.py': ('snowflake_config', 'dotenv', 'pyarrow.lib'),
+}
+
+
+def find_scripts():
+    """
+    Script modules that can be imported without side effects, plus the
+    modules in DEFERRED_IMPORTS
+    """
+    scripts = []
+    for path in sorted(glob.glob(os.path.join(SCRIPTS_DIR, '*.py'))):
+        with open(path, encoding='utf-8') as f:
+            if '__name__ == "__main__"' in f.read():
+                scripts.append(os.path.basename(path))
+    # Libraries with a deferred-import contract are checked even without a __main__
+    return scripts + sorted(script for script in DEFERRED_IMPORTS if script not in scripts)
+
+
+def parse_importtime(stderr, module):
+    """
+    Parse -X importtime output into (module_cumulative_us, {package: cumulative_us})
+    where the packages are the ones the module imports directly
+    """
+    total = 0
+    packages = {}
+    children = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        _, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        # Nesting is shown by indentation, two spaces per level. A module's
+        # line comes after all of its children, so collect them until then.
+        level = (len(name) - len(name.lstrip()) - 1) // 2
+        name = name.strip()
+        if level == 1:
+            package = name.split('.')[0]
+            children[package] = children.get(package, 0) + int(cumulative_us)
+        elif level == 0:
+            if name == module:
+                total = int(cumulative_us)
+                packages = children
+            children = {}
+    return total, packages
+
+
+def measure_script(script):
+    """
+    Import one script module in a fresh interpreter and time it
+    """
+    module = os.path.splitext(script)[0]
+    deferred = DEFERRED_IMPORTS.get(script, ())
+    code = f"import {module}, sys; print(','.join(name for name in {deferred!r} if name in sys.modules))"
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=SCRIPTS_DIR, capture_output=True, text=True
+    )
+    total, packages = parse_importtime(result.stderr, module)
+    lines = result.stdout.strip().splitlines()
+    return {
+        'script': script,
+        'ok': result.returncode == 0,
+        'eager': lines[-1].split(',') if lines and lines[-1] else [],
+        'total_ms': round(total / 1000, 1),
+        'top_packages': {
+            name: round(us / 1000, 1)
+            for name, us in sorted(packages.items(), key=lambda item: -item[1])[:TOP_PACKAGES]
+        }
+    }
+
+
+def print_report(rows, baseline=None):
+    print(f"{'Script':<42} {'Import ms':>10}  Slowest packages")
+    print("-" * 100)
+    regressions = []
+    for row in sorted(rows, key=lambda r: -r['total_ms']):
+        note = '' if row['ok'] else '  [import failed]'
+        if row['eager']:
+            note += f"  [NOT DEFERRED: {', '.join(row['eager'])}]"
+            regressions.append(row['script'])
+        previous = (baseline or {}).get(row['script'])
+        if previous and row['total_ms'] > previous * (1 + REGRESSION_THRESHOLD):
+            note += f"  [REGRESSION: was {previous} ms]"
+            regressions.append(row['script'])
+        packages = ', '.join(f"{name} {ms}ms" for name, ms in row['top_packages'].items())
+        print(f"{row['script']:<42} {row['total_ms']:>10}  {packages}{note}")
+    print("-" * 100)
+    print(f"Total import time across {len(rows)} scripts: {sum(r['total_ms'] for r in rows):.1f} ms")
+    return regressions
+
+
+def main(argv):
+    save_path = compare_path = None
+    if '--save' in argv:
+        save_path = argv.pop(argv.index('--save') + 1)
+        argv.remove('--save')
+    if '--compare' in argv:
+        compare_path = argv.pop(argv.index('--compare') + 1)
+        argv.remove('--compare')
+
+    scripts = argv or find_scripts()
+    rows = [measure_script(script) for script in scripts]
+
+    baseline = None
+    if compare_path:
+        with open(compare_path) as f:
+            baseline = {row['script']: row['total_ms'] for row in json.load(f)}
+
+    regressions = print_report(rows, baseline)
+
+    if save_path:
+        with open(save_path, 'w') as f:
+            json.dump(rows, f, indent=2)
+        print(f"Saved report to {save_path}")
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,49 @@
+"""
+Deferred imports for heavy dependencies
+snowflake.connector, pandas and Snowpark take a noticeable share of a
+script's start-up time. lazy_import() hands back a module object that is
+only executed on first attribute access, so scripts that never reach a
+query never pay for it. Set SNOWFLAKE_EAGER_IMPORTS=1 to import everything
+up front (handy when chasing an ImportError).
+"""
+
+import importlib
+import importlib.util
+import os
+import sys
+import threading
+
+# Python < 3.12 executes a lazy module in whichever thread touches it first, and
+# other threads see it half-initialised meanwhile; loaded() serialises that
+_load_lock = threading.RLock()
+
+
+def lazy_import(name):
+    """
+    Return the named module, deferring its execution until first use
+    """
+    if name in sys.modules:
+        # Possibly another caller's deferred module: import_module() would execute it here
+        return sys.modules[name]
+    if os.getenv('SNOWFLAKE_EAGER_IMPORTS') == '1':
+        return importlib.import_module(name)
+
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+def loaded(module):
+    """
+    The module, executed if it was still deferred; safe to call from several
+    threads at once, e.g. when a pool opens its first connections in parallel
+    """
+    with _load_lock:
+        module.__name__
+    return module
@@ -1,48 +1,17 @@
-import snowflake.connector
-from snowflake.connector import DictCursor
-import os
-from dotenv import load_dotenv
+import sys
 
-# Load environment variables
-load_dotenv()
+from snowflake_config import connection_config
+from snowflake_loader import LOAD_TIMEOUT, RAW_POS_COLUMNS, load_tables
+from snowflake_pool import connect_to_snowflake
+from snowflake_query_tags import set_step
 
-def connect_to_snowflake():
-    """
-    Connect to Snowflake using password authentication
-    """
-    try:
-        # Get credentials from environment variables
-        user = os.getenv('SNOWFLAKE_USER')
-        password = os.getenv('SNOWFLAKE_PASSWORD')
-        account = os.getenv('SNOWFLAKE_ACCOUNT')
-        role = os.getenv('SNOWFLAKE_ROLE', 'ACCOUNTADMIN')
-        warehouse = os.getenv('SNOWFLAKE_WAREHOUSE', 'COMPUTE_WH')
-        database = os.getenv('SNOWFLAKE_DATABASE', 'tasty_bytes_sample_data')
-        schema = os.getenv('SNOWFLAKE_SCHEMA', 'raw_pos')
-        
-        if not all([user, password, account]):
-            raise ValueError("Missing required environment variables. Please check your .env file.")
-        
-        conn = snowflake.connector.connect(
-            user=user,
-            password=password,
-            account=account,
-            role=role,
-            warehouse=warehouse,
-            database=database,
-            schema=schema
-        )
-        print("Successfully connected to Snowflake!")
-        return conn
-    except Exception as e:
-        print(f"Error connecting to Snowflake: {e}")
-        return None
 
-def load_truck_franchise_data():
+def load_truck_franchise_data(incremental=False):
     """
-    Load truck and franchise data with correct table structures
+    Load truck and franchise data with correct table structures; incremental
+    copies only new stage files into the existing tables
     """
-    conn = connect_to_snowflake()
+    conn = connect_to_snowflake(connection_config('tasty_bytes', workload='load'), schema='public')
     if not conn:
         return
     
@@ -52,32 +21,22 @@ def load_truck_franchise_data():
         # Switch to public schema
         cursor.execute("USE SCHEMA public;")
         
-        # Create truck table with correct structure (14 columns)
-        print("=== CREATING TRUCK TABLE ===")
-        cursor.execute("""CREATE OR REPLACE TABLE truck (
-            truck_id NUMBER(38,0),
-            menu_type_id NUMBER(38,0),
-            primary_city VARCHAR(16777216),
-            region VARCHAR(16777216),
-            iso_region VARCHAR(16777216),
-            country VARCHAR(16777216),
-            iso_country_code VARCHAR(16777216),
-            franchise_flag VARCHAR(16777216),
-            franchise_id NUMBER(38,0),
-            menu_type VARCHAR(16777216),
-            country_code_iso_2 VARCHAR(16777216),
-            country_code_iso_3 VARCHAR(16777216),
-            country_code_iso_numeric VARCHAR(16777216),
-            truck_brand_name VARCHAR(16777216)
-        );""")
-        print("Truck table created successfully")
-        
-        # Load truck data
-        cursor.execute("COPY INTO truck FROM @blob_stage/raw_pos/truck/;")
-        load_result = cursor.fetchall()
-        print(f"Truck load result: {load_result}")
+        # Create and load the truck (14 columns) and franchise (7 columns) tables side by side
+        print("=== LOADING TRUCK AND FRANCHISE TABLES ===")
+        loads = [
+            {'table': 'truck', 'stage': '@blob_stage/raw_pos/truck/',
+             'columns': RAW_POS_COLUMNS['truck'], 'timeout': LOAD_TIMEOUT},
+            {'table': 'franchise', 'stage': '@blob_stage/raw_pos/franchise/',
+             'columns': RAW_POS_COLUMNS['franchise'], 'timeout': LOAD_TIMEOUT},
+        ]
+        results = load_tables(loads, connection_config('tasty_bytes', workload='load'), incremental=incremental,
+                              schema='public')
+        failed = [result for result in results.values() if result.status != 'loaded']
+        if failed:
+            raise RuntimeError('; '.join(f"{result.table}: {result.error}" for result in failed))
         
         # Check truck row count
+        set_step('check_truck')
         cursor.execute("SELECT COUNT(*) FROM truck;")
         truck_count = cursor.fetchone()[0]
         print(f"Truck table has {truck_count} rows")
@@ -89,25 +48,8 @@ def load_truck_franchise_data():
         for row in truck_samples:
             print(f"  {row}")
         
-        # Create franchise table with correct structure (7 columns)
-        print("\n=== CREATING FRANCHISE TABLE ===")
-        cursor.execute("""CREATE OR REPLACE TABLE franchise (
-            franchise_id NUMBER(38,0),
-            first_name VARCHAR(16777216),
-            last_name VARCHAR(16777216),
-            city VARCHAR(16777216),
-            country VARCHAR(16777216),
-            phone_number VARCHAR(16777216),
-            email VARCHAR(16777216)
-        );""")
-        print("Franchise table created successfully")
-        
-        # Load franchise data
-        cursor.execute("COPY INTO franchise FROM @blob_stage/raw_pos/franchise/;")
-        load_result = cursor.fetchall()
-        print(f"Franchise load result: {load_result}")
-        
         # Check franchise row count
+        set_step('check_franchise')
         cursor.execute("SELECT COUNT(*) FROM franchise;")
         franchise_count = cursor.fetchone()[0]
         print(f"Franchise table has {franchise_count} rows")
@@ -121,14 +63,15 @@ def load_truck_franchise_data():
         
         # Check if we can find Sara Nicholson
         print("\n=== CHECKING FOR SARA NICHOLSON ===")
-        cursor.execute("SELECT * FROM franchise WHERE first_name = 'Sara' AND last_name = 'Nicholson';")
+        set_step('find_sara')
+        cursor.execute("SELECT * FROM franchise WHERE first_name = ? AND last_name = ?;", ('Sara', 'Nicholson'))
         sara_data = cursor.fetchall()
         if sara_data:
             print(f"Sara Nicholson found: {sara_data[0]}")
             sara_franchise_id = sara_data[0][0]
             
             # Find truck for Sara
-            cursor.execute(f"SELECT * FROM truck WHERE franchise_id = {sara_franchise_id};")
+            cursor.execute("SELECT * FROM truck WHERE franchise_id = ?;", (sara_franchise_id,))
             sara_truck = cursor.fetchall()
             if sara_truck:
                 print(f"Sara's truck: {sara_truck[0]}")
@@ -146,4 +89,4 @@ def load_truck_franchise_data():
             conn.close()
 
 if __name__ == "__main__":
-    load_truck_franchise_data()
+    load_truck_franchise_data(incremental='--incremental' in sys.argv[1:])
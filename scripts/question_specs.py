@@ -0,0 +1,243 @@
+"""
+Question specs for snowflake_questions.py
+The table, database, view, warehouse, ingestion and semi-structured data
+questions of the *_questions.py scripts, declared once: setup, the SQL that
+answers the question, where the answer is in its result, and the options.
+Knowledge questions that no statement answers are left to the scripts.
+"""
+
+from snowflake_schemas import columns_sql
+
+# The truck table as loaded from the raw_pos/truck stage files
+TRUCK_COLUMNS = columns_sql('truck')
+
+TRUCK_FRANCHISE_VIEW = """AS
+SELECT
+    t.*,
+    f.first_name AS franchisee_first_name,
+    f.last_name AS franchisee_last_name
+FROM tasty_bytes_sample_data.raw_pos.truck t
+JOIN tasty_bytes_sample_data.raw_pos.franchise f
+    ON t.franchise_id = f.franchise_id"""
+
+TRUCK_STAGE = """CREATE OR REPLACE STAGE test_stage
+url = 's3://sfquickstarts/tasty-bytes-builder-education/raw_pos/truck'
+file_format = csv_ff"""
+
+STATUS_OPTIONS = ['Statement executed successfully.']
+
+SPECS = [
+    # -- table_questions.py --------------------------------------------------
+    {
+        'id': 'table.q1',
+        'group': 'table',
+        'title': 'bytes of an empty table',
+        'setup': ["CREATE TABLE test_table (id NUMBER, name VARCHAR(50))"],
+        'sql': "SHOW TABLES",
+        'match': {'column': 'bytes', 'where': {'name': 'TEST_TABLE'}},
+        'options': [1536, 2048, 0, 2560],
+    },
+    {
+        'id': 'table.q2',
+        'group': 'table',
+        'title': 'bytes of a table holding one number',
+        'setup': [
+            "CREATE TABLE test_table2 (test_number NUMBER)",
+            "INSERT INTO test_table2 (test_number) VALUES (42)",
+        ],
+        'sql': "SHOW TABLES",
+        'match': {'column': 'bytes', 'where': {'name': 'TEST_TABLE2'}},
+        'options': [2048, 0, 1024, 8192],
+    },
+    {
+        'id': 'table.q3',
+        'group': 'table',
+        'title': 'UNDROP TABLE status',
+        'setup': ["CREATE TABLE test_table (id NUMBER, name VARCHAR(50))", "DROP TABLE test_table"],
+        'sql': "UNDROP TABLE test_table",
+        'options': STATUS_OPTIONS + ['Table TEST_TABLE successfully restored.'],
+    },
+    # -- database_questions.py -----------------------------------------------
+    {
+        'id': 'database.q1',
+        'group': 'database',
+        'title': 'is_default of a new database',
+        'setup': ["CREATE DATABASE {prefix}_db"],
+        'sql': "SHOW DATABASES LIKE '{prefix}_db'",
+        'match': {'column': 'is_default'},
+        'options': ['N', 'Y', 'No', 'Yes'],
+        'teardown': ["DROP DATABASE IF EXISTS {prefix}_db"],
+    },
+    {
+        'id': 'database.q2',
+        'group': 'database',
+        'title': 'UNDROP DATABASE status',
+        'setup': ["CREATE DATABASE {prefix}_db", "DROP DATABASE {prefix}_db"],
+        'sql': "UNDROP DATABASE {prefix}_db",
+        'options': ['Database successfully restored.', 'Database {prefix}_db successfully restored.'] + STATUS_OPTIONS,
+        'teardown': ["DROP DATABASE IF EXISTS {prefix}_db"],
+    },
+    {
+        'id': 'database.q3',
+        'group': 'database',
+        'title': 'USE DATABASE status',
+        'setup': ["CREATE DATABASE {prefix}_db", "CREATE DATABASE {prefix}_db2"],
+        'sql': "USE DATABASE {prefix}_db",
+        'options': STATUS_OPTIONS + ['Database {prefix}_db now in use.'],
+        'teardown': ["DROP DATABASE IF EXISTS {prefix}_db", "DROP DATABASE IF EXISTS {prefix}_db2"],
+    },
+    {
+        'id': 'database.q4',
+        'group': 'database',
+        'title': 'is_current of a new schema',
+        'setup': ["CREATE SCHEMA {prefix}_schema"],
+        'sql': "SHOW SCHEMAS IN DATABASE {database}",
+        'match': {'column': 'is_current', 'where': {'name': '{prefix}_schema'}},
+        'options': ['Yes', 'N', 'No', 'Y'],
+        'teardown': ["DROP SCHEMA IF EXISTS {database}.{prefix}_schema"],
+    },
+    {
+        'id': 'database.q5',
+        'group': 'database',
+        'title': 'kind column of DESCRIBE DATABASE',
+        'setup': ["CREATE DATABASE {prefix}_db", "CREATE SCHEMA {prefix}_db.test_schema"],
+        'sql': "DESCRIBE DATABASE {prefix}_db",
+        'match': {'column': 'kind', 'where': {'name': 'TEST_SCHEMA'}},
+        'options': ['SCHEMA', 'Schema', 'Object', 'object'],
+        'teardown': ["DROP DATABASE IF EXISTS {prefix}_db"],
+    },
+    {
+        'id': 'database.q6',
+        'group': 'database',
+        'title': 'UNDROP SCHEMA status',
+        'setup': ["CREATE SCHEMA test_schema", "DROP SCHEMA test_schema"],
+        'sql': "UNDROP SCHEMA test_schema",
+        'options': ['Schema TEST_SCHEMA successfully restored.'] + STATUS_OPTIONS,
+        'teardown': ["DROP SCHEMA IF EXISTS test_schema"],
+    },
+    # -- view_questions.py ---------------------------------------------------
+    {
+        'id': 'view.q1',
+        'group': 'view',
+        'title': "make of Sara Nicholson's truck",
+        'setup': ["CREATE VIEW truck_franchise " + TRUCK_FRANCHISE_VIEW],
+        'sql': "SELECT make FROM truck_franchise "
+               "WHERE franchisee_first_name = 'Sara' AND franchisee_last_name = 'Nicholson'",
+        'options': ['Chevrolet', 'Volkswagen', 'Airstream', 'Nissan'],
+    },
+    {
+        'id': 'view.q2',
+        'group': 'view',
+        'title': 'type of TRUCK_ID in the view',
+        'setup': ["CREATE VIEW truck_franchise " + TRUCK_FRANCHISE_VIEW],
+        'sql': "DESCRIBE VIEW truck_franchise",
+        'match': {'column': 'type', 'where': {'name': 'TRUCK_ID'}},
+        'options': ['INT', 'DECIMAL', 'NUMBER(38,0)', 'TINYINT'],
+    },
+    {
+        'id': 'view.q3',
+        'group': 'view',
+        'title': 'DROP VIEW status',
+        'setup': ["CREATE VIEW truck_franchise " + TRUCK_FRANCHISE_VIEW],
+        'sql': "DROP VIEW truck_franchise",
+        'options': ['TRUCK_FRANCHISE successfully dropped.'] + STATUS_OPTIONS,
+    },
+    {
+        'id': 'view.q4',
+        'group': 'view',
+        'title': 'materialized view over a join',
+        'sql': "CREATE MATERIALIZED VIEW truck_franchise_materialized " + TRUCK_FRANCHISE_VIEW,
+        'error_is_answer': True,
+        'options': [
+            'Invalid view definition.',
+            'View TRUCK_FRANCHISE_MATERIALIZED successfully created.',
+            'Invalid materialized view definition. More than one table referenced in the view definition',
+            'Materialized view TRUCK_FRANCHISE_MATERIALIZED successfully created.',
+        ],
+    },
+    {
+        'id': 'view.q5',
+        'group': 'view',
+        'title': 'rows in the nissan materialized view',
+        'setup': ["CREATE MATERIALIZED VIEW nissan AS "
+                  "SELECT t.* FROM tasty_bytes_sample_data.raw_pos.truck t WHERE make = 'Nissan'"],
+        'sql': "SELECT COUNT(*) FROM nissan",
+        'options': [9, 6, 15, 12],
+    },
+    # -- warehouse_questions.py ----------------------------------------------
+    {
+        'id': 'warehouse.q1',
+        'group': 'warehouse',
+        'title': 'size of a new warehouse',
+        'setup': ["CREATE WAREHOUSE {prefix}_wh"],
+        'sql': "SHOW WAREHOUSES LIKE '{prefix}_wh'",
+        'match': {'column': 'size'},
+        'options': ['X-Small', 'Small', 'Medium', 'Large'],
+        'teardown': ["DROP WAREHOUSE IF EXISTS {prefix}_wh"],
+    },
+    {
+        'id': 'warehouse.q4',
+        'group': 'warehouse',
+        'title': 'size after ALTER WAREHOUSE ... SMALL',
+        'setup': ["CREATE WAREHOUSE {prefix}_wh", "ALTER WAREHOUSE {prefix}_wh SET warehouse_size = 'SMALL'"],
+        'sql': "SHOW WAREHOUSES LIKE '{prefix}_wh'",
+        'match': {'column': 'size'},
+        'options': ['X-Small', 'Small', 'Medium', 'Large'],
+        'teardown': ["DROP WAREHOUSE IF EXISTS {prefix}_wh"],
+    },
+    {
+        'id': 'warehouse.q5',
+        'group': 'warehouse',
+        'title': 'auto_suspend set to 2 minutes',
+        'setup': ["CREATE WAREHOUSE {prefix}_wh", "ALTER WAREHOUSE {prefix}_wh SET auto_suspend = 120"],
+        'sql': "SHOW WAREHOUSES LIKE '{prefix}_wh'",
+        'match': {'column': 'auto_suspend'},
+        'options': [2, 120, 7200, 600],
+        'teardown': ["DROP WAREHOUSE IF EXISTS {prefix}_wh"],
+    },
+    # -- ingestion_questions*.py ---------------------------------------------
+    {
+        'id': 'ingestion.q1',
+        'group': 'ingestion',
+        'title': 'CREATE STAGE status',
+        'setup': ["CREATE OR REPLACE FILE FORMAT csv_ff type = 'csv'"],
+        'sql': TRUCK_STAGE,
+        'options': ['Stage area TEST_STAGE successfully created.', 'Stage TEST_STAGE successfully created.',
+                    'STAGE SUCCESSFULLY CREATED.'] + STATUS_OPTIONS,
+    },
+    {
+        'id': 'ingestion.q2',
+        'group': 'ingestion',
+        'title': 'size of truck.csv.gz on the stage',
+        'setup': ["CREATE OR REPLACE FILE FORMAT csv_ff type = 'csv'", TRUCK_STAGE],
+        'sql': "LIST @test_stage",
+        'match': {'column': 'size'},
+        'options': [5583, 16384, 1024, 4096],
+    },
+    {
+        'id': 'ingestion.q3',
+        'group': 'ingestion',
+        'title': 'rows_parsed when copying the truck files',
+        'setup': ["CREATE OR REPLACE FILE FORMAT csv_ff type = 'csv'", TRUCK_STAGE,
+                  "CREATE OR REPLACE TABLE truck " + TRUCK_COLUMNS],
+        'sql': "COPY INTO truck FROM @test_stage",
+        'match': {'column': 'rows_parsed'},
+        'options': [900, 300, 150, 450],
+    },
+    # -- semi_structured_questions.py ----------------------------------------
+    {
+        'id': 'semi_structured.q1',
+        'group': 'semi_structured',
+        'title': 'declared type of MENU_ITEM_HEALTH_METRICS_OBJ',
+        'sql': "DESCRIBE TABLE tasty_bytes_sample_data.raw_pos.menu",
+        'match': {'column': 'type', 'where': {'name': 'MENU_ITEM_HEALTH_METRICS_OBJ'}},
+        'options': ['VARCHAR', 'OBJECT', 'ARRAY', 'VARIANT'],
+    },
+    {
+        'id': 'semi_structured.q2',
+        'group': 'semi_structured',
+        'title': 'TYPEOF of MENU_ITEM_HEALTH_METRICS_OBJ',
+        'sql': "SELECT TYPEOF(menu_item_health_metrics_obj) FROM tasty_bytes_sample_data.raw_pos.menu LIMIT 1",
+        'options': ['ARRAY', 'VARIANT', 'VARCHAR', 'OBJECT'],
+    },
+]
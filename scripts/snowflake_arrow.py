@@ -0,0 +1,196 @@
+"""
+Arrow-batch result fetching
+Shared fetch layer for every path that turns query results into DataFrames.
+Results come back as pyarrow RecordBatches straight from the connector's
+Arrow result chunks, so nothing is materialised as Python tuples:
+
+- fetch_arrow_batches() / fetch_pandas_batches() stream batch by batch
+- fetch_arrow_table() concatenates the batches without copying them
+- fetch_pandas() converts once, at the end
+
+Native types are kept: NUMBER becomes int64 or float64 rather than Python
+Decimals, and DATE/TIMESTAMP become datetime64 columns, so callers do not
+need pd.to_numeric()/pd.to_datetime() passes.
+
+A source is a connection or Snowpark Session plus SQL (with optional qmark
+parameters), an already executed cursor, or a Snowpark DataFrame. Cursors without Arrow support (JSON-format results such
+as SHOW, the offline backend) are converted from fetchmany() batches, typed
+from the cursor description.
+"""
+
+import importlib
+
+from lazy_imports import lazy_import
+from snowflake_executor import run_statement
+from snowflake_params import bind_values, execute_bound
+
+pa = lazy_import('pyarrow')
+
+# Rows per batch when a result has to be converted from Python rows
+ROW_BATCH_SIZE = 10000
+
+# Connector type codes (snowflake.connector.constants.FIELD_TYPES) for
+# columns whose Arrow type can be derived from the cursor description
+_TIMESTAMP_CODES = {4, 6, 7, 8}
+_TYPE_CODES = {
+    1: 'float64',
+    2: 'string',
+    3: 'date32',
+    11: 'binary',
+    13: 'bool_',
+}
+
+
+def _arrow_type(column):
+    """
+    Arrow type for a cursor description entry, or None to infer it from the values
+    """
+    type_code, scale = column[1], column[5]
+    if type_code == 0:
+        return pa.int64() if not scale else pa.float64()
+    if type_code in _TIMESTAMP_CODES:
+        return pa.timestamp('ns')
+    name = _TYPE_CODES.get(type_code)
+    return getattr(pa, name)() if name else None
+
+
+def _normalize_column(array):
+    # Imported here: finding a submodule's spec imports its parent, which would undo the deferred pyarrow
+    pc = importlib.import_module('pyarrow.compute')
+    if not pa.types.is_decimal(array.type):
+        return array
+    if array.type.scale == 0:
+        # NUMBER(38,0) is the default integer type; a safe cast fails only on real overflow
+        try:
+            return pc.cast(array, pa.int64())
+        except pa.ArrowInvalid:
+            pass
+    return pc.cast(array, pa.float64(), safe=False)
+
+
+def _normalize(batch):
+    """
+    Replace Decimal columns with int64/float64; other columns are passed through untouched
+    """
+    if not any(pa.types.is_decimal(field.type) for field in batch.schema):
+        return batch
+    return pa.RecordBatch.from_arrays([_normalize_column(column) for column in batch.columns],
+                                      names=batch.schema.names)
+
+
+def _rows_to_batch(rows, description):
+    columns = list(zip(*rows)) if rows else [()] * len(description)
+    arrays = []
+    for values, column in zip(columns, description):
+        arrow_type = _arrow_type(column)
+        try:
+            arrays.append(pa.array(values, type=arrow_type))
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            arrays.append(pa.array(values))
+    return pa.RecordBatch.from_arrays(arrays, names=[column[0] for column in description])
+
+
+def _cursor_batches(cursor):
+    """
+    Yield a cursor's result as RecordBatches; an empty result yields one
+    empty batch so the column names and types survive
+    """
+    description = cursor.description or []
+    tables = None
+    native = getattr(cursor, 'fetch_arrow_batches', None)
+    if native is not None:
+        try:
+            tables = native()
+        except Exception as e:
+            # NotSupportedError: the result was sent as JSON, not Arrow
+            if type(e).__name__ != 'NotSupportedError':
+                raise
+    produced = False
+    if tables is not None:
+        for table in tables:
+            for batch in table.to_batches():
+                produced = True
+                yield _normalize(batch)
+    else:
+        while True:
+            rows = cursor.fetchmany(ROW_BATCH_SIZE)
+            if not rows:
+                break
+            produced = True
+            yield _rows_to_batch(rows, description)
+    if not produced:
+        yield _rows_to_batch([], description)
+
+
+def _snowpark_batches(dataframe):
+    """
+    Run a Snowpark DataFrame's SQL on the session's connector connection so
+    the Arrow result chunks are used directly
+    """
+    plan = dataframe.queries
+    cursor = dataframe.session.connection.cursor()
+    try:
+        *setup, query = plan['queries']
+        for statement in setup:
+            cursor.execute(statement)
+        cursor.execute(query)
+        yield from _cursor_batches(cursor)
+    finally:
+        for statement in plan.get('post_actions', []):
+            cursor.execute(statement)
+        cursor.close()
+
+
+def fetch_arrow_batches(source, sql=None, params=None):
+    """
+    Yield the result as pyarrow RecordBatches
+    """
+    if hasattr(source, 'queries') and hasattr(source, 'session'):
+        yield from _snowpark_batches(source)
+        return
+    if hasattr(source, 'sql') and hasattr(source, 'connection') and not hasattr(source, 'cursor'):
+        # Snowpark Session: run on its connector connection to keep the Arrow chunks and the binds
+        connection = source.connection
+        cursor = connection.cursor()
+        execute_bound(cursor, sql, params or (), connection)
+        try:
+            yield from _cursor_batches(cursor)
+        finally:
+            cursor.close()
+        return
+    if sql is not None:
+        cursor = run_statement(source, sql, bind_values(params) if params is not None else None)
+    else:
+        cursor = source
+    try:
+        yield from _cursor_batches(cursor)
+    finally:
+        if sql is not None:
+            cursor.close()
+
+
+def fetch_pandas_batches(source, sql=None, params=None):
+    """
+    Yield the result as pandas DataFrames, one per Arrow batch
+    """
+    for batch in fetch_arrow_batches(source, sql, params):
+        yield batch.to_pandas(date_as_object=False)
+
+
+def fetch_arrow_table(source, sql=None, params=None):
+    """
+    The whole result as one pyarrow Table; the batches become its chunks without a copy
+    """
+    batches = list(fetch_arrow_batches(source, sql, params))
+    schema = batches[0].schema
+    if all(batch.schema.equals(schema) for batch in batches):
+        return pa.Table.from_batches(batches, schema=schema)
+    # Types inferred per batch (e.g. a column that is all NULL in one batch) are unified
+    return pa.concat_tables([pa.Table.from_batches([batch]) for batch in batches], promote_options='permissive')
+
+
+def fetch_pandas(source, sql=None, params=None):
+    """
+    The whole result as one DataFrame with native numeric and datetime columns
+    """
+    return fetch_arrow_table(source, sql, params).to_pandas(date_as_object=False)
@@ -0,0 +1,218 @@
+"""
+Asynchronous query submission for Snowflake
+Submits statements with execute_async() and tracks them by query ID, so
+independent queries overlap on the warehouse instead of queuing behind each
+other on the client. Results are fetched back with get_results_from_sfqid().
+Queries still running are cancelled server-side by query ID when gather()
+gives up on them or the user presses Ctrl-C (snowflake_timeouts.py).
+A status poll that fails on the wire (see snowflake_executor.classify_error)
+is retried on the next poll; only the query's own failure is its result.
+"""
+
+import time
+from contextlib import nullcontext
+
+from snowflake_executor import TRANSIENT, classify_error
+from snowflake_query_tags import query_step
+from snowflake_timeouts import cancel_query, track_query, untrack_query
+
+# Polling backoff while waiting on a query: start fast, back off to at most this
+POLL_INITIAL = 0.05
+POLL_MAX = 1.0
+
+# Consecutive status polls that may fail on the wire before the error is raised
+MAX_POLL_ERRORS = 5
+
+
+class QueryFuture:
+    """
+    Handle for one asynchronously submitted statement
+    """
+
+    def __init__(self, conn, query_id, sql, description=None):
+        self.conn = conn
+        self.query_id = query_id
+        self.sql = sql
+        self.description = description
+        self.columns = None
+        self._rows = None
+        self._error = None
+        self._finished = False
+        self._poll_errors = 0
+
+    def done(self):
+        """
+        Poll the server once; True when the query is no longer running.
+        A poll that fails on the wire counts as still running, and is raised
+        once MAX_POLL_ERRORS polls in a row have failed; the query itself
+        keeps running on the server either way.
+        """
+        if self._finished:
+            return True
+        try:
+            status = self.conn.get_query_status_throw_if_error(self.query_id)
+        except Exception as e:
+            if classify_error(e) != TRANSIENT:
+                # The query failed: that is its result
+                self._error = e
+                self._finish()
+                return True
+            self._poll_errors += 1
+            if self._poll_errors >= MAX_POLL_ERRORS:
+                self._poll_errors = 0
+                raise
+            return False
+        self._poll_errors = 0
+        if self.conn.is_still_running(status):
+            return False
+        self._finish()
+        return True
+
+    def _finish(self):
+        self._finished = True
+        untrack_query(self.query_id)
+
+    def cancel(self):
+        """
+        Ask the server to cancel the query; False if it had already finished.
+        result() then raises the cancellation error.
+        """
+        if self.done():
+            return False
+        return cancel_query(self.conn, self.query_id)
+
+    def wait(self, timeout=None):
+        """
+        Block until the query finishes; returns False if the timeout passed first
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        delay = POLL_INITIAL
+        while not self.done():
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(delay)
+            delay = min(delay * 2, POLL_MAX)
+        return True
+
+    def result(self, timeout=None):
+        """
+        Wait for the query and return its rows, raising the query's error if it failed
+        """
+        if not self.wait(timeout):
+            raise TimeoutError(f"Query {self.query_id} still running after {timeout}s")
+        if self._error is not None:
+            raise self._error
+        if self._rows is None:
+            cursor = self.conn.cursor()
+            try:
+                cursor.get_results_from_sfqid(self.query_id)
+                self._rows = cursor.fetchall()
+                self.columns = [desc[0] for desc in cursor.description or []]
+            finally:
+                cursor.close()
+        return self._rows
+
+    def exception(self, timeout=None):
+        try:
+            self.result(timeout)
+        except TimeoutError:
+            raise
+        except Exception as e:
+            return e
+        return None
+
+
+class AsyncQueryRunner:
+    """
+    Submits statements asynchronously with at most max_concurrency in flight
+    """
+
+    def __init__(self, conn, max_concurrency=4):
+        self.conn = conn
+        self.max_concurrency = max_concurrency
+        self._in_flight = []
+
+    def _wait_for_slot(self):
+        delay = POLL_INITIAL
+        while True:
+            self._in_flight = [future for future in self._in_flight if not future.done()]
+            if len(self._in_flight) < self.max_concurrency:
+                return
+            time.sleep(delay)
+            delay = min(delay * 2, POLL_MAX)
+
+    def submit(self, sql, description=None, step=None, timeout=None):
+        """
+        Start a statement and return its QueryFuture without waiting for it;
+        step names it in the statement's query tag, and the server cancels it
+        after timeout seconds
+        """
+        self._wait_for_slot()
+        cursor = self.conn.cursor()
+        try:
+            with query_step(step) if step else nullcontext():
+                cursor.execute_async(sql, **({'timeout': timeout} if timeout else {}))
+            future = QueryFuture(self.conn, cursor.sfqid, sql, description)
+        finally:
+            cursor.close()
+        track_query(getattr(self.conn, 'raw_connection', self.conn), future.query_id)
+        self._in_flight.append(future)
+        return future
+
+    def map(self, statements):
+        """
+        Submit a list of SQL strings or {"sql", "description", "step", "timeout"} dicts
+        """
+        futures = []
+        for statement in statements:
+            if isinstance(statement, dict):
+                futures.append(self.submit(statement['sql'], statement.get('description'), statement.get('step'),
+                                           statement.get('timeout')))
+            else:
+                futures.append(self.submit(statement))
+        return futures
+
+
+def gather(futures, return_exceptions=False, timeout=None):
+    """
+    Wait for every future and return their rows in submission order.
+    With return_exceptions=True a failed query contributes its exception;
+    otherwise the first failure is raised. Once the timeout passes, or on
+    that first failure, the queries still running are cancelled server-side.
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    results = []
+    for future in futures:
+        remaining = None if deadline is None else max(0, deadline - time.monotonic())
+        try:
+            results.append(future.result(remaining))
+        except Exception as e:
+            if return_exceptions and not isinstance(e, TimeoutError):
+                results.append(e)
+                continue
+            # Nobody will collect them; stop them using the warehouse
+            for pending in futures:
+                pending.cancel()
+            raise
+    return results
+
+
+def as_completed(futures, timeout=None):
+    """
+    Yield futures as their queries finish, polling them round-robin
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    pending = list(futures)
+    delay = POLL_INITIAL
+    while pending:
+        finished = [future for future in pending if future.done()]
+        for future in finished:
+            pending.remove(future)
+            yield future
+        if finished:
+            delay = POLL_INITIAL
+            continue
+        if deadline is not None and time.monotonic() >= deadline:
+            raise TimeoutError(f"{len(pending)} queries still running after {timeout}s")
+        time.sleep(delay)
+        delay = min(delay * 2, POLL_MAX)
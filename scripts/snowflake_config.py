@@ -1,28 +1,204 @@
 # Snowflake Configuration
 # Configuration using environment variables for security
+#
+# Settings are parsed once per process into an immutable SnowflakeSettings
+# object. Profiles (dev/prod/offline) are selected with SNOWFLAKE_PROFILE;
+# for profile P a setting K is looked up in this order:
+#   SNOWFLAKE_<P>_<K>  ->  PROFILES[P]  ->  SNOWFLAKE_<K>  ->  DEFAULTS
+# Per-workload warehouses come from SNOWFLAKE_[<P>_]WAREHOUSE_<WORKLOAD>,
+# e.g. SNOWFLAKE_WAREHOUSE_LOAD=LOAD_WH.
+# SNOWFLAKE_STATEMENT_TIMEOUT and SNOWFLAKE_RUN_BUDGET (seconds) bound every
+# statement and a whole run; see snowflake_timeouts.py.
+#
+# Usage:
+#     python snowflake_config.py [profile]
 
 import os
-from dotenv import load_dotenv
+import sys
+from dataclasses import dataclass
+from functools import lru_cache
 
-# Load environment variables
-load_dotenv()
+DEFAULTS = {
+    'role': 'ACCOUNTADMIN',
+    'warehouse': 'COMPUTE_WH',
+    'backend': 'snowflake',
+    'token_cache': '1',
+    'trace': '0',
+    'cache_dir': os.path.join(os.path.expanduser('~'), '.cache', 'snowflake_tasty'),
+}
 
-# Get configuration from environment variables
-SNOWFLAKE_CONFIG = {
-    'account': os.getenv('SNOWFLAKE_ACCOUNT'),
-    'user': os.getenv('SNOWFLAKE_USER'),
-    'password': os.getenv('SNOWFLAKE_PASSWORD'),
-    'role': os.getenv('SNOWFLAKE_ROLE', 'ACCOUNTADMIN'),
-    'warehouse': os.getenv('SNOWFLAKE_WAREHOUSE', 'COMPUTE_WH'),
-    'database': os.getenv('SNOWFLAKE_DATABASE', 'SNOWFLAKE'),
-    'schema': os.getenv('SNOWFLAKE_SCHEMA', 'INFORMATION_SCHEMA')
+PROFILES = {
+    'dev': {},
+    'prod': {},
+    # Runs against the local SQLite stand-in (snowflake_offline.py); no credentials needed
+    'offline': {'backend': 'offline', 'account': 'offline', 'user': 'offline', 'token_cache': '0'},
+}
+
+DEFAULT_PROFILE = 'dev'
+
+# Named database/schema pairs. SNOWFLAKE_DATABASE / SNOWFLAKE_SCHEMA override all of them.
+CONTEXTS = {
+    'account': ('SNOWFLAKE', 'INFORMATION_SCHEMA'),
+    'tasty_bytes': ('tasty_bytes_sample_data', 'raw_pos'),
 }
 
+WAREHOUSE_PREFIX = 'WAREHOUSE_'
+
+
+@dataclass(frozen=True)
+class SnowflakeSettings:
+    """
+    Immutable view of the Snowflake settings for one profile
+    """
+    profile: str
+    account: str = None
+    user: str = None
+    password: str = None
+    role: str = None
+    warehouse: str = None
+    database: str = None
+    schema: str = None
+    backend: str = 'snowflake'
+    token_cache: bool = True
+    trace: str = None
+    cache_dir: str = None
+    offline_db: str = None
+    offline_stage: str = None
+    aws_role_arn: str = None
+    # Seconds; None for no limit
+    statement_timeout: float = None
+    run_budget: float = None
+    # (workload, warehouse) pairs; a tuple keeps the object hashable
+    workload_warehouses: tuple = ()
+
+    @property
+    def offline(self):
+        return self.backend == 'offline'
+
+    @property
+    def account_url(self):
+        return f"{self.account}.snowflakecomputing.com" if self.account else None
+
+    def warehouse_for(self, workload=None):
+        """
+        Warehouse for a workload such as 'load' or 'ml', falling back to the default
+        """
+        if workload:
+            for name, warehouse in self.workload_warehouses:
+                if name == workload.lower():
+                    return warehouse
+        return self.warehouse
+
+    def connection_params(self, context='account', workload=None):
+        """
+        Connector keyword arguments for a named database/schema context
+        """
+        database, schema = CONTEXTS[context]
+        return {
+            'account': self.account,
+            'user': self.user,
+            'password': self.password,
+            'role': self.role,
+            'warehouse': self.warehouse_for(workload),
+            'database': self.database or database,
+            'schema': self.schema or schema,
+        }
+
+
+@lru_cache(maxsize=1)
+def _load_environment():
+    """
+    Read .env into the process environment once
+    """
+    from dotenv import load_dotenv
+    load_dotenv()
+
+
+def _lookup(profile, key):
+    env_key = key.upper()
+    value = os.getenv(f"SNOWFLAKE_{profile.upper()}_{env_key}")
+    if value:
+        return value
+    if key in PROFILES[profile]:
+        return PROFILES[profile][key]
+    return os.getenv(f"SNOWFLAKE_{env_key}") or DEFAULTS.get(key)
+
+
+def _workload_warehouses(profile):
+    overrides = {}
+    prefixes = (f"SNOWFLAKE_{WAREHOUSE_PREFIX}", f"SNOWFLAKE_{profile.upper()}_{WAREHOUSE_PREFIX}")
+    # Generic entries first so the profile-specific ones win
+    for prefix in prefixes:
+        for key, value in os.environ.items():
+            if key.startswith(prefix) and value and not key[len(prefix):].startswith(WAREHOUSE_PREFIX):
+                overrides[key[len(prefix):].lower()] = value
+    return tuple(sorted(overrides.items()))
+
+
+@lru_cache(maxsize=None)
+def get_settings(profile=None):
+    """
+    Parse the settings for a profile (default: SNOWFLAKE_PROFILE or 'dev').
+    Every caller in the process shares the same cached instance.
+    """
+    _load_environment()
+    profile = (profile or os.getenv('SNOWFLAKE_PROFILE') or DEFAULT_PROFILE).lower()
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown Snowflake profile '{profile}'. Choose one of: {', '.join(PROFILES)}")
+    values = {key: _lookup(profile, key) for key in (
+        'account', 'user', 'password', 'role', 'warehouse', 'database', 'schema', 'backend',
+        'token_cache', 'trace', 'cache_dir', 'offline_db', 'offline_stage', 'statement_timeout', 'run_budget'
+    )}
+    trace = values.pop('trace')
+    for key in ('statement_timeout', 'run_budget'):
+        values[key] = float(values[key]) if values[key] and float(values[key]) > 0 else None
+    return SnowflakeSettings(
+        profile=profile,
+        token_cache=values.pop('token_cache') != '0',
+        trace=None if trace in ('', '0') else trace,
+        backend=values.pop('backend').lower(),
+        aws_role_arn=os.getenv('AWS_ROLE_ARN'),
+        workload_warehouses=_workload_warehouses(profile),
+        **values
+    )
+
+
+def connection_config(context='account', workload=None):
+    """
+    Connection parameters from the shared settings, for connect_to_snowflake()
+    """
+    return get_settings().connection_params(context, workload)
+
+
+SETTINGS = get_settings()
+
+# Get configuration from environment variables
+SNOWFLAKE_CONFIG = SETTINGS.connection_params('account')
+
+# Scripts working on the Tasty Bytes sample data default to its database and schema
+TASTY_BYTES_CONFIG = SETTINGS.connection_params('tasty_bytes')
+
+# Local cache directory for login tokens and other per-machine state (never commit it)
+CACHE_DIR = SETTINGS.cache_dir
+
+
+# 'offline' runs every pooled connection against the local SQLite stand-in (snowflake_offline.py)
+def offline_backend_enabled():
+    return get_settings().offline
+
 # Account URL for reference (constructed from environment)
-ACCOUNT_URL = f"{os.getenv('SNOWFLAKE_ACCOUNT')}.snowflakecomputing.com" if os.getenv('SNOWFLAKE_ACCOUNT') else None
+ACCOUNT_URL = SETTINGS.account_url
 
 # Additional account information (non-sensitive)
 ACCOUNT_INFO = {
     'cloud_platform': 'AWS',
     'edition': 'Standard'
 }
+
+
+if __name__ == "__main__":
+    settings = get_settings(sys.argv[1] if len(sys.argv) > 1 else None)
+    for field, value in settings.__dict__.items():
+        if field == 'password' and value:
+            value = '********'
+        print(f"{field:<20} {value}")
@@ -1,46 +1,5 @@
-import snowflake.connector
-from snowflake.connector import DictCursor
-import pandas as pd
-import os
-from dotenv import load_dotenv
+from snowflake_pool import connect_to_snowflake
 
-# Load environment variables
-load_dotenv()
-
-def connect_to_snowflake():
-    """
-    Connect to Snowflake using environment variables
-    """
-    try:
-        # Get credentials from environment variables
-        user = os.getenv('SNOWFLAKE_USER')
-        account = os.getenv('SNOWFLAKE_ACCOUNT')
-        password = os.getenv('SNOWFLAKE_PASSWORD')
-        role = os.getenv('SNOWFLAKE_ROLE', 'ACCOUNTADMIN')
-        warehouse = os.getenv('SNOWFLAKE_WAREHOUSE', 'COMPUTE_WH')
-        database = os.getenv('SNOWFLAKE_DATABASE', 'SNOWFLAKE')
-        schema = os.getenv('SNOWFLAKE_SCHEMA', 'INFORMATION_SCHEMA')
-        
-        if not all([user, account, password]):
-            raise ValueError("Missing required environment variables. Please check your .env file.")
-        
-        # Connection parameters from environment variables
-        conn = snowflake.connector.connect(
-            user=user,
-            account=account,
-            password=password,
-            role=role,
-            warehouse=warehouse,
-            database=database,
-            schema=schema
-        )
-        
-        print("Successfully connected to Snowflake!")
-        return conn
-        
-    except Exception as e:
-        print(f"Error connecting to Snowflake: {e}")
-        return None
 
 def test_connection():
     """
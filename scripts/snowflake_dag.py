@@ -0,0 +1,223 @@
+"""
+Dependency-aware parallel step runner
+Runs a list of SQL steps ({"step", "title", "sql", "depends_on"}) as a DAG:
+a step starts as soon as every step it depends on has finished, with at most
+max_workers steps in flight, each worker on its own pooled connection.
+
+Steps marked "session": True (USE ROLE/WAREHOUSE, ALTER SESSION, ...) only
+set up session state, so instead of running once they are replayed on every
+worker connection before that worker's first step.
+
+Each step's statements are tagged <script>:step<N> (snowflake_query_tags.py).
+A failed step marks everything downstream of it as skipped. The run ends
+with a timing table and the critical path: the chain of dependent steps
+that bounds the wall-clock time however many workers are added.
+"""
+
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import ExitStack
+
+from snowflake_executor import is_idempotent, run_statement
+from snowflake_pool import get_pool
+from snowflake_query_tags import query_step
+
+DEFAULT_WORKERS = 4
+
+
+class StepResult:
+    """
+    Outcome and timing of one step; times are seconds from the start of the run
+    """
+
+    def __init__(self, step, status='pending', rows=None, error=None, started=None, finished=None):
+        self.step = step
+        self.status = status
+        self.rows = rows if rows is not None else []
+        self.error = error
+        self.started = started
+        self.finished = finished
+
+    @property
+    def duration(self):
+        if self.started is None or self.finished is None:
+            return 0.0
+        return self.finished - self.started
+
+
+def validate_steps(steps):
+    """
+    Index steps by number; raises ValueError for unknown dependencies or cycles
+    """
+    by_id = {step['step']: step for step in steps}
+    for step in steps:
+        for dependency in step.get('depends_on', []):
+            if dependency not in by_id:
+                raise ValueError(f"Step {step['step']} depends on unknown step {dependency}")
+            if by_id[dependency].get('session'):
+                raise ValueError(f"Step {step['step']} depends on session step {dependency}; "
+                                 f"session steps run on every connection and need no edge")
+
+    state = {}
+
+    def visit(step_id, path):
+        if state.get(step_id) == 'done':
+            return
+        if state.get(step_id) == 'visiting':
+            cycle = path[path.index(step_id):] + [step_id]
+            raise ValueError(f"Dependency cycle: {' -> '.join(map(str, cycle))}")
+        state[step_id] = 'visiting'
+        for dependency in by_id[step_id].get('depends_on', []):
+            visit(dependency, path + [step_id])
+        state[step_id] = 'done'
+
+    for step_id in by_id:
+        visit(step_id, [])
+    return by_id
+
+
+def _run_sql(conn, sql):
+    """
+    Run a step's statements as one multi-statement request; returns the last result's rows
+    """
+    cursor = run_statement(conn, sql, idempotent=is_idempotent(sql), num_statements=0)
+    try:
+        rows = cursor.fetchall() if cursor.description else []
+        while cursor.nextset():
+            rows = cursor.fetchall() if cursor.description else []
+        return rows
+    finally:
+        cursor.close()
+
+
+def critical_path(results, by_id):
+    """
+    Longest chain of dependent steps by duration, as a list of step numbers
+    """
+    memo = {}
+
+    def longest(step_id):
+        if step_id not in memo:
+            best = max((longest(dependency) for dependency in by_id[step_id].get('depends_on', [])),
+                       key=lambda chain: chain[0], default=(0.0, []))
+            memo[step_id] = (best[0] + results[step_id].duration, best[1] + [step_id])
+        return memo[step_id]
+
+    chains = [longest(step_id) for step_id in by_id if not by_id[step_id].get('session')]
+    return max(chains, key=lambda chain: chain[0], default=(0.0, []))[1]
+
+
+def run_dag(steps, config=None, max_workers=DEFAULT_WORKERS):
+    """
+    Run the steps against connections from the shared pool for config and
+    return {step number: StepResult}
+    """
+    by_id = validate_steps(steps)
+    session_steps = [step for step in steps if step.get('session')]
+    work = {step_id: step for step_id, step in by_id.items() if not step.get('session')}
+    results = {step_id: StepResult(step) for step_id, step in by_id.items()}
+
+    pool = get_pool(config)
+    pool.ensure_capacity(max_workers)
+    local = threading.local()
+    borrowed = ExitStack()
+    borrowed_lock = threading.Lock()
+    start = time.perf_counter()
+
+    def worker_connection():
+        conn = getattr(local, 'conn', None)
+        if conn is None:
+            # Pooled cursors skip redundant USE statements and tag each step
+            borrow = pool.connection()
+            conn = borrow.__enter__()
+            # Opened outside the lock, so workers still connect in parallel
+            with borrowed_lock:
+                borrowed.push(borrow)
+            for step in session_steps:
+                session_result = results[step['step']]
+                if session_result.started is None:
+                    session_result.started = time.perf_counter() - start
+                with query_step(f"step{step['step']}"):
+                    _run_sql(conn, step['sql'])
+                session_result.finished = time.perf_counter() - start
+                session_result.status = 'done'
+            local.conn = conn
+        return conn
+
+    def run_step(step_id):
+        result = results[step_id]
+        try:
+            # Opening the connection and replaying session steps counts against the step
+            result.started = time.perf_counter() - start
+            conn = worker_connection()
+            with query_step(f"step{step_id}"):
+                result.rows = _run_sql(conn, work[step_id]['sql'])
+            result.status = 'done'
+        except Exception as e:
+            result.error = e
+            result.status = 'failed'
+        finally:
+            result.finished = time.perf_counter() - start
+        return step_id
+
+    def skip_downstream(failed_id):
+        for step_id, step in work.items():
+            if results[step_id].status == 'pending' and failed_id in step.get('depends_on', []):
+                results[step_id].status = 'skipped'
+                print(f"Step {step_id} skipped: step {failed_id} did not complete")
+                skip_downstream(step_id)
+
+    submitted = set()
+
+    def ready():
+        return [step_id for step_id, step in work.items()
+                if results[step_id].status == 'pending' and step_id not in submitted
+                and all(results[dependency].status == 'done' for dependency in step.get('depends_on', []))]
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            in_flight = set()
+            while True:
+                for step_id in ready():
+                    submitted.add(step_id)
+                    in_flight.add(executor.submit(run_step, step_id))
+                if not in_flight:
+                    break
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    step_id = future.result()
+                    result = results[step_id]
+                    step = work[step_id]
+                    if result.status == 'done':
+                        print(f"--- Step {step_id}: {step['title']} --- done in {result.duration * 1000:.0f} ms")
+                    else:
+                        print(f"--- Step {step_id}: {step['title']} --- failed: {result.error}")
+                        skip_downstream(step_id)
+    finally:
+        borrowed.close()
+
+    print_timing_summary(results, by_id, time.perf_counter() - start, max_workers)
+    return results
+
+
+def print_timing_summary(results, by_id, wall_time, max_workers):
+    print("\n" + "=" * 70)
+    print(f"DAG TIMING SUMMARY ({max_workers} workers)")
+    print("=" * 70)
+    print(f"{'Step':>4}  {'Status':<8} {'Start ms':>9} {'Duration ms':>12}  {'Depends on':<12} Title")
+    for step_id in sorted(by_id):
+        result = results[step_id]
+        step = by_id[step_id]
+        depends = 'per worker' if step.get('session') else ','.join(map(str, step.get('depends_on', []))) or '-'
+        started = f"{result.started * 1000:.0f}" if result.started is not None else '-'
+        print(f"{step_id:>4}  {result.status:<8} {started:>9} {result.duration * 1000:>12.0f}  {depends:<12} "
+              f"{step['title']}")
+
+    path = critical_path(results, by_id)
+    path_time = sum(results[step_id].duration for step_id in path)
+    serial_time = sum(result.duration for step_id, result in results.items() if not by_id[step_id].get('session'))
+    overlap = serial_time / wall_time if wall_time else 0.0
+    print(f"\nWall-clock time:       {wall_time * 1000:.0f} ms")
+    print(f"Sum of step durations: {serial_time * 1000:.0f} ms ({overlap:.1f}x overlap)")
+    print(f"Critical path:         {' -> '.join(map(str, path))} ({path_time * 1000:.0f} ms)")
@@ -1,88 +1,177 @@
 import snowflake.connector
+import json
 import os
 import sys
-from dotenv import load_dotenv
+import threading
+from concurrent.futures import Future, as_completed
+from snowflake_config import CACHE_DIR, get_settings
+from snowflake_schemas import create_table_sql
+
+# Per-probe deadline when racing candidate account identifiers
+PROBE_TIMEOUT = 15
+
+# Where the identifier that worked last time is remembered
+ACCOUNT_CACHE_FILE = os.path.join(CACHE_DIR, 'account_identifier.json')
+
+
+def load_cached_account(account):
+    """
+    Return the identifier that connected last time for this account, if any
+    """
+    try:
+        with open(ACCOUNT_CACHE_FILE) as f:
+            return json.load(f).get(account)
+    except (OSError, ValueError):
+        return None
+
+
+def save_cached_account(account, identifier):
+    """
+    Remember which identifier connected for this account
+    """
+    try:
+        with open(ACCOUNT_CACHE_FILE) as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        cached = {}
+    cached[account] = identifier
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(ACCOUNT_CACHE_FILE, 'w') as f:
+        json.dump(cached, f, indent=2)
+
+
+def probe_connection(method, timeout=PROBE_TIMEOUT):
+    """
+    Try one connection method with a short login deadline
+    """
+    return snowflake.connector.connect(
+        user=method['user'],
+        account=method['account'],
+        password=method['password'],
+        role=method['role'],
+        warehouse=method['warehouse'],
+        login_timeout=timeout
+    )
+
+
+def close_quietly(future):
+    """
+    Close a connection from a probe that finished after the race was decided
+    """
+    if not future.cancelled() and future.exception() is None:
+        try:
+            future.result().close()
+        except Exception:
+            pass
+
+
+def start_probe(method):
+    """
+    Run probe_connection() on a daemon thread; returns its Future
+    """
+    future = Future()
+
+    def run():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(probe_connection(method))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, name=f"probe-{method['account']}", daemon=True).start()
+    return future
+
+
+def race_connection_methods(connection_methods):
+    """
+    Probe all candidate account identifiers at the same time.
+    The first one to connect wins. The losing probes are not cancelled -
+    the connector cannot abort a login in progress - so they run on until
+    they connect or reach PROBE_TIMEOUT; a loser that connects is closed
+    as soon as it does. The probes run on daemon threads, so they never
+    hold up interpreter exit (a ThreadPoolExecutor would wait for them).
+    """
+    futures = {start_probe(method): method for method in connection_methods}
+    winner = None
+    try:
+        for future in as_completed(futures):
+            try:
+                conn = future.result()
+            except Exception as e:
+                print(f"❌ {futures[future]['name']} failed: {e}")
+                continue
+            print(f"✅ SUCCESS with {futures[future]['name']}!")
+            winner = future
+            break
+    finally:
+        for future in futures:
+            if future is not winner:
+                # Runs at once for a probe that has already finished
+                future.add_done_callback(close_quietly)
+    if winner is None:
+        return None, None
+    return winner.result(), futures[winner]
 
-# Load environment variables
-load_dotenv()
 
 def connect_and_run_sql():
     """
     Connect to Snowflake and run the Tasty Bytes setup SQL commands
     """
     
-    # Try different connection methods
+    settings = get_settings()
+    account = settings.account
+    base = {
+        "user": settings.user,
+        "password": settings.password,
+        "role": settings.role,
+        "warehouse": settings.warehouse
+    }
+    
+    # Candidate account identifiers
     connection_methods = [
-        {
-            "name": "Method 1: Full account identifier",
-            "account": os.getenv('SNOWFLAKE_ACCOUNT'),
-            "user": os.getenv('SNOWFLAKE_USER'),
-            "password": os.getenv('SNOWFLAKE_PASSWORD'),
-            "role": os.getenv('SNOWFLAKE_ROLE', 'ACCOUNTADMIN'),
-            "warehouse": os.getenv('SNOWFLAKE_WAREHOUSE', 'COMPUTE_WH')
-        },
-        {
-            "name": "Method 2: Organization only",
-            "account": os.getenv('SNOWFLAKE_ACCOUNT', '').split('-')[0] if os.getenv('SNOWFLAKE_ACCOUNT') else '',
-            "user": os.getenv('SNOWFLAKE_USER'),
-            "password": os.getenv('SNOWFLAKE_PASSWORD'),
-            "role": os.getenv('SNOWFLAKE_ROLE', 'ACCOUNTADMIN'),
-            "warehouse": os.getenv('SNOWFLAKE_WAREHOUSE', 'COMPUTE_WH')
-        },
-        {
-            "name": "Method 3: With region",
-            "account": f"{os.getenv('SNOWFLAKE_ACCOUNT')}.us-west-2" if os.getenv('SNOWFLAKE_ACCOUNT') else '',
-            "user": os.getenv('SNOWFLAKE_USER'),
-            "password": os.getenv('SNOWFLAKE_PASSWORD'),
-            "role": os.getenv('SNOWFLAKE_ROLE', 'ACCOUNTADMIN'),
-            "warehouse": os.getenv('SNOWFLAKE_WAREHOUSE', 'COMPUTE_WH')
-        }
+        {"name": "Method 1: Full account identifier", "account": account},
+        {"name": "Method 2: Organization only", "account": account.split('-')[0] if account else ''},
+        {"name": "Method 3: With region", "account": f"{account}.us-west-2" if account else ''}
     ]
+    unique_methods = []
+    for method in connection_methods:
+        if method['account'] and method['account'] not in [m['account'] for m in unique_methods]:
+            unique_methods.append({**base, **method})
+    connection_methods = unique_methods
     
     conn = None
     successful_method = None
     
-    for method in connection_methods:
+    # Go straight to the identifier that worked last time
+    cached = load_cached_account(account) if account else None
+    if cached:
+        method = {**base, "name": f"Cached identifier {cached}", "account": cached}
         print(f"\nTrying {method['name']}...")
         try:
-            conn = snowflake.connector.connect(
-                user=method['user'],
-                account=method['account'],
-                password=method['password'],
-                role=method['role'],
-                warehouse=method['warehouse']
-            )
-            print(f"✅ SUCCESS with {method['name']}!")
+            conn = probe_connection(method)
             successful_method = method
-            break
+            print(f"✅ SUCCESS with {method['name']}!")
         except Exception as e:
             print(f"❌ Failed: {e}")
-            continue
+    
+    if not conn and connection_methods:
+        print(f"\nProbing {len(connection_methods)} account identifiers concurrently...")
+        conn, successful_method = race_connection_methods(connection_methods)
     
     if not conn:
         print("\n❌ All connection methods failed. Please check your credentials.")
         return False
     
+    save_cached_account(account, successful_method['account'])
+    
     # SQL commands for Tasty Bytes setup
     sql_commands = [
         "USE ROLE accountadmin;",
         "USE WAREHOUSE compute_wh;",
         "CREATE OR REPLACE DATABASE tasty_bytes_sample_data;",
         "CREATE OR REPLACE SCHEMA tasty_bytes_sample_data.raw_pos;",
-        """CREATE OR REPLACE TABLE tasty_bytes_sample_data.raw_pos.menu
-(
-    menu_id NUMBER(19,0),
-    menu_type_id NUMBER(38,0),
-    menu_type VARCHAR(16777216),
-    truck_brand_name VARCHAR(16777216),
-    menu_item_id NUMBER(38,0),
-    menu_item_name VARCHAR(16777216),
-    item_category VARCHAR(16777216),
-    item_subcategory VARCHAR(16777216),
-    cost_of_goods_usd NUMBER(38,4),
-    sale_price_usd NUMBER(38,4),
-    menu_item_health_metrics_obj VARIANT
-);""",
+        create_table_sql('tasty_bytes_sample_data.raw_pos.menu', 'menu') + ";",
         "SELECT * FROM tasty_bytes_sample_data.raw_pos.menu;",
         """CREATE OR REPLACE STAGE tasty_bytes_sample_data.public.blob_stage
 url = 's3://sfquickstarts/tastybytes/'
@@ -0,0 +1,673 @@
+"""
+Shared statement executor
+One execute_query() for every script, with retries for failures that are
+not the statement's fault:
+
+- errors are classified as transient (network/session), warehouse
+  (suspended or unavailable) or fatal (the SQL itself is wrong)
+- transient and warehouse errors are retried with exponential backoff and
+  full jitter, within a bounded total retry time
+- a per-warehouse circuit breaker stops sending work to a warehouse that
+  keeps rejecting statements, until a cool-down has passed
+- a statement that reached the server is recovered by query ID instead of
+  being re-run; statements that are not idempotent are only re-run when the
+  request provably never left the client (the connection could not be opened)
+
+Idempotency is inferred from the statement (SELECT, SHOW, CREATE OR REPLACE,
+... IF [NOT] EXISTS, COPY INTO <table>, ...) and can be forced with a
+/* idempotent */ or /* not idempotent */ comment in the SQL.
+
+execute_query() streams: rows are pulled with fetchmany() in batches of
+FETCH_BATCH_SIZE as the caller iterates, and only the first PREVIEW_ROWS are
+printed, so memory stays flat however large the result is. Rows can be read
+by column name (row['size']; see snowflake_rows.py), so a result never has
+to be fetched again just to learn its column order.
+
+run_batch() / execute_batch() send an ordered block of statements as one
+multi-statement request and still report results and errors per statement,
+each tagged with its own step (snowflake_query_tags.py).
+"""
+
+import atexit
+import random
+import re
+import threading
+import time
+from io import StringIO
+
+from snowflake_query_tags import current_step, query_step, query_tag, set_tag_sql
+from snowflake_rows import named_rows, row_factory
+
+TRANSIENT = 'transient'
+WAREHOUSE = 'warehouse'
+FATAL = 'fatal'
+
+# Connector errnos for failures on the wire rather than in the statement
+TRANSIENT_ERRNOS = {
+    250001,  # Could not connect to Snowflake backend
+    250003,  # Failed to get the response; the connection dropped or hung
+    250005,  # Failed to execute request
+    390114,  # Session token expired; the connector renews it on the next call
+}
+
+# Transient failures that prove the request never reached Snowflake: the
+# connection could not be opened (SQLSTATE 08001 is the connect failure).
+# Only these may re-run a statement that is not idempotent.
+UNSENT_ERRNOS = {250001}
+UNSENT_SQLSTATES = {'08001'}
+
+# SQLSTATE 57P03: no usable warehouse (suspended, resuming or over its resource monitor)
+WAREHOUSE_SQLSTATES = {'57P03'}
+
+# How long to wait for a statement that was already running when the connection dropped
+RECOVERY_TIMEOUT = 60
+
+# Rows per fetchmany() round while streaming a result, and rows printed as a preview
+FETCH_BATCH_SIZE = 1000
+PREVIEW_ROWS = 10
+
+_IDEMPOTENT_MARKER = re.compile(r'/\*\s*idempotent\s*\*/', re.I)
+_NOT_IDEMPOTENT_MARKER = re.compile(r'/\*\s*not\s+idempotent\s*\*/', re.I)
+_LEADING_COMMENTS = re.compile(r'^\s*(?:--[^\n]*\n|/\*.*?\*/\s*)*', re.S)
+_SAFE_STATEMENT = re.compile(
+    r'^(SELECT|WITH|SHOW|DESC|DESCRIBE|LIST|LS|USE|EXPLAIN)\b'
+    r'|^CREATE\s+OR\s+REPLACE\b'
+    r'|^CREATE\s+.*?\bIF\s+NOT\s+EXISTS\b'
+    r'|^DROP\s+\w+(\s+\w+)?\s+IF\s+EXISTS\b'
+    r'|^ALTER\s+.*?\b(UN)?SET\b'
+    # Load metadata makes COPY skip files that were already loaded
+    r'|^COPY\s+INTO\s+(?!@)',
+    re.I | re.S
+)
+
+STATS = {
+    'statements': 0,
+    'retries': 0,
+    'retry_seconds': 0.0,
+    'recovered': 0,
+    'circuit_rejections': 0,
+    'failures': [],
+}
+_stats_lock = threading.Lock()
+
+
+class CircuitOpenError(RuntimeError):
+    """
+    Raised instead of sending a statement to a warehouse whose circuit is open
+    """
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter, capped per delay and in total
+    """
+
+    def __init__(self, max_attempts=4, base_delay=0.5, max_delay=8.0, max_retry_time=30.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_time = max_retry_time
+
+    def delay(self, retry):
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (retry - 1)))
+
+
+DEFAULT_POLICY = RetryPolicy()
+
+
+class CircuitBreaker:
+    """
+    Opens after failure_threshold consecutive failures; after reset_timeout
+    one trial statement is let through (half-open) to probe the warehouse
+    """
+
+    def __init__(self, name, failure_threshold=3, reset_timeout=30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.state = 'closed'
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open' and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = 'half-open'
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.state = 'closed'
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == 'half-open' or self.failures >= self.failure_threshold:
+                if self.state != 'open':
+                    print(f"Circuit opened for warehouse {self.name} after {self.failures} failure(s)")
+                self.state = 'open'
+                self._opened_at = time.monotonic()
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def breaker_for(conn):
+    name = (getattr(conn, 'warehouse', None) or 'DEFAULT').upper()
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name)
+        return _breakers[name]
+
+
+def classify_error(error):
+    """
+    TRANSIENT, WAREHOUSE or FATAL for an exception raised by execute()
+    """
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return TRANSIENT
+    errno = getattr(error, 'errno', None)
+    sqlstate = getattr(error, 'sqlstate', None) or ''
+    if sqlstate in WAREHOUSE_SQLSTATES:
+        return WAREHOUSE
+    if errno in TRANSIENT_ERRNOS or sqlstate.startswith('08'):
+        return TRANSIENT
+    return FATAL
+
+
+def was_never_sent(error):
+    """
+    True when a transient error happened before the statement was sent
+    """
+    if isinstance(error, ConnectionRefusedError):
+        return True
+    return getattr(error, 'errno', None) in UNSENT_ERRNOS or getattr(error, 'sqlstate', None) in UNSENT_SQLSTATES
+
+
+def is_idempotent(sql):
+    """
+    True if running the statement twice has the same effect as running it once
+    """
+    if _NOT_IDEMPOTENT_MARKER.search(sql):
+        return False
+    if _IDEMPOTENT_MARKER.search(sql):
+        return True
+    return bool(_SAFE_STATEMENT.match(_LEADING_COMMENTS.sub('', sql)))
+
+
+def _recover(conn, query_id):
+    """
+    Collect the result of a statement that reached the server before the
+    client lost it; None if it cannot be recovered
+    """
+    try:
+        deadline = time.monotonic() + RECOVERY_TIMEOUT
+        status = conn.get_query_status_throw_if_error(query_id)
+        while conn.is_still_running(status):
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(0.5)
+            status = conn.get_query_status_throw_if_error(query_id)
+        cursor = conn.cursor()
+        cursor.get_results_from_sfqid(query_id)
+        return cursor
+    except Exception:
+        return None
+
+
+def run_statement(conn, sql, params=None, policy=DEFAULT_POLICY, idempotent=None, **execute_options):
+    """
+    Execute one statement with classified retries and return its cursor.
+    Raises the last error once retries are exhausted or not allowed.
+    execute_options (e.g. num_statements, timeout) are passed on to cursor.execute().
+    """
+    breaker = breaker_for(conn)
+    retry_safe = is_idempotent(sql) if idempotent is None else idempotent
+    retry_time = 0.0
+    attempt = 1
+    with _stats_lock:
+        STATS['statements'] += 1
+    while True:
+        if not breaker.allow():
+            with _stats_lock:
+                STATS['circuit_rejections'] += 1
+            raise CircuitOpenError(f"Warehouse {breaker.name} is failing; circuit open for up to "
+                                   f"{breaker.reset_timeout:.0f}s")
+        cursor = conn.cursor()
+        try:
+            if params is None:
+                cursor.execute(sql, **execute_options)
+            else:
+                cursor.execute(sql, params, **execute_options)
+            breaker.record_success()
+            return cursor
+        except Exception as e:
+            kind = classify_error(e)
+            if kind == FATAL:
+                # The server answered, so the warehouse itself is fine
+                breaker.record_success()
+                raise
+            if kind == WAREHOUSE:
+                # The statement was rejected before it ran, so it is always safe to retry
+                breaker.record_failure()
+                if breaker.state == 'open':
+                    raise
+            query_id = getattr(cursor, 'sfqid', None)
+            if kind == TRANSIENT and query_id:
+                recovered = _recover(conn, query_id)
+                if recovered is not None:
+                    breaker.record_success()
+                    with _stats_lock:
+                        STATS['recovered'] += 1
+                    print(f"Recovered result of query {query_id} after: {e}")
+                    return recovered
+            if kind == TRANSIENT and not retry_safe and not was_never_sent(e):
+                # It may have run, with or without a query ID; running it again could apply it twice
+                raise
+            delay = policy.delay(attempt)
+            if attempt >= policy.max_attempts or retry_time + delay > policy.max_retry_time:
+                raise
+            _close_quietly(cursor)
+            print(f"{'Warehouse unavailable' if kind == WAREHOUSE else 'Transient error'}: {e}")
+            print(f"Retrying in {delay:.1f}s (attempt {attempt + 1}/{policy.max_attempts})")
+            time.sleep(delay)
+            retry_time += delay
+            attempt += 1
+            with _stats_lock:
+                STATS['retries'] += 1
+                STATS['retry_seconds'] += delay
+
+
+def _close_quietly(cursor):
+    try:
+        cursor.close()
+    except Exception:
+        pass
+
+
+def _timeout_option(timeout):
+    # Only pass timeout when there is one, for cursors that do not take it
+    return {'timeout': timeout} if timeout else {}
+
+
+def _record_failure(description, error):
+    with _stats_lock:
+        STATS['failures'].append((description, str(error).splitlines()[0] if str(error) else repr(error)))
+
+
+class QueryResult:
+    """
+    Lazy row iterator over an executed cursor, backed by fetchmany().
+    The first batch is fetched up front, so truthiness and indexing into it
+    work like a list. A result that fits in that batch can be iterated any
+    number of times; a larger one streams and can be iterated once.
+    Rows are tuples that can also be indexed by column name.
+    The cursor is closed once the rows run out, on close() or leaving a
+    with-block, or when the result is garbage collected; QueryResult()
+    without a cursor is an empty result.
+    """
+
+    def __init__(self, cursor=None, batch_size=FETCH_BATCH_SIZE):
+        self.cursor = cursor
+        self.batch_size = batch_size
+        self._closed = cursor is None
+        self.description = None if cursor is None else cursor.description
+        self._row = row_factory(self.description)
+        self._head = [] if cursor is None else [self._row(row) for row in cursor.fetchmany(batch_size)]
+        self._complete = len(self._head) < batch_size
+        self._consumed = False
+        if self._complete:
+            self.close()
+
+    @property
+    def columns(self):
+        return self._row.schema.names
+
+    @property
+    def complete(self):
+        """
+        True if every row is already held in memory
+        """
+        return self._complete
+
+    def close(self):
+        """
+        Close the cursor without streaming the rest; the first batch stays readable
+        """
+        if not self._closed:
+            self._closed = True
+            _close_quietly(self.cursor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __del__(self):
+        # An abandoned streaming result would otherwise hold its cursor open
+        if not getattr(self, '_closed', True):
+            self.close()
+
+    def preview(self, limit=PREVIEW_ROWS):
+        return self._head[:limit]
+
+    def __bool__(self):
+        return bool(self._head)
+
+    def __getitem__(self, index):
+        # Only the first batch is held; anything further has to be iterated
+        return self._head[index]
+
+    def __iter__(self):
+        if self._complete:
+            yield from self._head
+            return
+        if self._consumed or self._closed:
+            raise RuntimeError("This result was larger than one batch and has already been streamed or closed; "
+                               "re-run the query or collect it with list() the first time")
+        self._consumed = True
+        head, self._head = self._head, self._head[:PREVIEW_ROWS]
+        yield from head
+        del head
+        try:
+            while True:
+                rows = self.cursor.fetchmany(self.batch_size)
+                if not rows:
+                    return
+                yield from map(self._row, rows)
+        finally:
+            self.close()
+
+    def __repr__(self):
+        if self._complete:
+            return repr(self._head)
+        return f"<QueryResult streaming in batches of {self.batch_size}, first rows {self.preview()!r}>"
+
+
+def execute_query(conn, query, description, params=None, raise_on_error=False, batch_size=None, timeout=None):
+    """
+    Execute a query and return its rows as a lazy QueryResult, empty if it
+    returned no rows or failed (and raise_on_error is off); timeout
+    (seconds) cancels it server-side if it runs longer
+    """
+    try:
+        print(f"\n--- {description} ---")
+        print(f"Query: {query}")
+
+        cursor = run_statement(conn, query, params, **_timeout_option(timeout))
+        results = QueryResult(cursor, batch_size or FETCH_BATCH_SIZE)
+
+        if not results:
+            print("Query executed successfully (no results to display)")
+            return results
+        preview = results.preview()
+        if not results.complete:
+            print(f"Results (first {len(preview)} rows, more streamed on iteration): {preview}")
+        elif len(results[:]) > len(preview):
+            print(f"Results (first {len(preview)} of {len(results[:])} rows): {preview}")
+        else:
+            print(f"Results: {preview}")
+        return results
+
+    except Exception as e:
+        print(f"Error executing query: {e}")
+        _record_failure(description, e)
+        if raise_on_error:
+            raise
+        return QueryResult()
+
+
+def execute_sql_script(conn, sql_script, description, timeout=None):
+    """
+    Execute a SQL script; True if it succeeded
+    """
+    try:
+        print(f"\n--- {description} ---")
+        print(f"Executing: {sql_script[:100]}...")
+
+        cursor = run_statement(conn, sql_script, **_timeout_option(timeout))
+        results = cursor.fetchall()
+        cursor.close()
+
+        if results:
+            print(f"Results: {results}")
+        else:
+            print("Query executed successfully (no results to display)")
+        return True
+
+    except Exception as e:
+        print(f"Error executing SQL: {e}")
+        _record_failure(description, e)
+        return False
+
+
+BATCH_MODES = ('multi', 'stream', 'single')
+
+
+class StatementResult:
+    """
+    Outcome of one statement in a batch
+    """
+
+    def __init__(self, sql, rows=None, query_id=None, error=None, skipped=False, columns=()):
+        self.sql = sql
+        self.rows = rows if rows is not None else []
+        self.columns = tuple(columns)
+        self.query_id = query_id
+        self.error = error
+        self.skipped = skipped
+
+    @property
+    def ok(self):
+        return self.error is None and not self.skipped
+
+    def __repr__(self):
+        state = 'skipped' if self.skipped else 'error' if self.error is not None else f'{len(self.rows)} rows'
+        return f"<StatementResult {state}: {self.sql[:40]!r}>"
+
+
+def _collect(sql, cursor):
+    if not cursor.description:
+        return StatementResult(sql, [], getattr(cursor, 'sfqid', None))
+    rows = named_rows(cursor.fetchall(), cursor.description)
+    return StatementResult(sql, rows, getattr(cursor, 'sfqid', None), columns=(c[0] for c in cursor.description))
+
+
+def _with_tags(statements, steps):
+    """
+    (sql, statement) pairs to send. With steps, each statement is preceded by
+    an ALTER SESSION setting its step's tag (sql, None), and the tag is unset
+    at the end; statements sharing one request cannot be tagged any other way.
+    """
+    if not steps:
+        return [(statement, statement) for statement in statements]
+    sent = []
+    for statement, step in zip(statements, steps):
+        sent += [(set_tag_sql(query_tag(step)), None), (statement, statement)]
+    return sent + [(set_tag_sql(None), None)]
+
+
+def _tag_options(steps):
+    # The session tag set inside the block must not be overridden by the request's own
+    return {'_statement_params': {'QUERY_TAG': None}} if steps else {}
+
+
+def _unset_tag(conn):
+    """
+    Clear a step's tag that a batch stopped by a failure left set on the session
+    """
+    try:
+        run_statement(conn, set_tag_sql(None), **_tag_options(True)).close()
+    except Exception as e:
+        print(f"Could not unset the session query tag: {e}")
+
+
+def _batch_multi(conn, statements, steps=None):
+    sent = _with_tags(statements, steps)
+    block = ';\n'.join(sql.strip().rstrip(';') for sql, _ in sent) + ';'
+    cursor = run_statement(conn, block, idempotent=all(is_idempotent(s) for s in statements),
+                           num_statements=len(sent), **_tag_options(steps))
+    try:
+        results = []
+        for index, (_, statement) in enumerate(sent):
+            if index and not cursor.nextset():
+                break
+            if statement is not None:
+                results.append(_collect(statement, cursor))
+        return results
+    finally:
+        cursor.close()
+
+
+def _batch_stream(conn, statements, stop_on_error, steps=None):
+    """
+    The connector's execute_stream(): one request per statement, no cursor
+    bookkeeping in the caller. After a failure it resumes with the next statement.
+    """
+    results = []
+    while len(results) < len(statements):
+        sent = _with_tags(statements[len(results):], steps[len(results):] if steps else None)
+        stream = StringIO('\n'.join(sql.strip().rstrip(';') + ';' for sql, _ in sent))
+        try:
+            for (_, statement), cursor in zip(sent, conn.execute_stream(stream, **_tag_options(steps))):
+                if statement is not None:
+                    results.append(_collect(statement, cursor))
+                cursor.close()
+        except Exception as e:
+            results.append(StatementResult(statements[len(results)], error=e))
+            if stop_on_error:
+                break
+    if steps and any(result.error is not None for result in results):
+        # The request that failed never reached its closing UNSET
+        _unset_tag(conn)
+    return results
+
+
+def _batch_single(conn, statements, stop_on_error, steps=None):
+    """
+    One run_statement() per statement: the one-at-a-time baseline
+    """
+    results = []
+    for statement, step in zip(statements, steps or [current_step()] * len(statements)):
+        try:
+            with query_step(step):
+                cursor = run_statement(conn, statement)
+        except Exception as e:
+            results.append(StatementResult(statement, error=e))
+            if stop_on_error:
+                break
+            continue
+        results.append(_collect(statement, cursor))
+        cursor.close()
+    return results
+
+
+def run_batch(conn, statements, mode='multi', stop_on_error=True, steps=None):
+    """
+    Run an ordered list of statements and return one StatementResult each.
+
+    'multi' sends them as a single multi-statement request (one round trip);
+    'stream' uses execute_stream(); 'single' runs them one at a time.
+    A multi-statement request stops at the first failure without saying
+    which statement failed, so if every statement is idempotent the batch is
+    re-run with 'stream' to attribute the error; otherwise every statement
+    carries the error, since any of them may or may not have run.
+    steps, one per statement, tag each statement with its own step.
+    """
+    if mode not in BATCH_MODES:
+        raise ValueError(f"Unknown batch mode '{mode}'. Choose one of: {', '.join(BATCH_MODES)}")
+    kept = [(statement, step) for statement, step in zip(statements, steps or [None] * len(statements))
+            if statement.strip().rstrip(';').strip()]
+    statements = [statement for statement, _ in kept]
+    if steps is not None:
+        steps = [step for _, step in kept]
+    if not statements:
+        return []
+    if mode == 'single':
+        results = _batch_single(conn, statements, stop_on_error, steps)
+    elif mode == 'stream':
+        results = _batch_stream(conn, statements, stop_on_error, steps)
+    else:
+        try:
+            results = _batch_multi(conn, statements, steps)
+        except Exception as e:
+            if steps:
+                # The request stopped part-way, possibly with a step's tag still set on the session
+                _unset_tag(conn)
+            if not all(is_idempotent(statement) for statement in statements):
+                return [StatementResult(statement, error=e) for statement in statements]
+            print(f"Multi-statement request failed ({e}); re-running one statement at a time")
+            results = _batch_stream(conn, statements, stop_on_error, steps)
+    results.extend(StatementResult(statement, skipped=True) for statement in statements[len(results):])
+    return results
+
+
+def execute_batch(conn, scripts, mode='multi', stop_on_error=True):
+    """
+    Run a list of {"sql", "description"} dicts as one batch, printing each
+    statement's outcome like execute_sql_script(); returns the StatementResults.
+    Each statement is tagged with its "step", by default step<N> for its
+    position in the list.
+    """
+    steps = [script.get('step') or f"step{index}" for index, script in enumerate(scripts, 1)]
+    results = run_batch(conn, [script['sql'] for script in scripts], mode, stop_on_error, steps)
+    for script, result in zip(scripts, results):
+        print(f"\n--- {script['description']} ---")
+        print(f"Executing: {script['sql'][:100]}...")
+        if result.skipped:
+            print("Skipped after an earlier statement in the batch failed")
+        elif result.error is not None:
+            print(f"Error executing SQL: {result.error}")
+            _record_failure(script['description'], result.error)
+        elif result.rows:
+            print(f"Results: {result.rows}")
+        else:
+            print("Query executed successfully (no results to display)")
+    return results
+
+
+def compare_batch_modes(conn, statements, modes=BATCH_MODES, repeat=1):
+    """
+    Time the same statements under each batch mode; returns {mode: seconds}.
+    The statements run once per mode and repeat, so they must be safe to re-run.
+    """
+    timings = {}
+    for mode in modes:
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            results = run_batch(conn, statements, mode)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        timings[mode] = best
+        failed = sum(1 for result in results if not result.ok)
+        print(f"{mode:<8} {best * 1000:>10.1f} ms  {len(statements)} statements"
+              f"{f', {failed} failed/skipped' if failed else ''}")
+    if 'single' in timings and timings['single']:
+        for mode, elapsed in timings.items():
+            if mode != 'single':
+                print(f"{mode} vs one-at-a-time: {timings['single'] / elapsed:.1f}x")
+    return timings
+
+
+@atexit.register
+def print_run_summary():
+    """
+    Make retries and failed statements visible at the end of a run
+    """
+    if not STATS['retries'] and not STATS['failures'] and not STATS['recovered']:
+        return
+    print(f"\nExecutor summary: {STATS['statements']} statements, {STATS['retries']} retries "
+          f"({STATS['retry_seconds']:.1f}s backoff), {STATS['recovered']} recovered by query ID, "
+          f"{STATS['circuit_rejections']} rejected by open circuits")
+    if STATS['failures']:
+        print(f"{len(STATS['failures'])} statement(s) failed; results from this run are incomplete:")
+        for description, error in STATS['failures']:
+            print(f"  - {description}: {error}")
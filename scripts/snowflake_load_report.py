@@ -0,0 +1,185 @@
+"""
+Typed COPY INTO results and load throughput
+COPY INTO returns one row per file: file, status, rows_parsed, rows_loaded,
+error_limit, errors_seen, first_error and where in the file that error was.
+LoadReport holds such a row as typed fields, so callers read
+report.rows_loaded instead of working out which column holds it, plus the
+file's staged size (from LIST) and timings:
+
+    copy_seconds   how long the COPY statement that loaded the file took
+    seconds        the file's share of that time, by size (COPY loads the
+                   files of one statement in parallel and reports no
+                   per-file time)
+
+load_metrics() aggregates reports into rows/s, MB/s of staged (compressed)
+data and per-file latency; snowflake_loader.py returns reports for every
+COPY it runs and writes them as JSON with --json.
+
+Usage:
+    python snowflake_load_report.py report.json
+"""
+
+import json
+import os
+import sys
+from dataclasses import asdict, dataclass
+
+from snowflake_tracing import percentile
+
+MB = 1024 * 1024
+
+
+@dataclass
+class LoadReport:
+    """
+    One file of a COPY INTO result; status is LOADED, PARTIALLY_LOADED, LOAD_FAILED or LOAD_SKIPPED
+    """
+    file: str
+    status: str
+    rows_parsed: int = 0
+    rows_loaded: int = 0
+    error_limit: int = None
+    errors_seen: int = 0
+    first_error: str = None
+    first_error_line: int = None
+    first_error_character: int = None
+    first_error_column_name: str = None
+    # Staged size from LIST; None when the stage was not listed
+    bytes: int = None
+    copy_seconds: float = None
+    seconds: float = None
+
+    @classmethod
+    def from_row(cls, row):
+        """
+        A report from one COPY INTO result row (a named row or a dict)
+        """
+        values = row if isinstance(row, dict) else row.as_dict()
+        values = {name.lower(): value for name, value in values.items()}
+        return cls(
+            file=values['file'],
+            status=values['status'],
+            rows_parsed=_int(values.get('rows_parsed')) or 0,
+            rows_loaded=_int(values.get('rows_loaded')) or 0,
+            error_limit=_int(values.get('error_limit')),
+            errors_seen=_int(values.get('errors_seen')) or 0,
+            first_error=values.get('first_error'),
+            first_error_line=_int(values.get('first_error_line')),
+            first_error_character=_int(values.get('first_error_character')),
+            first_error_column_name=values.get('first_error_column_name'),
+        )
+
+    @property
+    def failed(self):
+        return self.status == 'LOAD_FAILED'
+
+    @property
+    def rows_per_second(self):
+        return self.rows_loaded / self.seconds if self.seconds else None
+
+    def as_dict(self):
+        values = asdict(self)
+        for key in ('copy_seconds', 'seconds'):
+            if values[key] is not None:
+                values[key] = round(values[key], 6)
+        return values
+
+    def __str__(self):
+        line = f"{self.file}: {self.status}, {self.rows_loaded}/{self.rows_parsed} rows loaded"
+        if self.errors_seen:
+            line += f", {self.errors_seen} error(s) (limit {self.error_limit})"
+        if self.first_error:
+            line += f"; first at line {self.first_error_line}, column {self.first_error_column_name}: " \
+                    f"{self.first_error}"
+        return line
+
+
+def _int(value):
+    return None if value is None else int(value)
+
+
+def copy_reports(rows, copy_seconds=None):
+    """
+    LoadReports from the rows of a COPY INTO result, timed with
+    share_copy_time() when copy_seconds is given; the single status row of a
+    COPY that had no files to load ('Copy executed with 0 files processed.')
+    gives none
+    """
+    reports = []
+    for row in rows:
+        names = row.keys() if isinstance(row, dict) else row.schema
+        if 'rows_loaded' in {name.lower() for name in names}:
+            reports.append(LoadReport.from_row(row))
+    return share_copy_time(reports, copy_seconds) if copy_seconds is not None else reports
+
+
+def share_copy_time(reports, seconds):
+    """
+    Set the copy_seconds of the reports of one COPY statement, and each
+    one's seconds to its share of them: by size where the sizes are known,
+    evenly otherwise
+    """
+    total = sum(report.bytes or 0 for report in reports)
+    for report in reports:
+        report.copy_seconds = seconds
+        report.seconds = seconds * (report.bytes or 0) / total if total else seconds / len(reports)
+    return reports
+
+
+def load_metrics(reports, seconds=None):
+    """
+    Throughput of a set of reports over seconds of wall-clock time (the
+    time of their COPY statements when not given)
+    """
+    if seconds is None:
+        seconds = sum(report.seconds or 0.0 for report in reports)
+    rows_loaded = sum(report.rows_loaded for report in reports)
+    sizes = [report.bytes for report in reports if report.bytes is not None]
+    size = sum(sizes) if sizes else None
+    latencies = [report.seconds for report in reports if report.seconds is not None]
+    return {
+        'files': len(reports),
+        'files_failed': sum(1 for report in reports if report.failed),
+        'rows_parsed': sum(report.rows_parsed for report in reports),
+        'rows_loaded': rows_loaded,
+        'errors_seen': sum(report.errors_seen for report in reports),
+        'bytes': size,
+        'seconds': round(seconds, 3),
+        'rows_per_second': round(rows_loaded / seconds, 1) if seconds else None,
+        'mb_per_second': round(size / MB / seconds, 3) if seconds and size is not None else None,
+        'file_latency': {
+            'p50': round(percentile(latencies, 50), 3),
+            'p95': round(percentile(latencies, 95), 3),
+            'max': round(max(latencies), 3),
+        } if latencies else None,
+    }
+
+
+def write_load_report(report, path):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, default=str)
+
+
+def print_load_report(report):
+    """
+    Per-table and total throughput from a load report
+    """
+    print(f"{'Table':<40} {'Files':>5} {'Rows':>9} {'MB':>8} {'Rows/s':>9} {'MB/s':>7} {'p50 ms':>7} {'max ms':>7}")
+    rows = [(table, entry['metrics']) for table, entry in report['tables'].items()] + [('(total)', report['totals'])]
+    for name, metrics in rows:
+        latency = metrics['file_latency'] or {}
+        size = f"{metrics['bytes'] / MB:.1f}" if metrics['bytes'] is not None else '-'
+        print(f"{name:<40} {metrics['files']:>5} {metrics['rows_loaded']:>9} {size:>8} "
+              f"{metrics['rows_per_second'] or 0:>9.0f} {metrics['mb_per_second'] or 0:>7.2f} "
+              f"{latency.get('p50', 0) * 1000:>7.0f} {latency.get('max', 0) * 1000:>7.0f}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Usage: python snowflake_load_report.py report.json")
+        sys.exit(1)
+    with open(sys.argv[1], encoding='utf-8') as f:
+        print_load_report(json.load(f))
@@ -0,0 +1,496 @@
+"""
+Parallel CREATE + COPY loader
+Loads a list of tables from stage paths with up to max_workers tables in
+flight, each on its own pooled connection: every table is (re)created from
+its columns and then copied into. Tables do not wait on each other, so
+reloading a set of tables takes about as long as the slowest one rather
+than the sum of all of them.
+
+A load is a (table, stage) pair - copied into a table that already exists -
+a (table, stage, columns) triple, or a dict with the keys table, stage and
+optionally columns, copy_options and timeout. Statements are tagged
+create_<table> and load_<table> (snowflake_query_tags.py).
+
+Every COPY comes back as one LoadReport per file (snowflake_load_report.py).
+The run ends with rows, files and rows/s per table, and the aggregate
+rows/s, MB/s and per-file latency over the wall-clock time of the whole
+run; --json writes the per-file reports and those metrics to a file.
+
+Every load LISTs its stage path first and records what it loaded (name,
+size, md5, last_modified, COPY seconds) in a local manifest. With
+incremental=True a table that already exists is not recreated: the LIST is
+compared with the manifest and with the table's COPY load metadata
+(INFORMATION_SCHEMA.LOAD_HISTORY), and only new files are copied, by name.
+A file that changed or disappeared leaves rows that cannot be told apart
+from the rest, so that table is truncated and copied in full instead. The
+report shows the bytes skipped and the COPY time they took last time.
+
+Usage:
+    python snowflake_loader.py [menu truck franchise] [--workers N] [--incremental] [--json report.json]
+"""
+
+import datetime
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from email.utils import parsedate_to_datetime
+
+from snowflake_config import CACHE_DIR
+from snowflake_executor import run_statement
+from snowflake_load_report import copy_reports, load_metrics, share_copy_time, write_load_report
+from snowflake_pool import get_pool
+from snowflake_query_tags import query_step
+from snowflake_rows import named_rows
+from snowflake_schemas import SCHEMAS, columns_sql
+
+DEFAULT_WORKERS = 4
+
+# Seconds a single COPY may run before it is cancelled server-side
+LOAD_TIMEOUT = 600
+
+MANIFEST_FILE = os.path.join(CACHE_DIR, 'loads', 'manifest.json')
+
+# INFORMATION_SCHEMA.LOAD_HISTORY only goes back this many days
+LOAD_HISTORY_DAYS = 14
+
+# COPY accepts at most this many names in FILES = (...)
+MAX_COPY_FILES = 1000
+
+# Connector errno of "Object '...' does not exist or not authorized." (002003)
+OBJECT_DOES_NOT_EXIST = 2003
+
+# Column lists of the raw_pos tables, generated from the schema registry
+RAW_POS_COLUMNS = {table: columns_sql(table) for table in SCHEMAS}
+
+
+def raw_pos_loads(tables=None, database='tasty_bytes_sample_data'):
+    """
+    Loads for the raw_pos tables from the Tasty Bytes blob stage
+    """
+    return [{
+        'table': f"{database}.raw_pos.{table}",
+        'stage': f"@{database}.public.blob_stage/raw_pos/{table}/",
+        'columns': RAW_POS_COLUMNS[table],
+    } for table in (tables or RAW_POS_COLUMNS)]
+
+
+class TableLoad:
+    """
+    Outcome and timing of loading one table; times are seconds from the start of the run
+    """
+
+    def __init__(self, load):
+        self.load = load
+        self.table = load['table']
+        self.status = 'pending'
+        self.mode = 'full'
+        self.reason = None
+        self.files = 0
+        self.rows_parsed = 0
+        self.rows_loaded = 0
+        self.errors_seen = 0
+        self.reports = []
+        self.copy_seconds = 0.0
+        self.bytes_loaded = 0
+        self.files_skipped = 0
+        self.bytes_skipped = 0
+        self.time_saved = 0.0
+        self.error = None
+        self.started = None
+        self.finished = None
+
+    @property
+    def duration(self):
+        if self.started is None or self.finished is None:
+            return 0.0
+        return self.finished - self.started
+
+    @property
+    def rows_per_second(self):
+        return self.rows_loaded / self.duration if self.duration else 0.0
+
+    def as_dict(self):
+        return {
+            'table': self.table,
+            'status': self.status,
+            'mode': self.mode,
+            'reason': self.reason,
+            'error': str(self.error) if self.error else None,
+            'seconds': round(self.duration, 3),
+            'metrics': load_metrics(self.reports, self.copy_seconds),
+            'files': [report.as_dict() for report in self.reports],
+        }
+
+
+def normalise_load(load):
+    """
+    A load as a dict, from a (table, stage[, columns]) tuple or a dict
+    """
+    if isinstance(load, dict):
+        return load
+    table, stage, *columns = load
+    return {'table': table, 'stage': stage, 'columns': columns[0] if columns else None}
+
+
+def _step_name(table):
+    return table.split('.')[-1].strip('"').lower()
+
+
+def _identifier(name):
+    return name[1:-1] if name.startswith('"') else name.upper()
+
+
+def qualified_name(table, params):
+    """
+    (database, schema, table) for a table name, filling in the connection's
+    database and schema for a partly qualified one
+    """
+    parts = [_identifier(part) for part in table.split('.')]
+    defaults = [_identifier(params.get('database') or ''), _identifier(params.get('schema') or 'PUBLIC')]
+    return tuple(defaults[:3 - len(parts)] + parts)
+
+
+def read_manifest(path=MANIFEST_FILE):
+    """
+    The load manifest: {table key: {file name: {size, md5, last_modified, loaded_on, seconds}}}
+    """
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except ValueError:
+        print(f"Ignoring unreadable load manifest {path}")
+        return {}
+
+
+def write_manifest(manifest, path=MANIFEST_FILE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Write beside it and swap in, so an interrupted run never leaves half a manifest
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+
+def _rows(cursor):
+    try:
+        return named_rows(cursor.fetchall(), cursor.description) if cursor.description else []
+    finally:
+        cursor.close()
+
+
+def _same_file(a, b):
+    # LIST names carry the stage location; COPY results and load history may not
+    return a == b or a.endswith('/' + b) or b.endswith('/' + a)
+
+
+def _relative_name(name, stage):
+    """
+    A listed file's name relative to the stage path, as COPY's FILES option wants it
+    """
+    path = stage.partition('/')[2]
+    if path and path in name:
+        return name.split(path, 1)[1].lstrip('/')
+    return name.rsplit('/', 1)[-1]
+
+
+def _timestamp(value):
+    if isinstance(value, datetime.datetime):
+        return value if value.tzinfo else value.astimezone()
+    try:
+        return parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return datetime.datetime.fromisoformat(str(value)).astimezone()
+    except ValueError:
+        return None
+
+
+def _load_history(conn, location):
+    """
+    {file name: last load time} from the table's COPY load metadata, or None if it cannot be read
+    """
+    database, schema, table = location
+    try:
+        rows = _rows(run_statement(
+            conn,
+            f'SELECT file_name, last_load_time FROM "{database}".INFORMATION_SCHEMA.LOAD_HISTORY '
+            "WHERE schema_name = ? AND table_name = ? AND status IN ('LOADED', 'PARTIALLY_LOADED')",
+            (schema, table)))
+    except Exception as e:
+        print(f"--- {database}.{schema}.{table}: no load history ({e}); comparing with the manifest only")
+        return None
+    return {row['file_name']: row['last_load_time'] for row in rows}
+
+
+def _table_exists(conn, table):
+    """
+    Whether table exists; any error other than "does not exist" (002003) is
+    raised, so a lost session or missing privilege never reads as a missing table
+    """
+    try:
+        _rows(run_statement(conn, f"SELECT COUNT(*) FROM {table}"))
+        return True
+    except Exception as e:
+        if getattr(e, 'errno', None) == OBJECT_DOES_NOT_EXIST:
+            return False
+        raise
+
+
+def plan_incremental(listed, previous, history):
+    """
+    Sort listed files ({name: LIST row}) into new, changed and unchanged
+    against the manifest entries and load history of the table; files the
+    manifest has but the stage no longer does are removed
+    """
+    plan = {'new': [], 'changed': [], 'unchanged': [], 'removed': [n for n in previous if n not in listed]}
+    cutoff = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=LOAD_HISTORY_DAYS)
+    for name, row in listed.items():
+        entry = previous.get(name)
+        loaded_on = None
+        if history is not None:
+            loaded_on = next((loaded for file, loaded in history.items() if _same_file(name, file)), None)
+        if entry is not None:
+            if (entry['md5'], entry['size']) != (row['md5'], row['size']):
+                plan['changed'].append(name)
+            elif history is None or loaded_on is not None or (_timestamp(entry['loaded_on']) or cutoff) <= cutoff:
+                plan['unchanged'].append(name)
+            else:
+                # Recorded here, but the table no longer remembers loading it: it was replaced since
+                plan['new'].append(name)
+        elif loaded_on is not None:
+            modified, loaded = _timestamp(row['last_modified']), _timestamp(loaded_on)
+            if modified and loaded and modified > loaded:
+                plan['changed'].append(name)
+            else:
+                plan['unchanged'].append(name)
+        else:
+            plan['new'].append(name)
+    return plan
+
+
+def _copy(conn, load, result, files=None, listed=None):
+    """
+    COPY the load (or only the named files) into its table, adding its
+    LoadReports to result; listed ({name: LIST row}) gives their sizes
+    """
+    name = _step_name(load['table'])
+    batches = [None] if files is None else [files[i:i + MAX_COPY_FILES] for i in range(0, len(files), MAX_COPY_FILES)]
+    for batch in batches:
+        copy = f"COPY INTO {load['table']} FROM {load['stage']}"
+        if batch is not None:
+            copy += " FILES = (" + ', '.join("'" + _relative_name(file, load['stage']).replace("'", "''") + "'"
+                                            for file in batch) + ")"
+        if load.get('copy_options'):
+            copy += f" {load['copy_options']}"
+        started = time.perf_counter()
+        with query_step(f"load_{name}"):
+            rows = _rows(run_statement(conn, copy, timeout=load.get('timeout', LOAD_TIMEOUT)))
+        seconds = time.perf_counter() - started
+        result.copy_seconds += seconds
+        reports = copy_reports(rows)
+        for report in reports:
+            listed_name = next((n for n in listed or () if _same_file(n, report.file)), None)
+            if listed_name is not None:
+                report.file, report.bytes = listed_name, listed[listed_name]['size']
+        result.reports.extend(share_copy_time(reports, seconds))
+    result.files = len(result.reports)
+    result.rows_parsed = sum(report.rows_parsed for report in result.reports)
+    result.rows_loaded = sum(report.rows_loaded for report in result.reports)
+    result.errors_seen = sum(report.errors_seen for report in result.reports)
+
+
+def load_table(conn, load, result, previous=None, incremental=False, location=None):
+    """
+    Load one table on conn, filling in result. previous is the table's
+    manifest entries; with it the stage is listed first, and the table's new
+    manifest entries are returned (None when it should be left as it was).
+    """
+    name = _step_name(load['table'])
+    listed = None
+    if previous is not None:
+        with query_step(f"list_{name}"):
+            listed = {row['name']: row for row in _rows(run_statement(conn, f"LIST {load['stage']}"))}
+
+    files = None
+    if incremental and _table_exists(conn, load['table']):
+        plan = plan_incremental(listed, previous, _load_history(conn, location))
+        if plan['changed'] or plan['removed']:
+            result.mode = 'reload'
+            result.reason = f"{len(plan['changed'])} changed, {len(plan['removed'])} removed file(s)"
+            with query_step(f"truncate_{name}"):
+                _rows(run_statement(conn, f"TRUNCATE TABLE {load['table']}"))
+        else:
+            result.mode = 'incremental' if plan['new'] else 'skipped'
+            result.reason = f"{len(plan['new'])} new file(s)" if plan['new'] else "nothing new"
+            files = plan['new']
+            result.files_skipped = len(plan['unchanged'])
+            result.bytes_skipped = sum(listed[file]['size'] or 0 for file in plan['unchanged'])
+            result.time_saved = sum(previous.get(file, {}).get('seconds', 0.0) for file in plan['unchanged'])
+    elif load.get('columns'):
+        # An incremental load never replaces a table, even one it could not see a moment ago
+        create = 'CREATE TABLE IF NOT EXISTS' if incremental else 'CREATE OR REPLACE TABLE'
+        with query_step(f"create_{name}"):
+            _rows(run_statement(conn, f"{create} {load['table']} {load['columns']}"))
+
+    if files != []:
+        _copy(conn, load, result, files, listed)
+    if listed is None:
+        return None
+
+    copied = {report.file: report for report in result.reports}
+    result.bytes_loaded = sum(report.bytes or 0 for report in result.reports)
+    loaded_on = datetime.datetime.now(datetime.timezone.utc).isoformat()
+    entries = {}
+    for file, row in listed.items():
+        report = copied.get(file)
+        if report is None:
+            if files is not None and file not in files:
+                entries[file] = previous.get(file) or _entry(row, loaded_on, 0.0)
+            elif file in previous:
+                # Left out by COPY's own load metadata: still in the table from an earlier load
+                entries[file] = previous[file]
+            else:
+                entries[file] = _entry(row, loaded_on, 0.0)
+        elif not report.failed:
+            entries[file] = _entry(row, loaded_on, report.seconds)
+    return entries
+
+
+def _entry(row, loaded_on, seconds):
+    return {'size': row['size'], 'md5': row['md5'], 'last_modified': row['last_modified'],
+            'loaded_on': loaded_on, 'seconds': round(seconds, 3)}
+
+
+def load_tables(loads, config=None, max_workers=DEFAULT_WORKERS, incremental=False, manifest_file=MANIFEST_FILE,
+                report_file=None, **overrides):
+    """
+    Create and load the tables concurrently on connections from the shared
+    pool for config (with overrides, as in connect_to_snowflake()); returns
+    {table: TableLoad} in the order given. incremental=True copies only new
+    files into tables that exist; manifest_file=None skips the LIST and the
+    manifest altogether (and with it the file sizes behind MB/s); an
+    incremental load needs the manifest and raises ValueError without it.
+    report_file writes load_report() as JSON.
+    """
+    if incremental and not manifest_file:
+        raise ValueError("An incremental load compares the stage with the manifest; pass a manifest_file")
+    loads = [normalise_load(load) for load in loads]
+    results = {load['table']: TableLoad(load) for load in loads}
+    pool = get_pool(config, **overrides)
+    pool.ensure_capacity(max_workers)
+    manifest = read_manifest(manifest_file) if manifest_file else None
+    account = 'offline' if pool.offline else pool.params.get('account')
+    start = time.perf_counter()
+
+    def run(load):
+        result = results[load['table']]
+        location = qualified_name(load['table'], pool.params)
+        key = f"{account}:{'.'.join(location)}"
+        result.started = time.perf_counter() - start
+        try:
+            with pool.connection() as conn:
+                previous = manifest.get(key, {}) if manifest is not None else None
+                entries = load_table(conn, load, result, previous, incremental, location)
+            result.status = 'loaded'
+            if entries is not None:
+                # Each worker owns its table's key; the manifest is written once all are done
+                manifest[key] = entries
+        except Exception as e:
+            result.error = e
+            result.status = 'failed'
+        finally:
+            result.finished = time.perf_counter() - start
+        return result
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for future in as_completed([executor.submit(run, load) for load in loads]):
+            result = future.result()
+            if result.status != 'loaded':
+                print(f"--- {result.table}: failed: {result.error}")
+                continue
+            line = f"--- {result.table}: {result.rows_loaded} rows from {result.files} file(s) " \
+                   f"in {result.duration * 1000:.0f} ms"
+            if result.mode != 'full':
+                line += f" ({result.mode}: {result.reason}"
+                line += f", {result.files_skipped} unchanged skipped)" if result.mode != 'reload' else ")"
+            print(line)
+
+    wall_time = time.perf_counter() - start
+    if manifest is not None:
+        write_manifest(manifest, manifest_file)
+    print_load_summary(results, wall_time, max_workers)
+    if report_file:
+        write_load_report(load_report(results, wall_time, max_workers), report_file)
+        print(f"Load report written to {report_file}")
+    return results
+
+
+def load_report(results, wall_time, max_workers):
+    """
+    Per-file reports and throughput per table and over the whole run, as a dict
+    """
+    return {
+        'started': (datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(seconds=wall_time)).isoformat(),
+        'workers': max_workers,
+        'wall_seconds': round(wall_time, 3),
+        'tables': {table: result.as_dict() for table, result in results.items()},
+        'totals': load_metrics([report for result in results.values() for report in result.reports], wall_time),
+    }
+
+
+def print_load_summary(results, wall_time, max_workers):
+    print("\n" + "=" * 70)
+    print(f"LOAD SUMMARY ({max_workers} workers)")
+    print("=" * 70)
+    width = max([len(table) for table in results] + [5])
+    print(f"{'Table':<{width}} {'Status':<7} {'Mode':<11} {'Files':>5} {'Rows':>9} {'ms':>7} {'Rows/s':>9}")
+    for result in results.values():
+        print(f"{result.table:<{width}} {result.status:<7} {result.mode:<11} {result.files:>5} "
+              f"{result.rows_loaded:>9} {result.duration * 1000:>7.0f} {result.rows_per_second:>9.0f}")
+    total_rows = sum(result.rows_loaded for result in results.values())
+    serial_time = sum(result.duration for result in results.values())
+    slowest = max(results.values(), key=lambda result: result.duration, default=None)
+    totals = load_metrics([report for result in results.values() for report in result.reports], wall_time)
+    print(f"\nRows loaded:           {total_rows} ({total_rows / wall_time if wall_time else 0.0:.0f} rows/s)")
+    if totals['bytes'] is not None:
+        print(f"Staged data:           {totals['bytes']:,} bytes ({totals['mb_per_second']:.2f} MB/s)")
+    if totals['file_latency']:
+        latency = totals['file_latency']
+        print(f"Per-file COPY time:    p50 {latency['p50'] * 1000:.0f} ms, p95 {latency['p95'] * 1000:.0f} ms, "
+              f"max {latency['max'] * 1000:.0f} ms over {totals['files']} file(s)")
+    print(f"Wall-clock time:       {wall_time * 1000:.0f} ms")
+    print(f"Sum of table times:    {serial_time * 1000:.0f} ms "
+          f"({serial_time / wall_time if wall_time else 0.0:.1f}x overlap)")
+    if slowest is not None:
+        print(f"Slowest table:         {slowest.table} ({slowest.duration * 1000:.0f} ms)")
+    files_skipped = sum(result.files_skipped for result in results.values())
+    if files_skipped:
+        bytes_skipped = sum(result.bytes_skipped for result in results.values())
+        time_saved = sum(result.time_saved for result in results.values())
+        print(f"Unchanged files:       {files_skipped} skipped, {bytes_skipped:,} bytes not re-read"
+              + (f", ~{time_saved * 1000:.0f} ms of COPY time saved" if time_saved else ''))
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    workers = DEFAULT_WORKERS
+    report_file = None
+    incremental = '--incremental' in args
+    if incremental:
+        args.remove('--incremental')
+    if '--workers' in args:
+        workers = int(args.pop(args.index('--workers') + 1))
+        args.remove('--workers')
+    if '--json' in args:
+        report_file = args.pop(args.index('--json') + 1)
+        args.remove('--json')
+    unknown = [table for table in args if table not in RAW_POS_COLUMNS]
+    if unknown:
+        print(f"Unknown raw_pos table(s): {', '.join(unknown)}. Choose from: {', '.join(RAW_POS_COLUMNS)}")
+        sys.exit(1)
+    results = load_tables(raw_pos_loads(args), max_workers=workers, incremental=incremental, report_file=report_file)
+    sys.exit(0 if all(result.status == 'loaded' for result in results.values()) else 1)
@@ -0,0 +1,178 @@
+"""
+Client-side cache for metadata queries
+SHOW and DESCRIBE results are kept for METADATA_TTL seconds in a size-bounded
+LRU, keyed by the normalised statement and the session context it ran in
+(account, user, role, warehouse, database, schema). Any statement that can
+change what they list - DDL, and DML for the row counts SHOW TABLES reports -
+drops the cached entries for the object types it touches first.
+Pooled cursors consult the cache automatically (see snowflake_session.py).
+"""
+
+import atexit
+import re
+import threading
+import time
+from collections import OrderedDict
+
+METADATA_TTL = 60.0
+METADATA_MAX_ENTRIES = 128
+
+CONTEXT_KEYS = ('account', 'user', 'role', 'warehouse', 'database', 'schema')
+
+_COMMENT = re.compile(r'--[^\n]*|/\*.*?\*/', re.S)
+_QUOTED = re.compile(r"('(?:[^']|'')*'|\"[^\"]*\")")
+_WHITESPACE = re.compile(r'\s+')
+
+_SHOW = re.compile(r'^SHOW\s+(?:TERSE\s+)?(?P<kind>(?:MATERIALIZED\s+|FILE\s+|EXTERNAL\s+)?\w+)', re.I)
+_DESCRIBE = re.compile(r'^DESC(?:RIBE)?\s+(?P<kind>(?:MATERIALIZED\s+|FILE\s+|EXTERNAL\s+)?\w+)', re.I)
+# Statements that never change what SHOW/DESCRIBE report
+_NO_METADATA_CHANGE = re.compile(
+    r'^(SELECT|WITH|LIST|LS|USE|EXPLAIN|ALTER\s+SESSION|PUT|GET|REMOVE|RM|COPY\s+INTO\s+@)\b', re.I
+)
+_DDL = re.compile(
+    r'^(?:CREATE(?:\s+OR\s+REPLACE)?|ALTER|DROP|UNDROP)\s+'
+    r'(?:(?:TRANSIENT|TEMPORARY|TEMP|VOLATILE|SECURE|RECURSIVE|LOCAL|GLOBAL)\s+)*'
+    r'(?P<kind>(?:MATERIALIZED\s+|FILE\s+|EXTERNAL\s+|STORAGE\s+)?\w+)',
+    re.I
+)
+_DML = re.compile(r'^(INSERT|UPDATE|DELETE|MERGE|TRUNCATE|COPY\s+INTO\s+(?!@))', re.I)
+
+# Changing one of these can change the metadata of the listed types as well
+_DEPENDENTS = {
+    'TABLE': {'TABLE', 'COLUMN', 'OBJECT'},
+    'VIEW': {'VIEW', 'COLUMN', 'OBJECT'},
+    'MATERIALIZED VIEW': {'MATERIALIZED VIEW', 'VIEW', 'COLUMN', 'OBJECT'},
+    'EXTERNAL TABLE': {'EXTERNAL TABLE', 'TABLE', 'COLUMN', 'OBJECT'},
+    'INTEGRATION': {'INTEGRATION', 'STORAGE INTEGRATION'},
+    'STORAGE INTEGRATION': {'INTEGRATION', 'STORAGE INTEGRATION'},
+}
+# DDL on a container invalidates everything that lives in it
+_CONTAINERS = {'DATABASE', 'SCHEMA'}
+
+# SHOW plurals that are not the singular plus S or with IES for Y
+_IRREGULAR_PLURALS = {'CLASSES': 'CLASS', 'INDEXES': 'INDEX'}
+
+STATS = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
+
+def normalize(sql):
+    """
+    Statement text with comments, case and whitespace differences removed;
+    quoted identifiers and literals are kept as written
+    """
+    parts = _QUOTED.split(_COMMENT.sub(' ', sql))
+    text = ''.join(part if i % 2 else _WHITESPACE.sub(' ', part).upper() for i, part in enumerate(parts))
+    return text.strip().rstrip(';').strip()
+
+
+def _statement(sql):
+    return _COMMENT.sub(' ', sql).strip()
+
+
+def _kind(match):
+    return _WHITESPACE.sub(' ', match.group('kind').upper())
+
+
+def cached_kind(sql):
+    """
+    Object type a SHOW/DESCRIBE statement lists, or None if it is not cacheable
+    """
+    sql = _statement(sql)
+    match = _SHOW.match(sql)
+    if match:
+        # SHOW takes the plural: WAREHOUSES, FILE FORMATS, POLICIES, ...
+        kind = _kind(match)
+        if kind in _IRREGULAR_PLURALS:
+            return _IRREGULAR_PLURALS[kind]
+        if kind.endswith('IES'):
+            return kind[:-3] + 'Y'
+        return kind[:-1] if kind.endswith('S') else kind
+    match = _DESCRIBE.match(sql)
+    return _kind(match) if match else None
+
+
+def affected_kinds(sql):
+    """
+    Object types whose metadata a statement may change: an empty set for
+    read-only statements, None when anything may have changed
+    """
+    sql = _statement(sql)
+    if cached_kind(sql) or _NO_METADATA_CHANGE.match(sql):
+        return set()
+    if _DML.match(sql):
+        return set(_DEPENDENTS['TABLE'])
+    match = _DDL.match(sql)
+    if not match:
+        # GRANT, COMMENT, CALL, ...: cannot tell, so assume the worst
+        return None
+    kind = _kind(match)
+    if kind in _CONTAINERS:
+        return None
+    return set(_DEPENDENTS.get(kind, {kind}))
+
+
+class MetadataCache:
+    """
+    TTL + LRU cache of (description, rows) per statement and session context
+    """
+
+    def __init__(self, ttl=METADATA_TTL, max_entries=METADATA_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(conn, sql):
+        kind = cached_kind(sql)
+        if kind is None:
+            return None
+        context = tuple((getattr(conn, name, None) or '').strip('"').upper() for name in CONTEXT_KEYS)
+        return kind, normalize(sql), context
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl:
+                self._entries.move_to_end(key)
+                STATS['hits'] += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            STATS['misses'] += 1
+            return None
+
+    def put(self, key, description, rows):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), (description, list(rows)))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, sql):
+        """
+        Drop entries a statement about to run may make stale
+        """
+        kinds = affected_kinds(sql)
+        if kinds == set():
+            return
+        with self._lock:
+            stale = [key for key in self._entries if kinds is None or key[0] in kinds]
+            for key in stale:
+                del self._entries[key]
+            STATS['invalidations'] += len(stale)
+
+    def clear(self):
+        with self._lock:
+            STATS['invalidations'] += len(self._entries)
+            self._entries.clear()
+
+
+CACHE = MetadataCache()
+
+
+@atexit.register
+def print_cache_summary():
+    if STATS['hits']:
+        print(f"\nMetadata cache: {STATS['hits']} hits, {STATS['misses']} misses, "
+              f"{STATS['invalidations']} entries invalidated")
@@ -0,0 +1,1935 @@
+"""
+Offline Snowflake backend
+A local stand-in for snowflake.connector built on SQLite, so the scripts can
+run (and be timed) without a live account. It implements the connector
+surface the scripts use - connect, cursor, execute, execute_async, fetch*,
+description, sfqid - and the subset of Snowflake SQL they send: USE, CREATE/
+DROP/UNDROP of databases, schemas, tables, views, stages, file formats and
+warehouses, SHOW, DESCRIBE, LIST, PUT to an internal stage, COPY INTO from a
+local directory stage, and plain SELECT/INSERT/UPDATE/DELETE. Every statement is recorded, with its
+query tag and timing, in SNOWFLAKE.ACCOUNT_USAGE.QUERY_HISTORY, which the
+INFORMATION_SCHEMA.QUERY_HISTORY table function also reads. Statement
+timeouts (execute(timeout=...) or STATEMENT_TIMEOUT_IN_SECONDS) and
+SYSTEM$CANCEL_QUERY / SYSTEM$CANCEL_ALL_QUERIES interrupt running statements
+with Snowflake's errors.
+
+External stage URLs map onto fixtures/stage/<bucket>/<path>. A fresh
+offline database is seeded with the Tasty Bytes menu/truck/franchise tables
+loaded from those fixtures.
+
+Enable it for every pooled connection with SNOWFLAKE_BACKEND=offline.
+
+Usage:
+    python snowflake_offline.py --reset
+    python snowflake_offline.py --run-suite [script.py ...] [--budget SECONDS]
+"""
+
+import csv
+import datetime
+import fnmatch
+import glob
+import gzip
+import hashlib
+import io
+import itertools
+import json
+import math
+import os
+import re
+import shutil
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+import weakref
+
+from snowflake_config import CACHE_DIR, SETTINGS
+from snowflake_schemas import create_table_sql
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURES_DIR = os.path.join(os.path.dirname(SCRIPTS_DIR), 'fixtures')
+
+OFFLINE_DB = SETTINGS.offline_db or os.path.join(CACHE_DIR, 'offline', 'offline.db')
+STAGE_ROOT = SETTINGS.offline_stage or os.path.join(FIXTURES_DIR, 'stage')
+INTERNAL_STAGE_ROOT = os.path.join(os.path.dirname(OFFLINE_DB), 'internal_stages')
+
+# Bucket prefixes used by the course material that hold the same files
+STAGE_ALIASES = {
+    's3://sfquickstarts/tasty-bytes-builder-education/': 's3://sfquickstarts/tastybytes/',
+}
+
+OFFLINE_VERSION = '8.0.0-offline'
+
+paramstyle = 'qmark'
+
+# Statements run against a brand new offline database
+SEED_SQL = [
+    "CREATE DATABASE IF NOT EXISTS snowflake",
+    "CREATE SCHEMA IF NOT EXISTS snowflake.information_schema",
+    "CREATE DATABASE IF NOT EXISTS tasty_bytes_sample_data",
+    "CREATE SCHEMA IF NOT EXISTS tasty_bytes_sample_data.raw_pos",
+    """CREATE OR REPLACE STAGE tasty_bytes_sample_data.public.blob_stage
+url = 's3://sfquickstarts/tastybytes/'
+file_format = (type = csv)""",
+    create_table_sql('tasty_bytes_sample_data.raw_pos.menu', 'menu'),
+    create_table_sql('tasty_bytes_sample_data.raw_pos.truck', 'truck'),
+    create_table_sql('tasty_bytes_sample_data.raw_pos.franchise', 'franchise'),
+    "COPY INTO tasty_bytes_sample_data.raw_pos.menu FROM @tasty_bytes_sample_data.public.blob_stage/raw_pos/menu/",
+    "COPY INTO tasty_bytes_sample_data.raw_pos.truck FROM @tasty_bytes_sample_data.public.blob_stage/raw_pos/truck/",
+    "COPY INTO tasty_bytes_sample_data.raw_pos.franchise FROM @tasty_bytes_sample_data.public.blob_stage/raw_pos/franchise/",
+]
+
+_CATALOG_SQL = """
+CREATE TABLE IF NOT EXISTS _sf_objects (
+    kind TEXT, database_name TEXT, schema_name TEXT, name TEXT,
+    created_on TEXT, dropped_on TEXT, properties TEXT
+);
+CREATE TABLE IF NOT EXISTS _sf_load_history (
+    table_name TEXT, file_name TEXT, md5 TEXT, rows_loaded INTEGER, loaded_on TEXT
+);
+CREATE TABLE IF NOT EXISTS _sf_query_history (
+    query_id TEXT, query_text TEXT, query_type TEXT, query_tag TEXT, warehouse_name TEXT, execution_status TEXT,
+    error_message TEXT, start_time TEXT, end_time TEXT, total_elapsed_time INTEGER, compilation_time INTEGER,
+    queued_provisioning_time INTEGER, queued_repair_time INTEGER, queued_overload_time INTEGER,
+    execution_time INTEGER, bytes_scanned INTEGER, partitions_scanned INTEGER, partitions_total INTEGER,
+    rows_produced INTEGER
+);
+"""
+
+_init_lock = threading.Lock()
+
+# Account views served from the catalog instead of a user table
+SYSTEM_VIEWS = {
+    ('SNOWFLAKE', 'ACCOUNT_USAGE', 'QUERY_HISTORY'): '_sf_query_history',
+}
+
+# TABLE([<database>.]INFORMATION_SCHEMA.QUERY_HISTORY(...)): the same history, by end time
+_QUERY_HISTORY_FUNCTION = re.compile(r'\bTABLE\s*\(\s*(?:[\w$]+\.)?INFORMATION_SCHEMA\.QUERY_HISTORY\s*\(', re.I)
+_QUERY_HISTORY_RANGES = {'END_TIME_RANGE_START': 'end_time >=', 'END_TIME_RANGE_END': 'end_time <'}
+
+# <database>.INFORMATION_SCHEMA.LOAD_HISTORY: the COPY load metadata of that database's tables
+LOAD_HISTORY_SQL = """(SELECT schema_name, file_name, table_name, last_load_time, 'LOADED' AS status,
+    row_count, row_count AS row_parsed, NULL AS first_error_message
+FROM (SELECT substr(table_name, 1, instr(table_name, '.') - 1) AS catalog_name,
+        substr(rest, 1, instr(rest, '.') - 1) AS schema_name, substr(rest, instr(rest, '.') + 1) AS table_name,
+        file_name, loaded_on AS last_load_time, rows_loaded AS row_count
+    FROM (SELECT *, substr(table_name, instr(table_name, '.') + 1) AS rest FROM _sf_load_history)) h
+WHERE catalog_name = '{database}' AND EXISTS (SELECT 1 FROM _sf_objects o WHERE o.kind = 'TABLE'
+    AND o.dropped_on IS NULL AND o.database_name = h.catalog_name AND o.schema_name = h.schema_name
+    AND o.name = h.table_name))"""
+
+# Recorded statements are written to the query history in batches of this many
+HISTORY_FLUSH_SIZE = 100
+
+# SQLite virtual machine steps between checks for a timeout or a cancel request
+PROGRESS_INTERVAL = 10000
+
+# Open sessions by session ID, and the statements running on them by query ID, for cancel requests
+_SESSIONS = weakref.WeakValueDictionary()
+_RUNNING = {}
+_session_ids = itertools.count(1)
+
+DATEADD_UNITS = {'SECOND': 'seconds', 'MINUTE': 'minutes', 'HOUR': 'hours', 'DAY': 'days', 'WEEK': 'weeks'}
+
+# Result of DDL and other statements that only report a status
+STATUS_COLUMNS = ['status']
+
+SHOW_COLUMNS = {
+    'DATABASES': ['created_on', 'name', 'is_default', 'is_current', 'origin', 'owner', 'comment', 'options',
+                  'retention_time', 'kind'],
+    'SCHEMAS': ['created_on', 'name', 'is_default', 'is_current', 'database_name', 'owner', 'comment', 'options',
+                'retention_time'],
+    'TABLES': ['created_on', 'name', 'database_name', 'schema_name', 'kind', 'comment', 'cluster_by', 'rows',
+               'bytes', 'owner', 'retention_time'],
+    'VIEWS': ['created_on', 'name', 'reserved', 'database_name', 'schema_name', 'owner', 'comment', 'text',
+              'is_secure', 'is_materialized'],
+    'STAGES': ['created_on', 'name', 'database_name', 'schema_name', 'url', 'has_credentials',
+               'has_encryption_key', 'owner', 'comment', 'region', 'type'],
+    'FILE FORMATS': ['created_on', 'name', 'database_name', 'schema_name', 'type', 'owner', 'comment',
+                     'format_options'],
+    'WAREHOUSES': ['name', 'state', 'type', 'size', 'min_cluster_count', 'max_cluster_count', 'started_clusters',
+                   'running', 'queued', 'is_default', 'is_current', 'auto_suspend', 'auto_resume', 'available',
+                   'provisioning', 'quiescing', 'other', 'created_on', 'resumed_on', 'updated_on', 'owner',
+                   'comment'],
+    'PIPES': ['created_on', 'name', 'database_name', 'schema_name', 'definition', 'owner', 'notification_channel',
+              'comment'],
+}
+
+DESCRIBE_COLUMNS = ['name', 'type', 'kind', 'null?', 'default', 'primary key', 'unique key', 'check',
+                    'expression', 'comment', 'policy name']
+
+LIST_COLUMNS = ['name', 'size', 'md5', 'last_modified']
+
+PUT_COLUMNS = ['source', 'target', 'source_size', 'target_size', 'source_compression', 'target_compression',
+               'status', 'message']
+
+# Compression PUT detects from the file extension; anything else is uncompressed
+PUT_COMPRESSIONS = {'.gz': 'GZIP', '.bz2': 'BZ2', '.zst': 'ZSTD', '.br': 'BROTLI', '.parquet': 'PARQUET'}
+
+COPY_COLUMNS = ['file', 'status', 'rows_parsed', 'rows_loaded', 'error_limit', 'errors_seen', 'first_error',
+                'first_error_line', 'first_error_character', 'first_error_column_name']
+
+WAREHOUSE_SIZES = {
+    'XSMALL': 'X-Small', 'X-SMALL': 'X-Small', 'SMALL': 'Small', 'MEDIUM': 'Medium', 'LARGE': 'Large',
+    'XLARGE': 'X-Large', 'X-LARGE': 'X-Large', 'XXLARGE': '2X-Large', '2X-LARGE': '2X-Large',
+}
+
+
+class Error(Exception):
+    """
+    Mirrors snowflake.connector.errors.Error closely enough for the scripts
+    """
+
+    def __init__(self, msg, errno=1003, sqlstate='42000', sfqid=None):
+        super().__init__(msg)
+        self.msg = msg
+        self.errno = errno
+        self.sqlstate = sqlstate
+        self.sfqid = sfqid
+
+    def __str__(self):
+        return f"{self.errno:06d} ({self.sqlstate}): {self.msg}"
+
+
+class ProgrammingError(Error):
+    pass
+
+
+class OperationalError(Error):
+    pass
+
+
+def _cancelled_error(timeout=None):
+    if timeout is not None:
+        return ProgrammingError(f"Statement reached its statement or warehouse timeout of {timeout} second(s) "
+                                f"and was canceled.", errno=630, sqlstate='57014')
+    return ProgrammingError("SQL execution canceled", errno=604, sqlstate='57014')
+
+
+def _now():
+    return datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+
+
+def _utc(timestamp):
+    # The same format SQLite's CURRENT_TIMESTAMP uses, so the two compare as strings
+    return datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc).strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+
+
+def _query_type(sql):
+    words = _strip_comments(sql).upper().split(None, 2)
+    if words[:1] in (['ALTER'], ['CREATE'], ['DROP'], ['SHOW'], ['DESCRIBE'], ['DESC']) and len(words) > 1:
+        return '_'.join(words[:2])
+    return words[0] if words else 'UNKNOWN'
+
+
+def _dateadd(part, amount, value):
+    if value is None or amount is None:
+        return None
+    unit = DATEADD_UNITS.get(str(part).upper().rstrip('S'))
+    if unit is None:
+        raise ValueError(f"DATEADD: unsupported date part {part!r} (offline backend)")
+    moved = datetime.datetime.fromisoformat(str(value)) + datetime.timedelta(**{unit: float(amount)})
+    return moved.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+
+
+def _ident(part):
+    """
+    Snowflake identifier rules: unquoted names are upper-cased
+    """
+    part = part.strip()
+    if part.startswith('"') and part.endswith('"'):
+        return part[1:-1]
+    return part.upper()
+
+
+def _split_name(name):
+    return [_ident(part) for part in re.findall(r'"[^"]*"|[^.]+', name.strip())]
+
+
+def _query_history_function(sql):
+    """
+    Rewrite the QUERY_HISTORY table function as a filtered read of the
+    account history; RESULT_LIMIT and the other arguments are ignored
+    """
+    match = _QUERY_HISTORY_FUNCTION.search(sql)
+    if not match:
+        return sql
+    args, depth, start, end = [], 1, match.end(), match.end()
+    while depth:
+        char = sql[end]
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        if (char == ',' and depth == 1) or depth == 0:
+            args.append(sql[start:end])
+            start = end + 1
+        end += 1
+    close = sql.index(')', end)
+    conditions = []
+    for arg in args:
+        name, _, value = arg.partition('=>')
+        condition = _QUERY_HISTORY_RANGES.get(name.strip().upper())
+        if condition:
+            conditions.append(f"{condition} {value.strip()}")
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ''
+    rewritten = f"(SELECT * FROM SNOWFLAKE.ACCOUNT_USAGE.QUERY_HISTORY{where})"
+    return sql[:match.start()] + rewritten + _query_history_function(sql[close + 1:])
+
+
+def _physical(database, schema, name):
+    return '"' + f"{database}.{schema}.{name}".replace('"', '""') + '"'
+
+
+def _dropped_physical(database, schema, name, stamp):
+    return _physical(database, schema, f"{name}#dropped#{stamp}")
+
+
+def _not_found(kind, name):
+    return ProgrammingError(f"SQL compilation error:\n{kind} '{name}' does not exist or not authorized.",
+                            errno=2003, sqlstate='02000')
+
+
+def _strip_comments(sql):
+    out = []
+    i = 0
+    quote = None
+    while i < len(sql):
+        ch = sql[i]
+        if quote:
+            out.append(ch)
+            if ch == quote:
+                quote = None
+        elif ch in ("'", '"'):
+            quote = ch
+            out.append(ch)
+        elif sql.startswith('--', i):
+            end = sql.find('\n', i)
+            i = len(sql) if end < 0 else end
+            continue
+        elif sql.startswith('/*', i):
+            end = sql.find('*/', i)
+            i = len(sql) if end < 0 else end + 2
+            continue
+        else:
+            out.append(ch)
+        i += 1
+    return ''.join(out)
+
+
+def split_statements(sql):
+    """
+    Split a block of SQL on semicolons that are outside quotes and comments
+    """
+    statements = []
+    current = []
+    quote = None
+    for ch in _strip_comments(sql):
+        if quote:
+            if ch == quote:
+                quote = None
+        elif ch in ("'", '"'):
+            quote = ch
+        elif ch == ';':
+            statement = ''.join(current).strip()
+            if statement:
+                statements.append(statement)
+            current = []
+            continue
+        current.append(ch)
+    statement = ''.join(current).strip()
+    if statement:
+        statements.append(statement)
+    return statements
+
+
+def _parse_options(text):
+    """
+    Parse KEY = value pairs (values may be quoted or parenthesised)
+    """
+    options = {}
+    for match in re.finditer(r"(\w+)\s*=\s*('(?:[^']|'')*'|\([^)]*\)|[^\s,()]+)", text):
+        key, value = match.group(1).upper(), match.group(2)
+        if value.startswith("'"):
+            value = value[1:-1].replace("''", "'")
+        options[key] = value
+    return options
+
+
+def _format_options(value, catalog_lookup=None):
+    """
+    Resolve a FILE_FORMAT value: inline (...) options or a named file format
+    """
+    if not value:
+        return {}
+    if value.startswith('('):
+        return _parse_options(value[1:-1])
+    if catalog_lookup:
+        return catalog_lookup(value)
+    return {}
+
+
+def _normalise_type(declared):
+    declared = (declared or '').upper().replace(' ', '')
+    if declared in ('', 'NUMBER', 'INT', 'INTEGER', 'BIGINT', 'SMALLINT'):
+        return 'NUMBER(38,0)' if declared else 'VARCHAR(16777216)'
+    if declared.startswith(('DECIMAL', 'NUMERIC')):
+        return 'NUMBER' + declared[declared.index('('):] if '(' in declared else 'NUMBER(38,0)'
+    if declared in ('VARCHAR', 'STRING', 'TEXT'):
+        return 'VARCHAR(16777216)'
+    if declared in ('FLOAT', 'DOUBLE', 'REAL'):
+        return 'FLOAT'
+    return declared
+
+
+def _convert(value, declared):
+    """
+    Convert one CSV field to the Python value stored for its column type
+    """
+    if value == '':
+        return None
+    declared = (declared or '').upper()
+    if declared.startswith(('NUMBER', 'INT', 'DECIMAL', 'NUMERIC', 'BIGINT', 'SMALLINT')):
+        scale = re.search(r',\s*(\d+)\)', declared)
+        try:
+            number = float(value)
+        except ValueError:
+            raise ValueError(f"Numeric value '{value}' is not recognized")
+        if scale and int(scale.group(1)) > 0:
+            return number
+        if number != int(number):
+            return number
+        return int(number)
+    if declared.startswith(('FLOAT', 'DOUBLE', 'REAL')):
+        try:
+            return float(value)
+        except ValueError:
+            raise ValueError(f"Numeric value '{value}' is not recognized")
+    if declared.startswith('DATE'):
+        try:
+            return datetime.date.fromisoformat(value[:10]).isoformat()
+        except ValueError:
+            raise ValueError(f"Date '{value}' is not recognized")
+    if declared.startswith('BOOLEAN'):
+        return value.strip().upper() in ('TRUE', 'T', 'YES', 'Y', '1')
+    return value
+
+
+def _array_contains(value, array):
+    if array is None:
+        return None
+    return int(value in json.loads(array))
+
+
+def _md5(path):
+    digest = hashlib.md5()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _http_date(timestamp):
+    return time.strftime('%a, %d %b %Y %H:%M:%S GMT', time.gmtime(timestamp))
+
+
+def _open_text(path):
+    if path.endswith('.gz'):
+        return io.TextIOWrapper(gzip.open(path, 'rb'), encoding='utf-8', newline='')
+    if path.endswith('.zst'):
+        import zstandard  # optional; only needed for zstd-compressed stage files
+        return io.TextIOWrapper(zstandard.open(path, 'rb'), encoding='utf-8', newline='')
+    return open(path, encoding='utf-8', newline='')
+
+
+class _Result:
+    def __init__(self, columns, rows, rowcount=None):
+        self.columns = columns
+        self.rows = rows
+        self.rowcount = len(rows) if rowcount is None else rowcount
+
+
+def _status(message):
+    return _Result(STATUS_COLUMNS, [(message,)])
+
+
+class OfflineCursor:
+    """
+    DB-API style cursor over the offline backend
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.description = None
+        self.rowcount = -1
+        self.sfqid = None
+        self.arraysize = 1
+        self._rows = []
+        self._position = 0
+        self._closed = False
+        # Remaining (result, query_id) pairs of a multi-statement request, for nextset()
+        self._next_sets = []
+
+    def _load(self, result, query_id):
+        self.sfqid = query_id
+        self.description = [(name.upper(), None, None, None, None, None, True) for name in result.columns]
+        self.rowcount = result.rowcount
+        self._rows = result.rows
+        self._position = 0
+
+    def execute(self, command, params=None, num_statements=None, timeout=None, **kwargs):
+        query_id = str(uuid.uuid4())
+        self._next_sets = []
+        statement_params = kwargs.get('_statement_params') or {}
+        query_tag = statement_params.get('QUERY_TAG')
+        timeout = timeout or statement_params.get('STATEMENT_TIMEOUT_IN_SECONDS')
+        try:
+            if num_statements is None:
+                result = self.connection._run_recorded(command, params, query_id, query_tag, timeout)
+            else:
+                results = self.connection._run_multi(command, num_statements, query_tag, timeout)
+        except Error as e:
+            e.sfqid = query_id
+            self.sfqid = query_id
+            raise
+        if num_statements is None:
+            self._load(result, query_id)
+        else:
+            # Like the connector, the cursor starts on the first statement's result
+            self._load(*results[0])
+            self._next_sets = results[1:]
+        return self
+
+    def nextset(self):
+        if not self._next_sets:
+            return None
+        self._load(*self._next_sets.pop(0))
+        return True
+
+    def executemany(self, command, seqparams, **kwargs):
+        total = 0
+        for params in seqparams:
+            self.execute(command, params)
+            total += max(self.rowcount, 0)
+        self.rowcount = total
+        return self
+
+    def execute_async(self, command, params=None, **kwargs):
+        # Runs synchronously; the result is parked under its query ID
+        query_id = str(uuid.uuid4())
+        statement_params = kwargs.get('_statement_params') or {}
+        try:
+            result = self.connection._run_recorded(command, params, query_id, statement_params.get('QUERY_TAG'),
+                                                   statement_params.get('STATEMENT_TIMEOUT_IN_SECONDS'))
+            self.connection._async_results[query_id] = ('SUCCESS', result)
+        except Error as e:
+            e.sfqid = query_id
+            self.connection._async_results[query_id] = ('FAILED_WITH_ERROR', e)
+        self.sfqid = query_id
+        return {'queryId': query_id}
+
+    def get_results_from_sfqid(self, query_id):
+        status, result = self.connection._async_results.get(query_id, (None, None))
+        if status is None:
+            raise ProgrammingError(f"Query {query_id} not found", errno=2003, sqlstate='02000')
+        if status != 'SUCCESS':
+            raise result
+        self._load(result, query_id)
+
+    query_result = get_results_from_sfqid
+
+    def fetchone(self):
+        if self._position >= len(self._rows):
+            return None
+        row = self._rows[self._position]
+        self._position += 1
+        return row
+
+    def fetchmany(self, size=None):
+        size = size or self.arraysize
+        rows = self._rows[self._position:self._position + size]
+        self._position += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = self._rows[self._position:]
+        self._position = len(self._rows)
+        return rows
+
+    def __iter__(self):
+        while True:
+            row = self.fetchone()
+            if row is None:
+                return
+            yield row
+
+    def close(self):
+        self._closed = True
+        return True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class OfflineConnection:
+    """
+    Connection to the local SQLite-backed Snowflake stand-in
+    """
+
+    def __init__(self, **params):
+        self.params = params
+        self.user = (params.get('user') or 'OFFLINE').upper()
+        self.account = (params.get('account') or 'OFFLINE').upper()
+        self.role = (params.get('role') or 'ACCOUNTADMIN').upper()
+        self.warehouse = None
+        self.database = None
+        self.schema = None
+        self.session_parameters = dict(params.get('session_parameters') or {})
+        self.session_id = next(_session_ids)
+        self._closed = False
+        self._async_results = {}
+        self._history = []
+        self._lock = threading.RLock()
+        # monotonic deadline and timeout of the running statement, and why it was interrupted
+        self._deadline = None
+        self._timeout = None
+        self._interrupted = None
+        _SESSIONS[self.session_id] = self
+        self._db = _open_database()
+        self._register_functions()
+        if params.get('warehouse') and self._find('WAREHOUSE', None, None, _ident(params['warehouse'])):
+            self.warehouse = _ident(params['warehouse'])
+        if params.get('database') and self._find('DATABASE', None, None, _ident(params['database'])):
+            self.database = _ident(params['database'])
+            schema = _ident(params.get('schema') or 'PUBLIC')
+            if self._find('SCHEMA', self.database, None, schema):
+                self.schema = schema
+
+    # -- connector surface -------------------------------------------------
+
+    def cursor(self, cursor_class=None):
+        return OfflineCursor(self)
+
+    def close(self):
+        if not self._closed:
+            self._flush_history()
+            self._closed = True
+            self._db.close()
+
+    def is_closed(self):
+        return self._closed
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def execute_string(self, sql_text, remove_comments=False, return_cursors=True, **kwargs):
+        cursors = []
+        for statement in split_statements(sql_text):
+            cursor = self.cursor()
+            cursor.execute(statement, **kwargs)
+            cursors.append(cursor)
+        return cursors if return_cursors else []
+
+    def execute_stream(self, stream, remove_comments=False, **kwargs):
+        for statement in split_statements(stream.read()):
+            cursor = self.cursor()
+            cursor.execute(statement, **kwargs)
+            yield cursor
+
+    def get_query_status(self, query_id):
+        status, _ = self._async_results.get(query_id, ('FAILED_WITH_ERROR', None))
+        return status
+
+    def get_query_status_throw_if_error(self, query_id):
+        status, result = self._async_results.get(query_id, (None, None))
+        if status is None:
+            raise ProgrammingError(f"Query {query_id} not found", errno=2003, sqlstate='02000')
+        if status != 'SUCCESS':
+            raise result
+        return status
+
+    def is_still_running(self, status):
+        return False
+
+    def is_an_error(self, status):
+        return status != 'SUCCESS'
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    # -- catalog -----------------------------------------------------------
+
+    def _register_functions(self):
+        self._db.create_function('CURRENT_ROLE', 0, lambda: self.role)
+        self._db.create_function('CURRENT_WAREHOUSE', 0, lambda: self.warehouse)
+        self._db.create_function('CURRENT_DATABASE', 0, lambda: self.database)
+        self._db.create_function('CURRENT_SCHEMA', 0, lambda: self.schema)
+        self._db.create_function('CURRENT_USER', 0, lambda: self.user)
+        self._db.create_function('CURRENT_ACCOUNT', 0, lambda: self.account)
+        self._db.create_function('CURRENT_REGION', 0, lambda: 'OFFLINE')
+        self._db.create_function('CURRENT_VERSION', 0, lambda: OFFLINE_VERSION)
+        self._db.create_function('YEAR', 1, lambda v: int(str(v)[:4]) if v else None)
+        self._db.create_function('MONTH', 1, lambda v: int(str(v)[5:7]) if v else None)
+        self._db.create_function('DAY', 1, lambda v: int(str(v)[8:10]) if v else None)
+        self._db.create_function('IFF', 3, lambda c, a, b: a if c else b)
+        self._db.create_function('NVL', 2, lambda a, b: b if a is None else a)
+        self._db.create_function('PARSE_JSON', 1, lambda v: v)
+        self._db.create_function('ARRAY_CONTAINS', 2, _array_contains)
+        self._db.create_function('DATEADD', 3, _dateadd)
+        self._db.create_function('CONCAT', -1, lambda *a: None if None in a else ''.join(str(v) for v in a))
+        # Lets timeouts and cancel requests stop a statement in the middle
+        self._db.set_progress_handler(self._check_interrupt, PROGRESS_INTERVAL)
+
+    def _check_interrupt(self):
+        if self._interrupted:
+            return 1
+        if self._deadline is not None and time.monotonic() > self._deadline:
+            self._interrupted = 'timeout'
+            return 1
+        return 0
+
+    def _interrupt(self):
+        self._interrupted = 'cancel'
+        self._db.interrupt()
+
+    def _find(self, kind, database, schema, name, include_dropped=False):
+        query = "SELECT rowid, * FROM _sf_objects WHERE kind = ? AND name = ?"
+        args = [kind, name]
+        for column, value in (('database_name', database), ('schema_name', schema)):
+            if value is not None:
+                query += f" AND {column} = ?"
+                args.append(value)
+        if not include_dropped:
+            query += " AND dropped_on IS NULL"
+        query += " ORDER BY rowid DESC"
+        return self._db.execute(query, args).fetchone()
+
+    def _objects(self, kind, database=None, schema=None):
+        query = "SELECT name, database_name, schema_name, created_on, properties FROM _sf_objects " \
+                "WHERE kind = ? AND dropped_on IS NULL"
+        args = [kind]
+        if database is not None:
+            query += " AND database_name = ?"
+            args.append(database)
+        if schema is not None:
+            query += " AND schema_name = ?"
+            args.append(schema)
+        return self._db.execute(query + " ORDER BY name", args).fetchall()
+
+    def _add_object(self, kind, database, schema, name, properties=None):
+        self._db.execute(
+            "INSERT INTO _sf_objects VALUES (?, ?, ?, ?, ?, NULL, ?)",
+            (kind, database, schema, name, _now(), json.dumps(properties or {}))
+        )
+
+    def _remove_object(self, kind, database, schema, name):
+        self._db.execute(
+            "DELETE FROM _sf_objects WHERE kind = ? AND name = ? AND database_name IS ? AND schema_name IS ? "
+            "AND dropped_on IS NULL",
+            (kind, name, database, schema)
+        )
+
+    def _resolve(self, name, kind='TABLE'):
+        """
+        Resolve a 1-, 2- or 3-part object name against the current context
+        """
+        parts = _split_name(name)
+        if len(parts) == 3:
+            return tuple(parts)
+        if len(parts) == 2:
+            if not self.database:
+                raise ProgrammingError("Cannot perform operation. This session does not have a current database. "
+                                       "Call 'USE DATABASE', or use a qualified name.", errno=90105, sqlstate='22000')
+            return self.database, parts[0], parts[1]
+        if not self.database or not self.schema:
+            raise ProgrammingError(f"Cannot perform {kind}. This session does not have a current "
+                                   f"{'database' if not self.database else 'schema'}. Call 'USE "
+                                   f"{'DATABASE' if not self.database else 'SCHEMA'}', or use a qualified name.",
+                                   errno=90105, sqlstate='22000')
+        return self.database, self.schema, parts[0]
+
+    def _resolve_schema(self, name):
+        parts = _split_name(name)
+        if len(parts) == 2:
+            return parts[0], parts[1]
+        if not self.database:
+            raise ProgrammingError("Cannot perform CREATE SCHEMA. This session does not have a current database. "
+                                   "Call 'USE DATABASE', or use a qualified name.", errno=90105, sqlstate='22000')
+        return self.database, parts[0]
+
+    def _table_columns(self, database, schema, name):
+        info = self._db.execute(f"PRAGMA table_info({_physical(database, schema, name)})").fetchall()
+        return [(row[1], row[2]) for row in info]
+
+    def _not_null_columns(self, database, schema, name):
+        info = self._db.execute(f"PRAGMA table_info({_physical(database, schema, name)})").fetchall()
+        return {row[1] for row in info if row[3]}
+
+    def _relation(self, name):
+        """
+        Resolve a table or view name, raising the Snowflake error if it is missing
+        """
+        database, schema, obj = self._resolve(name)
+        for kind in ('TABLE', 'VIEW'):
+            if self._find(kind, database, schema, obj):
+                return kind, database, schema, obj
+        raise _not_found('Object', f"{database}.{schema}.{obj}")
+
+    # -- statement dispatch -----------------------------------------------
+
+    def _run(self, command, params=None, timeout=None):
+        if self._closed:
+            raise OperationalError("Connection is closed", errno=250002, sqlstate='08003')
+        statements = split_statements(command)
+        if not statements:
+            raise ProgrammingError("Empty SQL statement.", errno=900, sqlstate='42000')
+        if len(statements) > 1:
+            raise ProgrammingError(f"Actual statement count {len(statements)} did not match the desired "
+                                   f"statement count 1.", errno=8, sqlstate='0A000')
+        sql = statements[0]
+        cancel = _CANCEL.match(sql)
+        if cancel:
+            # Not under the lock: the statement to cancel may be holding it
+            return _cancel(cancel, params)
+        with self._lock:
+            limits = [int(value) for value in (timeout, self.session_parameters.get('STATEMENT_TIMEOUT_IN_SECONDS'))
+                      if value and int(value) > 0]
+            outer = self._deadline is None and self._timeout is None
+            if outer:
+                self._interrupted = None
+            if limits and outer:
+                self._timeout = min(limits)
+                self._deadline = time.monotonic() + self._timeout
+            try:
+                for pattern, handler in _HANDLERS:
+                    match = pattern.match(sql)
+                    if match:
+                        return handler(self, match, params)
+                return self._run_sql(sql, params)
+            except (Error, sqlite3.Error):
+                if self._interrupted:
+                    raise _cancelled_error(self._timeout if self._interrupted == 'timeout' else None) from None
+                raise
+            finally:
+                if outer:
+                    self._deadline = self._timeout = None
+
+    def _run_multi(self, command, num_statements, query_tag=None, timeout=None):
+        """
+        Multi-statement request: statements run in order and the first failure
+        stops the rest. num_statements=0 accepts any count.
+        """
+        statements = split_statements(command)
+        if num_statements and len(statements) != num_statements:
+            raise ProgrammingError(f"Actual statement count {len(statements)} did not match the desired "
+                                   f"statement count {num_statements}.", errno=8, sqlstate='0A000')
+        results = []
+        for statement in statements:
+            query_id = str(uuid.uuid4())
+            results.append((self._run_recorded(statement, None, query_id, query_tag, timeout), query_id))
+        return results
+
+    def _run_recorded(self, command, params, query_id, query_tag=None, timeout=None):
+        """
+        _run() with the statement recorded in the query history. There is no
+        separate compilation or queueing offline, so all of the elapsed time
+        counts as execution time; nor is there a result cache, so it is
+        rounded up to whole milliseconds and never reads as a cache hit.
+        """
+        # A tag set with ALTER SESSION applies unless the statement carries its own
+        tag = query_tag or self.session_parameters.get('QUERY_TAG')
+        started = time.time()
+        status, error, result = 'SUCCESS', None, None
+        if not _CANCEL.match(command.strip()):
+            _RUNNING[query_id] = self
+        try:
+            result = self._run(command, params, timeout)
+            return result
+        except Error as e:
+            status, error = 'FAILED_WITH_ERROR', e.msg
+            raise
+        finally:
+            _RUNNING.pop(query_id, None)
+            finished = time.time()
+            elapsed = math.ceil((finished - started) * 1000)
+            self._history.append((query_id, command, _query_type(command), tag, self.warehouse, status, error, _utc(started),
+                                  _utc(finished), elapsed, 0, 0, 0, 0, elapsed, 0, 0, 0,
+                                  result.rowcount if result is not None else 0))
+            if len(self._history) >= HISTORY_FLUSH_SIZE:
+                self._flush_history(wait=False)
+
+    def _flush_history(self, wait=True):
+        # A cancel request finishing while its target holds the lock leaves the flush to a later statement
+        if not self._lock.acquire(blocking=wait):
+            return
+        try:
+            if self._history and not self._closed:
+                self._db.executemany(f"INSERT INTO _sf_query_history VALUES ({', '.join('?' * 19)})", self._history)
+            self._history = []
+        finally:
+            self._lock.release()
+
+    def _run_sql(self, sql, params):
+        translated = self._translate(sql)
+        if params is not None:
+            if isinstance(params, dict):
+                translated = re.sub(r'%\((\w+)\)s', r':\1', translated)
+            else:
+                translated = translated.replace('%s', '?')
+                params = list(params)
+        try:
+            cursor = self._db.execute(translated, params or ())
+        except sqlite3.Error as e:
+            raise self._sql_error(e, sql)
+        columns = [desc[0] for desc in cursor.description] if cursor.description else []
+        if columns:
+            return _Result(columns, [tuple(row) for row in cursor.fetchall()])
+        verb = sql.split(None, 1)[0].upper()
+        label = {'INSERT': 'number of rows inserted', 'UPDATE': 'number of rows updated',
+                 'DELETE': 'number of rows deleted'}.get(verb)
+        if label:
+            return _Result([label], [(cursor.rowcount,)], rowcount=cursor.rowcount)
+        return _status('Statement executed successfully.')
+
+    def _sql_error(self, error, sql):
+        message = str(error)
+        missing = re.search(r'no such table: (.+)', message)
+        if missing:
+            return _not_found('Object', re.sub(r'^main\.', '', missing.group(1)).strip('"').upper())
+        missing = re.search(r'no such column: (.+)', message)
+        if missing:
+            return ProgrammingError(f"SQL compilation error: error line 1 at position 0\ninvalid identifier "
+                                    f"'{missing.group(1).upper()}'", errno=904, sqlstate='42000')
+        return ProgrammingError(f"SQL compilation error:\n{message} (offline backend)", errno=1003,
+                                sqlstate='42000')
+
+    def _translate(self, sql):
+        """
+        Rewrite the Snowflake dialect the scripts use into SQLite
+        """
+        top = re.match(r'(\s*SELECT\s+(?:DISTINCT\s+)?)TOP\s+(\d+)\s+', sql, re.I)
+        if top:
+            sql = top.group(1) + sql[top.end():] + f" LIMIT {top.group(2)}"
+        sql = re.sub(r'\bILIKE\b', 'LIKE', sql, flags=re.I)
+        sql = re.sub(r'::\s*\w+(\s*\([^)]*\))?', '', sql)
+        sql = re.sub(r'\bFROM\s+(@[^\s;()]+)(\s*\([^)]*\))?',
+                     lambda m: f"FROM {self._stage_table(m.group(1), m.group(2) or '')}", sql, flags=re.I)
+        # Staged file columns ($1, $2, ...) would otherwise read as SQLite parameters
+        sql = re.sub(r'(?<![\w"])\$(\d+)\b', r'"$\1"', sql)
+        sql = _query_history_function(sql)
+
+        def table_ref(match):
+            keyword, name = match.group(1), match.group(2)
+            if name.startswith('(') or name.upper() in ('SELECT', 'TABLE', 'LATERAL') or name.startswith('temp.'):
+                return match.group(0)
+            parts = _split_name(name)
+            system_view = SYSTEM_VIEWS.get(tuple(parts))
+            if system_view:
+                self._flush_history()
+                return f"{keyword} {system_view}"
+            if parts[-2:] == ['INFORMATION_SCHEMA', 'LOAD_HISTORY'] and keyword.upper() in ('FROM', 'JOIN'):
+                database = (parts[0] if len(parts) == 3 else self.database).replace("'", "''")
+                return f"{keyword} {LOAD_HISTORY_SQL.format(database=database)}"
+            try:
+                _, database, schema, obj = self._relation(name)
+            except Error:
+                if '.' not in name:
+                    # Leave unqualified unknown names (CTEs, missing tables) for SQLite to resolve or report
+                    return match.group(0)
+                database, schema, obj = self._resolve(name)
+            return f"{keyword} {_physical(database, schema, obj)}"
+
+        return re.sub(r'\b(FROM|JOIN|INTO|UPDATE)\s+((?:"[^"]+"|[\w$]+)(?:\.(?:"[^"]+"|[\w$]+)){0,2})',
+                      table_ref, sql, flags=re.I)
+
+    # -- handlers ----------------------------------------------------------
+
+    def _use(self, match, params):
+        kind = (match.group('kind') or 'DATABASE').upper()
+        name = match.group('name')
+        if kind == 'ROLE':
+            self.role = _ident(name)
+        elif kind == 'WAREHOUSE':
+            warehouse = _ident(name)
+            if not self._find('WAREHOUSE', None, None, warehouse):
+                raise _not_found('Object', warehouse)
+            self.warehouse = warehouse
+        elif kind == 'DATABASE':
+            database = _ident(name)
+            if not self._find('DATABASE', None, None, database):
+                raise _not_found('Object', database)
+            self.database, self.schema = database, 'PUBLIC'
+        else:
+            database, schema = self._resolve_schema(name)
+            if not self._find('SCHEMA', database, None, schema):
+                raise _not_found('Object', f"{database}.{schema}")
+            self.database, self.schema = database, schema
+        return _status('Statement executed successfully.')
+
+    def _create_database(self, match, params):
+        name = _ident(match.group('name'))
+        exists = self._find('DATABASE', None, None, name)
+        if exists and match.group('if_not_exists'):
+            return _status(f"{name} already exists, statement succeeded.")
+        if exists and not match.group('replace'):
+            raise ProgrammingError(f"SQL compilation error:\nObject '{name}' already exists.", errno=2002,
+                                   sqlstate='42710')
+        if exists:
+            self._drop_database(name, purge=True)
+        self._add_object('DATABASE', None, None, name)
+        for schema in ('PUBLIC', 'INFORMATION_SCHEMA'):
+            self._add_object('SCHEMA', name, None, schema)
+        self.database, self.schema = name, 'PUBLIC'
+        return _status(f"Database {name} successfully created.")
+
+    def _create_schema(self, match, params):
+        database, name = self._resolve_schema(match.group('name'))
+        if not self._find('DATABASE', None, None, database):
+            raise _not_found('Database', database)
+        exists = self._find('SCHEMA', database, None, name)
+        if exists and match.group('if_not_exists'):
+            return _status(f"{name} already exists, statement succeeded.")
+        if exists and not match.group('replace'):
+            raise ProgrammingError(f"SQL compilation error:\nObject '{name}' already exists.", errno=2002,
+                                   sqlstate='42710')
+        if exists:
+            self._drop_schema(database, name, purge=True)
+        self._add_object('SCHEMA', database, None, name)
+        self.database, self.schema = database, name
+        return _status(f"Schema {name} successfully created.")
+
+    def _create_relation(self, match, params):
+        kind = 'VIEW' if match.group('kind').upper().endswith('VIEW') else 'TABLE'
+        database, schema, name = self._resolve(match.group('name'))
+        if not self._find('SCHEMA', database, None, schema):
+            raise _not_found('Schema', f"{database}.{schema}")
+        existing = self._find('TABLE', database, schema, name) or self._find('VIEW', database, schema, name)
+        if existing and match.group('if_not_exists'):
+            return _status(f"{name} already exists, statement succeeded.")
+        if existing and not match.group('replace'):
+            raise ProgrammingError(f"SQL compilation error:\nObject '{name}' already exists.", errno=2002,
+                                   sqlstate='42710')
+        physical = _physical(database, schema, name)
+        body = match.group('body').strip()
+        if existing:
+            self._db.execute(f"DROP {existing['kind']} {physical}")
+            self._remove_object(existing['kind'], database, schema, name)
+        # Load metadata belongs to the table, so a replaced table reloads every file
+        self._db.execute("DELETE FROM _sf_load_history WHERE table_name = ?", (f"{database}.{schema}.{name}",))
+        try:
+            if kind == 'VIEW':
+                select = re.sub(r'^AS\s+', '', body, flags=re.I)
+                self._db.execute(f"CREATE VIEW {physical} AS {self._translate(select)}")
+                try:
+                    # SQLite binds view bodies lazily; Snowflake validates them at creation
+                    self._db.execute(f"SELECT * FROM {physical} LIMIT 0")
+                except sqlite3.Error:
+                    self._db.execute(f"DROP VIEW {physical}")
+                    raise
+            elif re.match(r'AS\s', body, re.I):
+                self._db.execute(f"CREATE TABLE {physical} AS {self._translate(body[2:].strip())}")
+            elif re.match(r'LIKE\s', body, re.I):
+                _, src_db, src_schema, src_name = self._relation(body[4:].strip())
+                columns = self._table_columns(src_db, src_schema, src_name)
+                column_sql = ', '.join(f'"{col}" {declared}' for col, declared in columns)
+                self._db.execute(f"CREATE TABLE {physical} ({column_sql})")
+            else:
+                self._db.execute(f"CREATE TABLE {physical} {self._table_body(body)}")
+        except sqlite3.Error as e:
+            raise self._sql_error(e, match.group(0))
+        properties = {'materialized': bool(match.group('materialized')), 'text': match.group(0)}
+        self._add_object(kind, database, schema, name, properties)
+        return _status(f"{'View' if kind == 'VIEW' else 'Table'} {name} successfully created.")
+
+    @staticmethod
+    def _table_body(body):
+        """
+        Column list of a CREATE TABLE, with Snowflake column names upper-cased
+        """
+        inner = body[body.index('(') + 1:body.rindex(')')]
+        columns = []
+        depth = 0
+        current = ''
+        for ch in inner:
+            if ch == ',' and depth == 0:
+                columns.append(current)
+                current = ''
+                continue
+            depth += ch == '('
+            depth -= ch == ')'
+            current += ch
+        columns.append(current)
+        definitions = []
+        for column in columns:
+            column = column.strip()
+            if not column:
+                continue
+            name, _, rest = column.partition(' ')
+            definitions.append(f'"{_ident(name)}" {rest.strip()}')
+        return '(' + ', '.join(definitions) + ')'
+
+    def _create_stage(self, match, params):
+        database, schema, name = self._resolve(match.group('name'), 'CREATE STAGE')
+        existing = self._find('STAGE', database, schema, name)
+        if existing and match.group('if_not_exists'):
+            return _status(f"{name} already exists, statement succeeded.")
+        if existing and not match.group('replace'):
+            raise ProgrammingError(f"SQL compilation error:\nObject '{name}' already exists.", errno=2002,
+                                   sqlstate='42710')
+        if existing:
+            self._remove_object('STAGE', database, schema, name)
+        options = _parse_options(match.group('options') or '')
+        self._add_object('STAGE', database, schema, name, {
+            'url': options.get('URL', ''),
+            'file_format': options.get('FILE_FORMAT', ''),
+        })
+        return _status(f"Stage area {name} successfully created.")
+
+    def _create_file_format(self, match, params):
+        database, schema, name = self._resolve(match.group('name'), 'CREATE FILE FORMAT')
+        existing = self._find('FILE_FORMAT', database, schema, name)
+        if existing and match.group('if_not_exists'):
+            return _status(f"{name} already exists, statement succeeded.")
+        if existing and not match.group('replace'):
+            raise ProgrammingError(f"SQL compilation error:\nObject '{name}' already exists.", errno=2002,
+                                   sqlstate='42710')
+        if existing:
+            self._remove_object('FILE_FORMAT', database, schema, name)
+        options = _parse_options(match.group('options') or '')
+        self._add_object('FILE_FORMAT', database, schema, name, options)
+        return _status(f"File format {name} successfully created.")
+
+    def _create_warehouse(self, match, params):
+        name = _ident(match.group('name'))
+        existing = self._find('WAREHOUSE', None, None, name)
+        if existing and match.group('if_not_exists'):
+            return _status(f"{name} already exists, statement succeeded.")
+        if existing and not match.group('replace'):
+            raise ProgrammingError(f"SQL compilation error:\nObject '{name}' already exists.", errno=2002,
+                                   sqlstate='42710')
+        if existing:
+            self._remove_object('WAREHOUSE', None, None, name)
+        options = _parse_options(match.group('options') or '')
+        self._add_object('WAREHOUSE', None, None, name, {
+            'size': WAREHOUSE_SIZES.get(options.get('WAREHOUSE_SIZE', 'XSMALL').upper(), 'X-Small'),
+            'auto_suspend': int(options.get('AUTO_SUSPEND', 600)),
+            'auto_resume': options.get('AUTO_RESUME', 'true').lower(),
+            'state': 'STARTED',
+        })
+        # Creating a warehouse makes it the current one, as in Snowflake
+        self.warehouse = name
+        return _status(f"Warehouse {name} successfully created.")
+
+    def _alter_warehouse(self, match, params):
+        name = _ident(match.group('name'))
+        row = self._find('WAREHOUSE', None, None, name)
+        if not row:
+            raise _not_found('Warehouse', name)
+        properties = json.loads(row['properties'])
+        action = match.group('action').strip()
+        if re.match(r'SUSPEND\b', action, re.I):
+            properties['state'] = 'SUSPENDED'
+        elif re.match(r'RESUME\b', action, re.I):
+            properties['state'] = 'STARTED'
+        else:
+            options = _parse_options(action)
+            if 'WAREHOUSE_SIZE' in options:
+                properties['size'] = WAREHOUSE_SIZES.get(options['WAREHOUSE_SIZE'].upper(), options['WAREHOUSE_SIZE'])
+            if 'AUTO_SUSPEND' in options:
+                properties['auto_suspend'] = int(options['AUTO_SUSPEND'])
+            if 'AUTO_RESUME' in options:
+                properties['auto_resume'] = options['AUTO_RESUME'].lower()
+        self._db.execute("UPDATE _sf_objects SET properties = ? WHERE rowid = ?", (json.dumps(properties), row['rowid']))
+        return _status('Statement executed successfully.')
+
+    def _alter_session(self, match, params):
+        options = _parse_options(match.group('options'))
+        if match.group('verb').upper() == 'SET':
+            self.session_parameters.update(options)
+        else:
+            for key in re.findall(r'\w+', match.group('options')):
+                self.session_parameters.pop(key.upper(), None)
+        return _status('Statement executed successfully.')
+
+    def _create_pipe(self, match, params):
+        database, schema, name = self._resolve(match.group('name'), 'CREATE PIPE')
+        existing = self._find('PIPE', database, schema, name)
+        if existing and match.group('if_not_exists'):
+            return _status(f"{name} already exists, statement succeeded.")
+        if existing and not match.group('replace'):
+            raise ProgrammingError(f"SQL compilation error:\nObject '{name}' already exists.", errno=2002,
+                                   sqlstate='42710')
+        if existing:
+            self._remove_object('PIPE', database, schema, name)
+        # Pipes are recorded but never triggered: there are no bucket notifications offline
+        self._add_object('PIPE', database, schema, name, {
+            'definition': re.sub(r'\s+', ' ', match.group('definition').strip()),
+            'notification_channel': None,
+            'paused': False,
+        })
+        return _status(f"Pipe {name} successfully created.")
+
+    def _alter_pipe(self, match, params):
+        database, schema, name = self._resolve(match.group('name'), 'ALTER PIPE')
+        row = self._find('PIPE', database, schema, name)
+        if not row:
+            raise _not_found('Pipe', f"{database}.{schema}.{name}")
+        properties = json.loads(row['properties'])
+        options = _parse_options(match.group('action'))
+        if 'PIPE_EXECUTION_PAUSED' in options:
+            properties['paused'] = options['PIPE_EXECUTION_PAUSED'].upper() == 'TRUE'
+        self._db.execute("UPDATE _sf_objects SET properties = ? WHERE rowid = ?", (json.dumps(properties), row['rowid']))
+        return _status('Statement executed successfully.')
+
+    def _create_integration(self, match, params):
+        name = _ident(match.group('name'))
+        existing = self._find('INTEGRATION', None, None, name)
+        if existing and match.group('if_not_exists'):
+            return _status(f"{name} already exists, statement succeeded.")
+        if existing and not match.group('replace'):
+            raise ProgrammingError(f"SQL compilation error:\nObject '{name}' already exists.", errno=2002,
+                                   sqlstate='42710')
+        if existing:
+            self._remove_object('INTEGRATION', None, None, name)
+        options = _parse_options(match.group('options') or '')
+        options.setdefault('STORAGE_AWS_IAM_USER_ARN', 'arn:aws:iam::000000000000:user/offline')
+        options.setdefault('STORAGE_AWS_EXTERNAL_ID', f"OFFLINE_SFCRole=0_{hashlib.md5(name.encode()).hexdigest()[:20]}")
+        self._add_object('INTEGRATION', None, None, name, options)
+        return _status(f"Integration {name} successfully created.")
+
+    def _drop_database(self, name, purge=False):
+        stamp = str(time.time_ns())
+        for row in self._objects('TABLE', name) + self._objects('VIEW', name):
+            self._drop_relation_physical(row['database_name'], row['schema_name'], row['name'], stamp, purge)
+        if purge:
+            self._db.execute("DELETE FROM _sf_objects WHERE (database_name = ? OR (kind = 'DATABASE' AND name = ?)) "
+                             "AND dropped_on IS NULL", (name, name))
+        else:
+            self._db.execute("UPDATE _sf_objects SET dropped_on = ? WHERE (database_name = ? OR "
+                             "(kind = 'DATABASE' AND name = ?)) AND dropped_on IS NULL", (stamp, name, name))
+        if self.database == name:
+            self.database = self.schema = None
+
+    def _drop_schema(self, database, name, purge=False):
+        stamp = str(time.time_ns())
+        for row in self._objects('TABLE', database, name) + self._objects('VIEW', database, name):
+            self._drop_relation_physical(database, name, row['name'], stamp, purge)
+        if purge:
+            self._db.execute("DELETE FROM _sf_objects WHERE database_name = ? AND (schema_name = ? OR "
+                             "(kind = 'SCHEMA' AND name = ?)) AND dropped_on IS NULL", (database, name, name))
+        else:
+            self._db.execute("UPDATE _sf_objects SET dropped_on = ? WHERE database_name = ? AND (schema_name = ? OR "
+                             "(kind = 'SCHEMA' AND name = ?)) AND dropped_on IS NULL", (stamp, database, name, name))
+        if self.database == database and self.schema == name:
+            self.schema = None
+
+    def _drop_relation_physical(self, database, schema, name, stamp, purge):
+        physical = _physical(database, schema, name)
+        kind = self._db.execute("SELECT type FROM sqlite_master WHERE name = ?",
+                                (f"{database}.{schema}.{name}",)).fetchone()
+        if kind is None:
+            return
+        if purge or kind[0] == 'view':
+            # Views are cheap to recreate and cannot be renamed, so they are not kept for UNDROP
+            self._db.execute(f"DROP {kind[0].upper()} {physical}")
+            self._remove_object('VIEW', database, schema, name)
+        else:
+            self._db.execute(f"ALTER TABLE {physical} RENAME TO {_dropped_physical(database, schema, name, stamp)}")
+
+    def _drop(self, match, params):
+        kind = re.sub(r'\s+', ' ', match.group('kind').upper()).replace('MATERIALIZED ', '')
+        name = match.group('name')
+        if_exists = bool(match.group('if_exists'))
+        if kind == 'DATABASE':
+            target = _ident(name)
+            if not self._find('DATABASE', None, None, target):
+                if if_exists:
+                    return _status(f"Drop statement executed successfully ({target} already dropped).")
+                raise _not_found('Database', target)
+            self._drop_database(target)
+            return _status(f"{target} successfully dropped.")
+        if kind == 'SCHEMA':
+            database, target = self._resolve_schema(name)
+            if not self._find('SCHEMA', database, None, target):
+                if if_exists:
+                    return _status(f"Drop statement executed successfully ({target} already dropped).")
+                raise _not_found('Schema', target)
+            self._drop_schema(database, target)
+            return _status(f"{target} successfully dropped.")
+        if kind == 'WAREHOUSE':
+            target = _ident(name)
+            if not self._find('WAREHOUSE', None, None, target):
+                if if_exists:
+                    return _status(f"Drop statement executed successfully ({target} already dropped).")
+                raise _not_found('Warehouse', target)
+            self._remove_object('WAREHOUSE', None, None, target)
+            if self.warehouse == target:
+                self.warehouse = None
+            return _status(f"{target} successfully dropped.")
+
+        object_kind = {'FILE FORMAT': 'FILE_FORMAT'}.get(kind, kind)
+        database, schema, target = self._resolve(name, f"DROP {kind}")
+        row = self._find(object_kind, database, schema, target)
+        if not row:
+            if if_exists:
+                return _status(f"Drop statement executed successfully ({target} already dropped).")
+            raise _not_found(kind.title(), f"{database}.{schema}.{target}")
+        stamp = str(time.time_ns())
+        if object_kind in ('TABLE', 'VIEW'):
+            self._drop_relation_physical(database, schema, target, stamp, purge=object_kind == 'VIEW')
+        self._db.execute("UPDATE _sf_objects SET dropped_on = ? WHERE rowid = ?", (stamp, row['rowid']))
+        return _status(f"{target} successfully dropped.")
+
+    def _undrop(self, match, params):
+        kind = match.group('kind').upper()
+        name = match.group('name')
+        if kind == 'DATABASE':
+            database = _ident(name)
+            row = self._find('DATABASE', None, None, database, include_dropped=True)
+            if not row or row['dropped_on'] is None:
+                raise _not_found('Database', database)
+            stamp = row['dropped_on']
+            restored = self._db.execute("SELECT * FROM _sf_objects WHERE dropped_on = ? AND kind = 'TABLE'",
+                                        (stamp,)).fetchall()
+            self._db.execute("UPDATE _sf_objects SET dropped_on = NULL WHERE dropped_on = ?", (stamp,))
+            for table in restored:
+                self._restore_table(table['database_name'], table['schema_name'], table['name'], stamp)
+            return _status(f"Database {database} successfully restored.")
+        if kind == 'SCHEMA':
+            database, schema = self._resolve_schema(name)
+            row = self._find('SCHEMA', database, None, schema, include_dropped=True)
+            if not row or row['dropped_on'] is None:
+                raise _not_found('Schema', schema)
+            stamp = row['dropped_on']
+            restored = self._db.execute("SELECT * FROM _sf_objects WHERE dropped_on = ? AND kind = 'TABLE'",
+                                        (stamp,)).fetchall()
+            self._db.execute("UPDATE _sf_objects SET dropped_on = NULL WHERE dropped_on = ?", (stamp,))
+            for table in restored:
+                self._restore_table(table['database_name'], table['schema_name'], table['name'], stamp)
+            return _status(f"Schema {schema} successfully restored.")
+        database, schema, table = self._resolve(name, 'UNDROP TABLE')
+        row = self._find('TABLE', database, schema, table, include_dropped=True)
+        if not row or row['dropped_on'] is None:
+            raise _not_found('Table', table)
+        if self._find('TABLE', database, schema, table):
+            raise ProgrammingError(f"Object '{table}' already exists.", errno=2002, sqlstate='42710')
+        self._restore_table(database, schema, table, row['dropped_on'])
+        self._db.execute("UPDATE _sf_objects SET dropped_on = NULL WHERE rowid = ?", (row['rowid'],))
+        return _status(f"Table {table} successfully restored.")
+
+    def _restore_table(self, database, schema, name, stamp):
+        self._db.execute(f"ALTER TABLE {_dropped_physical(database, schema, name, stamp)} "
+                         f"RENAME TO {_physical(database, schema, name)}")
+
+    def _show(self, match, params):
+        kind = re.sub(r'\s+', ' ', match.group('kind').upper())
+        kind = {'TERSE TABLES': 'TABLES', 'MATERIALIZED VIEWS': 'VIEWS', 'USER STAGES': 'STAGES'}.get(kind, kind)
+        like = match.group('like')
+        scope = (match.group('scope') or '').strip()
+        columns = SHOW_COLUMNS.get(kind)
+        if columns is None:
+            return _Result(['name'], [])
+
+        database = schema = None
+        scope_match = re.match(r'(ACCOUNT|DATABASE|SCHEMA)\s*(.*)', scope, re.I)
+        if scope_match:
+            scope_kind, scope_name = scope_match.group(1).upper(), scope_match.group(2).strip()
+            if scope_kind == 'DATABASE':
+                database = _ident(scope_name) if scope_name else self.database
+            elif scope_kind == 'SCHEMA':
+                database, schema = self._resolve_schema(scope_name) if scope_name else (self.database, self.schema)
+        elif scope:
+            parts = _split_name(scope)
+            database, schema = (parts[0], parts[1]) if len(parts) == 2 else (self.database, parts[0])
+        elif kind == 'SCHEMAS':
+            database = self.database
+        elif kind in ('TABLES', 'VIEWS', 'STAGES', 'FILE FORMATS', 'PIPES'):
+            database, schema = self.database, self.schema
+
+        rows = []
+        if kind == 'DATABASES':
+            for obj in self._objects('DATABASE'):
+                rows.append((obj['created_on'], obj['name'], 'N', 'Y' if obj['name'] == self.database else 'N', '',
+                             self.role, '', '', '1', 'STANDARD'))
+        elif kind == 'SCHEMAS':
+            for obj in self._objects('SCHEMA', database):
+                rows.append((obj['created_on'], obj['name'], 'N',
+                             'Y' if (obj['database_name'], obj['name']) == (self.database, self.schema) else 'N',
+                             obj['database_name'], self.role, '', '', '1'))
+        elif kind == 'TABLES':
+            for obj in self._objects('TABLE', database, schema):
+                row_count, byte_count = self._table_size(obj['database_name'], obj['schema_name'], obj['name'])
+                rows.append((obj['created_on'], obj['name'], obj['database_name'], obj['schema_name'], 'TABLE', '',
+                             '', row_count, byte_count, self.role, '1'))
+        elif kind == 'VIEWS':
+            for obj in self._objects('VIEW', database, schema):
+                properties = json.loads(obj['properties'])
+                if match.group('kind').upper().startswith('MATERIALIZED') and not properties.get('materialized'):
+                    continue
+                rows.append((obj['created_on'], obj['name'], '', obj['database_name'], obj['schema_name'], self.role,
+                             '', properties.get('text', ''), 'false', str(properties.get('materialized', False)).lower()))
+        elif kind == 'STAGES':
+            for obj in self._objects('STAGE', database, schema):
+                properties = json.loads(obj['properties'])
+                rows.append((obj['created_on'], obj['name'], obj['database_name'], obj['schema_name'],
+                             properties.get('url', ''), 'N', 'N', self.role, '', None,
+                             'EXTERNAL' if properties.get('url') else 'INTERNAL'))
+        elif kind == 'FILE FORMATS':
+            for obj in self._objects('FILE_FORMAT', database, schema):
+                properties = json.loads(obj['properties'])
+                rows.append((obj['created_on'], obj['name'], obj['database_name'], obj['schema_name'],
+                             properties.get('TYPE', 'CSV').upper(), self.role, '', json.dumps(properties)))
+        elif kind == 'PIPES':
+            for obj in self._objects('PIPE', database, schema):
+                properties = json.loads(obj['properties'])
+                rows.append((obj['created_on'], obj['name'], obj['database_name'], obj['schema_name'],
+                             properties['definition'], self.role, properties['notification_channel'], ''))
+        elif kind == 'WAREHOUSES':
+            for obj in self._objects('WAREHOUSE'):
+                properties = json.loads(obj['properties'])
+                rows.append((obj['name'], properties['state'], 'STANDARD', properties['size'], 1, 1,
+                             1 if properties['state'] == 'STARTED' else 0, 0, 0, 'N',
+                             'Y' if obj['name'] == self.warehouse else 'N', properties['auto_suspend'],
+                             properties['auto_resume'], '100', '0', '0', '0', obj['created_on'], obj['created_on'],
+                             obj['created_on'], self.role, ''))
+
+        if like:
+            pattern = like.replace('%', '*').replace('_', '?').upper()
+            name_index = columns.index('name')
+            rows = [row for row in rows if fnmatch.fnmatchcase(str(row[name_index]).upper(), pattern)]
+        return _Result(columns, rows)
+
+    def _table_size(self, database, schema, name):
+        physical = _physical(database, schema, name)
+        row_count = self._db.execute(f"SELECT COUNT(*) FROM {physical}").fetchone()[0]
+        if not row_count:
+            return 0, 0
+        columns = [f'LENGTH(CAST("{col}" AS TEXT))' for col, _ in self._table_columns(database, schema, name)]
+        data_size = self._db.execute(f"SELECT SUM({' + '.join(columns) or '0'}) FROM {physical}").fetchone()[0] or 0
+        # Micro-partitions are compressed and allocated in 512-byte blocks on top of a 1 KB header
+        return row_count, 1024 + 512 * ((data_size // 4 + 511) // 512)
+
+    def _describe(self, match, params):
+        kind = (match.group('kind') or 'TABLE').upper()
+        name = match.group('name')
+        if kind == 'DATABASE':
+            database = _ident(name)
+            if not self._find('DATABASE', None, None, database):
+                raise _not_found('Database', database)
+            rows = [(obj['created_on'], obj['name'], 'SCHEMA') for obj in self._objects('SCHEMA', database)]
+            return _Result(['created_on', 'name', 'kind'], rows)
+        if kind == 'PIPE':
+            database, schema, pipe = self._resolve(name, 'DESCRIBE PIPE')
+            row = self._find('PIPE', database, schema, pipe)
+            if not row:
+                raise _not_found('Pipe', f"{database}.{schema}.{pipe}")
+            properties = json.loads(row['properties'])
+            return _Result(SHOW_COLUMNS['PIPES'], [(row['created_on'], pipe, database, schema,
+                                                    properties['definition'], self.role,
+                                                    properties['notification_channel'], '')])
+        if kind == 'INTEGRATION':
+            integration = _ident(name)
+            row = self._find('INTEGRATION', None, None, integration)
+            if not row:
+                raise _not_found('Integration', integration)
+            rows = [(key, 'String', value, '') for key, value in json.loads(row['properties']).items()]
+            return _Result(['property', 'property_type', 'property_value', 'property_default'], rows)
+        if kind == 'WAREHOUSE':
+            warehouse = _ident(name)
+            row = self._find('WAREHOUSE', None, None, warehouse)
+            if not row:
+                raise _not_found('Warehouse', warehouse)
+            return _Result(['created_on', 'name', 'kind'], [(row['created_on'], warehouse, 'WAREHOUSE')])
+        if kind == 'STAGE':
+            database, schema, stage = self._resolve(name, 'DESCRIBE STAGE')
+            row = self._find('STAGE', database, schema, stage)
+            if not row:
+                raise _not_found('Stage', stage)
+            properties = json.loads(row['properties'])
+            rows = [('STAGE_LOCATION', 'URL', 'String', properties.get('url', ''), '')]
+            rows += [('STAGE_FILE_FORMAT', key, 'String', value, '')
+                     for key, value in self._stage_format(database, schema, properties).items()]
+            return _Result(['parent_property', 'property', 'property_type', 'property_value', 'property_default'],
+                           rows)
+        if kind in ('SCHEMA',):
+            database, schema = self._resolve_schema(name)
+            if not self._find('SCHEMA', database, None, schema):
+                raise _not_found('Schema', schema)
+            rows = [(obj['created_on'], obj['name'], 'TABLE') for obj in self._objects('TABLE', database, schema)]
+            rows += [(obj['created_on'], obj['name'], 'VIEW') for obj in self._objects('VIEW', database, schema)]
+            return _Result(['created_on', 'name', 'kind'], rows)
+        if kind not in ('TABLE', 'VIEW', 'MATERIALIZED VIEW'):
+            raise ProgrammingError(f"SQL compilation error:\nDESCRIBE {kind} is not supported by the offline backend.",
+                                   errno=1003, sqlstate='42000')
+        _, database, schema, obj = self._relation(name)
+        rows = []
+        not_null = self._not_null_columns(database, schema, obj)
+        for column, declared in self._table_columns(database, schema, obj):
+            rows.append((column.upper(), _normalise_type(declared), 'COLUMN', 'N' if column in not_null else 'Y',
+                         None, 'N', 'N', None, None, None, None))
+        return _Result(DESCRIBE_COLUMNS, rows)
+
+    # -- stages ------------------------------------------------------------
+
+    def _stage_format(self, database, schema, properties):
+        def lookup(format_name):
+            fmt_db, fmt_schema, fmt_name = (_split_name(format_name) + [None] * 3)[:3] \
+                if len(_split_name(format_name)) == 3 else (database, schema, _split_name(format_name)[-1])
+            row = self._find('FILE_FORMAT', fmt_db, fmt_schema, fmt_name)
+            return json.loads(row['properties']) if row else {}
+        return _format_options(properties.get('file_format', ''), lookup)
+
+    def _stage_location(self, reference):
+        """
+        Resolve '@stage/path' to (properties, local directory, display prefix, db, schema)
+        """
+        reference = reference.lstrip('@')
+        name, _, path = reference.partition('/')
+        database, schema, stage = self._resolve(name, 'LIST')
+        row = self._find('STAGE', database, schema, stage)
+        if not row:
+            raise _not_found('Stage', f"{database}.{schema}.{stage}")
+        properties = json.loads(row['properties'])
+        url = properties.get('url', '')
+        if url:
+            for alias, target in STAGE_ALIASES.items():
+                if url.startswith(alias):
+                    local_url = target + url[len(alias):]
+                    break
+            else:
+                local_url = url
+            bucket_path = re.sub(r'^\w+://', '', local_url).rstrip('/')
+            root = os.path.join(STAGE_ROOT, *bucket_path.split('/'))
+            display = url.rstrip('/') + '/'
+        else:
+            root = os.path.join(INTERNAL_STAGE_ROOT, database, schema, stage)
+            display = stage.lower() + '/'
+        return properties, root, path, display, database, schema
+
+    def _stage_files(self, reference, pattern=None):
+        properties, root, path, display, database, schema = self._stage_location(reference)
+        base = os.path.join(root, *[p for p in path.split('/') if p])
+        files = []
+        if os.path.isfile(base):
+            candidates = [base]
+        else:
+            candidates = []
+            prefix_dir, prefix_name = (base, '') if os.path.isdir(base) else os.path.split(base)
+            if os.path.isdir(prefix_dir):
+                for dirpath, _, filenames in os.walk(prefix_dir):
+                    for filename in sorted(filenames):
+                        full = os.path.join(dirpath, filename)
+                        if os.path.relpath(full, prefix_dir).startswith(prefix_name):
+                            candidates.append(full)
+        for full in sorted(candidates):
+            relative = os.path.relpath(full, root).replace(os.sep, '/')
+            display_name = display + relative
+            if pattern and not re.fullmatch(pattern, display_name) and not re.fullmatch(pattern, relative):
+                continue
+            files.append((full, relative, display_name))
+        return properties, files, database, schema
+
+    def _stage_table(self, reference, options_text):
+        """
+        Materialise the files under a stage path as a temporary table with
+        positional columns $1..$n, so SELECT ... FROM @stage can be queried
+        """
+        options = _parse_options(options_text.replace('=>', '=').strip('() '))
+        properties, files, stage_db, stage_schema = self._stage_files(reference, options.get('PATTERN'))
+        file_format = self._stage_format(stage_db, stage_schema, properties)
+        if options.get('FILE_FORMAT'):
+            file_format = self._stage_format(stage_db, stage_schema, {'file_format': options['FILE_FORMAT']})
+        delimiter = file_format.get('FIELD_DELIMITER', ',')
+        skip_header = int(file_format.get('SKIP_HEADER', 0))
+        rows = []
+        for full, _, display_name in files:
+            with _open_text(full) as f:
+                for line_number, record in enumerate(csv.reader(f, delimiter=delimiter), 1):
+                    if line_number > skip_header:
+                        rows.append((display_name, line_number, record))
+        width = max((len(record) for _, _, record in rows), default=1)
+        name = 'temp."_stage_' + hashlib.md5(f"{reference}{options_text}".encode('utf-8')).hexdigest()[:12] + '"'
+        columns = ', '.join(['METADATA$FILENAME', 'METADATA$FILE_ROW_NUMBER'] + [f'"${i}"' for i in range(1, width + 1)])
+        self._db.execute(f"DROP TABLE IF EXISTS {name}")
+        self._db.execute(f"CREATE TABLE {name} ({columns})")
+        self._db.executemany(
+            f"INSERT INTO {name} VALUES ({', '.join('?' for _ in range(width + 2))})",
+            [(display_name, line_number, *(record + [None] * width)[:width]) for display_name, line_number, record in rows]
+        )
+        return name
+
+    def _truncate(self, match, params):
+        database, schema, name = self._resolve(match.group('name'))
+        if not self._find('TABLE', database, schema, name):
+            if match.group('if_exists'):
+                return _status('Statement executed successfully.')
+            raise _not_found('Table', f"{database}.{schema}.{name}")
+        self._db.execute(f"DELETE FROM {_physical(database, schema, name)}")
+        # As in Snowflake, truncating a table also forgets which files were loaded into it
+        self._db.execute("DELETE FROM _sf_load_history WHERE table_name = ?", (f"{database}.{schema}.{name}",))
+        return _status('Statement executed successfully.')
+
+    def _list(self, match, params):
+        options = _parse_options(match.group('options') or '')
+        _, files, _, _ = self._stage_files(match.group('stage'), options.get('PATTERN'))
+        rows = []
+        for full, _, display_name in files:
+            stat = os.stat(full)
+            rows.append((display_name, stat.st_size, _md5(full), _http_date(stat.st_mtime)))
+        return _Result(LIST_COLUMNS, rows)
+
+    def _put(self, match, params):
+        options = _parse_options(match.group('options') or '')
+        properties, root, path, display, _, _ = self._stage_location(match.group('stage'))
+        if properties.get('url'):
+            raise ProgrammingError("SQL compilation error:\nPUT is only supported for internal stages.",
+                                   errno=2003, sqlstate='0A000')
+        pattern = match.group('source')
+        sources = sorted(f for f in glob.glob(os.path.expanduser(pattern)) if os.path.isfile(f))
+        if not sources:
+            raise ProgrammingError(f"File doesn't exist: ['{pattern}']", errno=253006)
+        auto_compress = options.get('AUTO_COMPRESS', 'TRUE').upper() == 'TRUE'
+        overwrite = options.get('OVERWRITE', 'FALSE').upper() == 'TRUE'
+        target_dir = os.path.join(root, *[p for p in path.split('/') if p])
+        os.makedirs(target_dir, exist_ok=True)
+        rows = []
+        for source in sources:
+            source_compression = PUT_COMPRESSIONS.get(os.path.splitext(source)[1].lower(), 'NONE')
+            compress = auto_compress and source_compression == 'NONE'
+            target = os.path.basename(source) + ('.gz' if compress else '')
+            target_path = os.path.join(target_dir, target)
+            status = 'SKIPPED' if os.path.exists(target_path) and not overwrite else 'UPLOADED'
+            if status == 'UPLOADED':
+                # Streamed in blocks, so a large file never sits in memory whole
+                with open(source, 'rb') as src, \
+                        (gzip.open(target_path, 'wb') if compress else open(target_path, 'wb')) as dst:
+                    shutil.copyfileobj(src, dst, 1024 * 1024)
+            rows.append((os.path.basename(source), target, os.path.getsize(source), os.path.getsize(target_path),
+                         source_compression, 'GZIP' if compress else source_compression, status, ''))
+        return _Result(PUT_COLUMNS, rows)
+
+    def _copy(self, match, params):
+        kind, database, schema, table = self._relation(match.group('table'))
+        if kind != 'TABLE':
+            raise ProgrammingError(f"SQL compilation error:\nCOPY INTO target '{table}' is not a table.", errno=2003)
+        options = _parse_options(match.group('options') or '')
+        properties, files, stage_db, stage_schema = self._stage_files(match.group('stage'), options.get('PATTERN'))
+        if 'FILES' in options:
+            wanted = {name.strip().strip("'") for name in options['FILES'].strip('()').split(',')}
+            prefix = match.group('stage').partition('/')[2].strip('/')
+            files = [f for f in files if f[1] in wanted or f[1][len(prefix):].lstrip('/') in wanted
+                     or os.path.basename(f[1]) in wanted]
+        file_format = self._stage_format(stage_db, stage_schema, properties)
+        file_format.update(_format_options(options.get('FILE_FORMAT', ''), lambda name: self._stage_format(
+            stage_db, stage_schema, {'file_format': name})))
+        on_error = options.get('ON_ERROR', 'ABORT_STATEMENT').upper()
+        force = options.get('FORCE', 'FALSE').upper() == 'TRUE'
+        columns = self._table_columns(database, schema, table)
+        not_null = self._not_null_columns(database, schema, table)
+        physical = _physical(database, schema, table)
+        table_key = f"{database}.{schema}.{table}"
+
+        results = []
+        # One transaction for the whole COPY: in autocommit every inserted row would be its own, and an
+        # aborted COPY loads nothing, as in Snowflake. It takes the write lock up front: a deferred one
+        # that reads first cannot wait for a concurrent COPY's lock and fails with 'database is locked'.
+        nested = self._db.in_transaction
+        self._db.execute("SAVEPOINT copy_into" if nested else "BEGIN IMMEDIATE")
+        try:
+            for full, relative, display_name in files:
+                md5 = _md5(full)
+                if not force and self._db.execute(
+                        "SELECT 1 FROM _sf_load_history WHERE table_name = ? AND file_name = ? AND md5 = ?",
+                        (table_key, display_name, md5)).fetchone():
+                    continue
+                result = self._load_file(full, display_name, columns, not_null, physical, file_format, on_error)
+                results.append(result)
+                if result[3]:
+                    self._db.execute("INSERT INTO _sf_load_history VALUES (?, ?, ?, ?, ?)",
+                                     (table_key, display_name, md5, result[3], _now()))
+        except BaseException:
+            if nested:
+                self._db.execute("ROLLBACK TO copy_into")
+                self._db.execute("RELEASE copy_into")
+            else:
+                self._db.execute("ROLLBACK")
+            raise
+        self._db.execute("RELEASE copy_into" if nested else "COMMIT")
+        if not results:
+            return _status('Copy executed with 0 files processed.')
+        return _Result(COPY_COLUMNS, results)
+
+    def _load_file(self, path, display_name, columns, not_null, physical, file_format, on_error):
+        delimiter = file_format.get('FIELD_DELIMITER', ',')
+        skip_header = int(file_format.get('SKIP_HEADER', 0))
+        enclosed = file_format.get('FIELD_OPTIONALLY_ENCLOSED_BY', '"')
+        check_count = file_format.get('ERROR_ON_COLUMN_COUNT_MISMATCH', 'TRUE').upper() == 'TRUE'
+        rows, errors = [], []
+        parsed = 0
+        with _open_text(path) as f:
+            reader = csv.reader(f, delimiter=delimiter, quotechar=enclosed if enclosed not in ('', 'NONE') else '"')
+            for line_number, record in enumerate(reader, 1):
+                if line_number <= skip_header:
+                    continue
+                parsed += 1
+                if check_count and len(record) != len(columns):
+                    errors.append((f"Number of columns in file ({len(record)}) does not match that of the "
+                                   f"corresponding table ({len(columns)}), use file format option "
+                                   f"error_on_column_count_mismatch=false to ignore this error",
+                                   line_number, 1, None))
+                    continue
+                record = (record + [''] * len(columns))[:len(columns)]
+                try:
+                    row = tuple(_convert(value, declared) for value, (_, declared) in zip(record, columns))
+                except ValueError as e:
+                    column = next(name for value, (name, declared) in zip(record, columns)
+                                  if _safe_convert_fails(value, declared))
+                    errors.append((str(e), line_number, 1, f'"{physical.strip(chr(34))}"["{column}"]'))
+                    continue
+                column = next((name for value, (name, _) in zip(row, columns) if value is None and name in not_null),
+                              None)
+                if column is not None:
+                    errors.append(("NULL result in a non-nullable column", line_number, 1,
+                                   f'"{physical.strip(chr(34))}"["{column}"]'))
+                    continue
+                rows.append(row)
+
+        if errors and on_error == 'ABORT_STATEMENT':
+            message, line, character, _ = errors[0]
+            errno = 100080 if 'Number of columns' in message else 100072 if message.startswith('NULL') else 100038
+            raise ProgrammingError(f"{message}\n  File '{display_name}', line {line}, character {character}",
+                                   errno=errno, sqlstate='22000')
+        if errors and on_error.startswith('SKIP_FILE'):
+            rows = []
+        if rows:
+            placeholders = ', '.join('?' for _ in columns)
+            self._db.executemany(f"INSERT INTO {physical} VALUES ({placeholders})", rows)
+        status = 'LOADED' if not errors else ('LOAD_FAILED' if not rows else 'PARTIALLY_LOADED')
+        first = errors[0] if errors else (None, None, None, None)
+        error_limit = 1 if on_error != 'CONTINUE' else parsed
+        return (display_name, status, parsed, len(rows), error_limit, len(errors), first[0], first[1], first[2],
+                first[3])
+
+
+_CANCEL = re.compile(r"^SELECT\s+(?P<function>SYSTEM\$CANCEL_QUERY|SYSTEM\$CANCEL_ALL_QUERIES)\s*"
+                     r"\(\s*(?P<argument>\?|'[^']*'|\d+)\s*\)\s*$", re.I)
+
+
+def _cancel(match, params):
+    """
+    SYSTEM$CANCEL_QUERY(query_id) / SYSTEM$CANCEL_ALL_QUERIES(session_id)
+    """
+    function = match.group('function').upper()
+    argument = match.group('argument')
+    argument = str(list(params)[0]) if argument == '?' else argument.strip("'")
+    if function == 'SYSTEM$CANCEL_QUERY':
+        target = _RUNNING.get(argument)
+        if target is not None:
+            target._interrupt()
+        message = f"query [{argument}] terminated." if target is not None else \
+            "Identified SQL statement is not currently executing."
+    else:
+        session = _SESSIONS.get(int(argument)) if argument.isdigit() else None
+        running = [conn for conn in _RUNNING.values() if conn is session]
+        if running:
+            session._interrupt()
+        message = f"{len(running)} terminated."
+    return _Result([f"{function}({argument})"], [(message,)])
+
+
+def _safe_convert_fails(value, declared):
+    try:
+        _convert(value, declared)
+        return False
+    except ValueError:
+        return True
+
+
+_CREATE = r'^CREATE\s+(?P<replace>OR\s+REPLACE\s+)?(?:TRANSIENT\s+|TEMPORARY\s+|TEMP\s+|SECURE\s+)?'
+_IF_NOT_EXISTS = r'(?P<if_not_exists>IF\s+NOT\s+EXISTS\s+)?'
+_NAME = r'(?P<name>(?:"[^"]+"|[\w$]+)(?:\.(?:"[^"]+"|[\w$]+)){0,2})'
+
+_HANDLERS = [(re.compile(pattern, re.I | re.S), handler) for pattern, handler in [
+    (r'^USE\s+(?:(?P<kind>ROLE|WAREHOUSE|DATABASE|SCHEMA)\s+)?' + _NAME + r'\s*$', OfflineConnection._use),
+    (_CREATE + r'DATABASE\s+' + _IF_NOT_EXISTS + _NAME + r'.*$', OfflineConnection._create_database),
+    (_CREATE + r'SCHEMA\s+' + _IF_NOT_EXISTS + _NAME + r'.*$', OfflineConnection._create_schema),
+    (_CREATE + r'(?P<kind>(?P<materialized>MATERIALIZED\s+)?VIEW|TABLE)\s+' + _IF_NOT_EXISTS + _NAME +
+     r'\s*(?P<body>.*)$', OfflineConnection._create_relation),
+    (_CREATE + r'STAGE\s+' + _IF_NOT_EXISTS + _NAME + r'(?P<options>.*)$', OfflineConnection._create_stage),
+    (_CREATE + r'FILE\s+FORMAT\s+' + _IF_NOT_EXISTS + _NAME + r'(?P<options>.*)$',
+     OfflineConnection._create_file_format),
+    (_CREATE + r'WAREHOUSE\s+' + _IF_NOT_EXISTS + _NAME + r'(?P<options>.*)$', OfflineConnection._create_warehouse),
+    (r'^ALTER\s+WAREHOUSE\s+(?:IF\s+EXISTS\s+)?' + _NAME + r'\s+(?P<action>.*)$', OfflineConnection._alter_warehouse),
+    (_CREATE + r'PIPE\s+' + _IF_NOT_EXISTS + _NAME + r'.*?\bAS\s+(?P<definition>COPY\s.*)$',
+     OfflineConnection._create_pipe),
+    (r'^ALTER\s+PIPE\s+(?:IF\s+EXISTS\s+)?' + _NAME + r'\s+(?P<action>.*)$', OfflineConnection._alter_pipe),
+    (_CREATE + r'(?:STORAGE\s+)?INTEGRATION\s+' + _IF_NOT_EXISTS + _NAME + r'(?P<options>.*)$',
+     OfflineConnection._create_integration),
+    (r'^ALTER\s+SESSION\s+(?P<verb>SET|UNSET)\s+(?P<options>.*)$', OfflineConnection._alter_session),
+    (r'^DROP\s+(?P<kind>DATABASE|SCHEMA|TABLE|MATERIALIZED\s+VIEW|VIEW|STAGE|FILE\s+FORMAT|WAREHOUSE|PIPE)\s+'
+     r'(?P<if_exists>IF\s+EXISTS\s+)?' + _NAME + r'.*$', OfflineConnection._drop),
+    (r'^UNDROP\s+(?P<kind>DATABASE|SCHEMA|TABLE)\s+' + _NAME + r'\s*$', OfflineConnection._undrop),
+    (r'^SHOW\s+(?P<kind>TERSE\s+TABLES|MATERIALIZED\s+VIEWS|FILE\s+FORMATS|USER\s+STAGES|\w+)'
+     r"(?:\s+LIKE\s+'(?P<like>[^']*)')?(?:\s+IN\s+(?P<scope>.*))?\s*$", OfflineConnection._show),
+    (r'^DESC(?:RIBE)?\s+(?:(?P<kind>TABLE|MATERIALIZED\s+VIEW|VIEW|DATABASE|SCHEMA|STAGE|WAREHOUSE|INTEGRATION|'
+     r'FILE\s+FORMAT|PIPE)\s+)?' + _NAME + r'.*$', OfflineConnection._describe),
+    (r"^PUT\s+'?file://(?P<source>[^']+?)'?\s+(?P<stage>@\S+)(?P<options>.*)$", OfflineConnection._put),
+    (r'^TRUNCATE\s+(?:TABLE\s+)?(?P<if_exists>IF\s+EXISTS\s+)?' + _NAME + r'\s*$', OfflineConnection._truncate),
+    (r'^(?:LIST|LS)\s+(?P<stage>@\S+)(?P<options>.*)$', OfflineConnection._list),
+    (r'^COPY\s+INTO\s+(?P<table>\S+)\s+FROM\s+(?P<stage>@\S+)(?P<options>.*)$', OfflineConnection._copy),
+]]
+
+
+def _open_database():
+    """
+    Open the offline database file, creating and seeding it on first use
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(OFFLINE_DB)), exist_ok=True)
+    with _init_lock:
+        fresh = not os.path.exists(OFFLINE_DB)
+        db = sqlite3.connect(OFFLINE_DB, timeout=30, isolation_level=None, check_same_thread=False)
+        db.row_factory = sqlite3.Row
+        db.executescript(_CATALOG_SQL)
+        if fresh:
+            db.execute("INSERT INTO _sf_objects VALUES ('WAREHOUSE', NULL, NULL, 'COMPUTE_WH', ?, NULL, ?)",
+                       (_now(), json.dumps({'size': 'X-Small', 'auto_suspend': 600, 'auto_resume': 'true',
+                                            'state': 'STARTED'})))
+            _seed(db)
+    # Plain tuples for query results; the catalog helpers use sqlite3.Row explicitly
+    return _RowFactoryConnection(db)
+
+
+class _RowFactoryConnection:
+    """
+    Wraps the SQLite connection so catalog lookups get sqlite3.Row objects and
+    user queries get plain tuples
+    """
+
+    def __init__(self, db):
+        self._db = db
+
+    def execute(self, sql, params=()):
+        cursor = self._db.cursor()
+        if sql.lstrip().upper().startswith(('SELECT ROWID', 'SELECT NAME, DATABASE_NAME', 'SELECT * FROM _SF_')):
+            cursor.row_factory = sqlite3.Row
+        else:
+            cursor.row_factory = None
+        return cursor.execute(sql, params)
+
+    def __getattr__(self, name):
+        return getattr(self._db, name)
+
+
+def _seed(db):
+    """
+    Create the Tasty Bytes objects and load the fixture files
+    """
+    conn = OfflineConnection.__new__(OfflineConnection)
+    conn.params = {}
+    conn.user = conn.account = 'OFFLINE'
+    conn.role = 'ACCOUNTADMIN'
+    conn.warehouse = 'COMPUTE_WH'
+    conn.database = conn.schema = None
+    conn.session_parameters = {}
+    conn.session_id = 0
+    conn._deadline = conn._timeout = conn._interrupted = None
+    conn._closed = False
+    conn._async_results = {}
+    conn._history = []
+    conn._lock = threading.RLock()
+    conn._db = _RowFactoryConnection(db)
+    conn._register_functions()
+    for statement in SEED_SQL:
+        conn._run(statement)
+
+
+def connect(**params):
+    """
+    Open an offline connection; accepts (and mostly ignores) connector parameters
+    """
+    return OfflineConnection(**params)
+
+
+def reset():
+    """
+    Delete the offline database so the next connection re-seeds it
+    """
+    if os.path.exists(OFFLINE_DB):
+        os.remove(OFFLINE_DB)
+    if os.path.isdir(INTERNAL_STAGE_ROOT):
+        shutil.rmtree(INTERNAL_STAGE_ROOT)
+
+
+def run_suite(scripts=None, budget=None):
+    """
+    Run scripts against the offline backend and time each one. With a
+    budget (seconds), scripts share that much wall-clock time: each gets
+    what is left as its run budget, and the rest are skipped once it is spent.
+    """
+    import subprocess
+
+    from snowflake_timeouts import DEADLINE_ENV
+
+    if not scripts:
+        scripts = []
+        for name in sorted(os.listdir(SCRIPTS_DIR)):
+            if not name.endswith('.py') or name == os.path.basename(__file__):
+                continue
+            with open(os.path.join(SCRIPTS_DIR, name), encoding='utf-8') as f:
+                source = f.read()
+            if 'from snowflake_pool import' in source and '__name__ == "__main__"' in source:
+                scripts.append(name)
+
+    env = dict(os.environ, SNOWFLAKE_PROFILE='offline', PYTHONIOENCODING='utf-8')
+    deadline = time.time() + budget if budget else None
+    if deadline is not None:
+        env[DEADLINE_ENV] = repr(deadline)
+    print(f"{'Script':<42} {'Exit':>5} {'Errors':>7} {'Seconds':>8}")
+    print("-" * 66)
+    total = 0.0
+    skipped = []
+    for script in scripts:
+        remaining = deadline - time.time() if deadline is not None else None
+        if remaining is not None and remaining <= 0:
+            skipped.append(script)
+            continue
+        start = time.perf_counter()
+        try:
+            # The scripts stop sending statements at the deadline; the timeout catches any that hang regardless
+            result = subprocess.run([sys.executable, script], cwd=SCRIPTS_DIR, env=env, capture_output=True,
+                                    text=True, encoding='utf-8', errors='replace',
+                                    timeout=remaining + 5 if remaining is not None else None)
+            returncode, stdout = result.returncode, result.stdout
+        except subprocess.TimeoutExpired as e:
+            returncode, stdout = 'kill', e.stdout or ''
+            if isinstance(stdout, bytes):
+                stdout = stdout.decode('utf-8', 'replace')
+        elapsed = time.perf_counter() - start
+        total += elapsed
+        errors = sum(1 for line in stdout.splitlines() if 'Error' in line or '[ERROR]' in line)
+        print(f"{script:<42} {returncode:>5} {errors:>7} {elapsed:>8.2f}")
+    print("-" * 66)
+    print(f"{len(scripts) - len(skipped)} scripts in {total:.2f}s")
+    if skipped:
+        print(f"Run budget of {budget:.0f}s spent; skipped {len(skipped)}: {', '.join(skipped)}")
+
+
+if __name__ == "__main__":
+    if '--reset' in sys.argv:
+        reset()
+        print(f"Removed offline database {OFFLINE_DB}")
+    elif '--run-suite' in sys.argv:
+        budget = float(sys.argv[sys.argv.index('--budget') + 1]) if '--budget' in sys.argv else None
+        run_suite([arg for arg in sys.argv[1:] if arg.endswith('.py')], budget)
+    else:
+        print(__doc__)
@@ -0,0 +1,225 @@
+"""
+Bound parameters and reusable prepared statements
+Pooled connections use the qmark paramstyle, so values passed as parameters
+are bound server-side instead of being pasted into the SQL text. Every
+execution of a PreparedStatement sends the same text, which is what lets
+Snowflake reuse the compiled plan and, for identical bindings, the result
+cache. Lists, tuples and sets are bound as a JSON array; match a column
+against one with in_array():
+
+    lookup = PreparedStatement(conn, f"SELECT * FROM truck WHERE {in_array('primary_city')}")
+    rows = lookup.query([['Denver', 'Cairo']])
+
+Usage:
+    python snowflake_params.py [--source account_usage]   # compare reuse against literal SQL
+"""
+
+import json
+import re
+import sys
+import time
+import uuid
+from datetime import date, datetime
+
+from snowflake_executor import run_statement
+from snowflake_query_history import harvest
+from snowflake_query_tags import query_step
+
+PARAMSTYLE = 'qmark'
+
+_QMARK = re.compile(r"'(?:[^']|'')*'|\"[^\"]*\"|\?")
+
+
+def in_array(column):
+    """
+    Condition matching column against an array bound to the next '?'
+    """
+    return f"ARRAY_CONTAINS({column}::VARIANT, PARSE_JSON(?))"
+
+
+def bind_value(value):
+    """
+    Value as sent to the server: collections become a JSON array
+    """
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return json.dumps(sorted(value) if isinstance(value, (set, frozenset)) else list(value), default=str)
+    return value
+
+
+def bind_values(params):
+    return [bind_value(value) for value in params]
+
+
+def qmark_to_pyformat(sql):
+    """
+    Rewrite qmark placeholders for a connection opened with the connector's
+    default pyformat style, where values are interpolated client-side
+    """
+    return _QMARK.sub(lambda m: '%s' if m.group(0) == '?' else m.group(0).replace('%', '%%'), sql)
+
+
+def execute_bound(cursor, sql, params, connection=None):
+    """
+    cursor.execute() with qmark parameters, whatever paramstyle the connection uses
+    """
+    if getattr(connection, 'is_pyformat', False):
+        sql = qmark_to_pyformat(sql)
+    return cursor.execute(sql, bind_values(params))
+
+
+def sql_literal(value):
+    """
+    Value rendered into SQL text, the way the scripts used to build queries
+    """
+    if value is None:
+        return 'NULL'
+    if isinstance(value, bool):
+        return 'TRUE' if value else 'FALSE'
+    if isinstance(value, (int, float)):
+        return str(value)
+    if isinstance(value, (date, datetime)):
+        value = value.isoformat()
+    return "'" + str(bind_value(value)).replace("'", "''") + "'"
+
+
+def render_literals(sql, params):
+    """
+    Replace each qmark placeholder with the literal value
+    """
+    values = iter(params)
+    return _QMARK.sub(lambda m: sql_literal(next(values)) if m.group(0) == '?' else m.group(0), sql)
+
+
+class PreparedStatement:
+    """
+    One SQL text with qmark placeholders, executed for many parameter sets
+    """
+
+    def __init__(self, conn, sql):
+        self.conn = conn
+        self.sql = sql
+        self.executions = 0
+
+    def execute(self, params=()):
+        """
+        Run with one parameter set and return the cursor
+        """
+        self.executions += 1
+        return run_statement(self.conn, self.sql, bind_values(params))
+
+    def query(self, params=()):
+        """
+        Run with one parameter set and return all rows
+        """
+        cursor = self.execute(params)
+        try:
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+
+    def query_many(self, param_sets):
+        """
+        Yield (params, rows) for each parameter set, reusing the same statement text
+        """
+        for params in param_sets:
+            yield params, self.query(params)
+
+    def executemany(self, param_sets):
+        """
+        DML for many parameter sets in one call; the connector sends INSERTs as a single array bind
+        """
+        param_sets = [bind_values(params) for params in param_sets]
+        self.executions += len(param_sets)
+        cursor = self.conn.cursor()
+        try:
+            cursor.executemany(self.sql, param_sets)
+            return cursor.rowcount
+        finally:
+            cursor.close()
+
+
+def compare_with_literals(conn, sql, param_sets, source='information_schema'):
+    """
+    Run the same lookups with literal SQL text and with bound parameters,
+    each mode under its own query tag, and measure from QUERY_HISTORY (see
+    snowflake_query_history.py for the sources) what the server reused:
+    compilation time spent and statements answered from the result cache.
+    reuse_rate is the share of executions served from the result cache;
+    it is None when the history has no rows for the run yet.
+    """
+    run_id = uuid.uuid4().hex[:8]
+    report = {}
+    tags = {}
+    for mode in ('literal', 'bound'):
+        texts = set()
+        start = time.perf_counter()
+        with query_step(f"reuse_{mode}_{run_id}") as tag:
+            if mode == 'literal':
+                for params in param_sets:
+                    text = render_literals(sql, params)
+                    texts.add(text)
+                    cursor = run_statement(conn, text)
+                    cursor.fetchall()
+                    cursor.close()
+            else:
+                statement = PreparedStatement(conn, sql)
+                for params in param_sets:
+                    texts.add(statement.sql)
+                    statement.query(params)
+        tags[mode] = tag
+        report[mode] = {
+            'executions': len(param_sets),
+            'distinct_texts': len(texts),
+            'seconds': time.perf_counter() - start,
+        }
+
+    history = harvest(conn, list(tags.values()), source, hours=1)
+    for mode, tag in tags.items():
+        timing = history.get(tag)
+        report[mode].update({
+            'tag': tag,
+            'history_queries': timing.queries if timing else 0,
+            'compilation_ms': timing.compilation_ms if timing else None,
+            'result_reuses': timing.result_reuses if timing else None,
+            'reuse_rate': timing.result_reuses / timing.queries if timing else None,
+        })
+
+    print(f"{'Mode':<8} {'Executions':>10} {'Distinct SQL':>13} {'Compile ms':>11} {'Cache hits':>11} "
+          f"{'Reuse':>6} {'Time ms':>9}")
+    for mode, row in report.items():
+        if row['history_queries']:
+            measured = f"{row['compilation_ms']:>11} {row['result_reuses']:>11} {row['reuse_rate']:>6.0%}"
+        else:
+            measured = f"{'-':>11} {'-':>11} {'-':>6}"
+        print(f"{mode:<8} {row['executions']:>10} {row['distinct_texts']:>13} {measured} {row['seconds'] * 1000:>9.1f}")
+    if not any(row['history_queries'] for row in report.values()):
+        print(f"No history yet for tags {', '.join(tags.values())} in {source}")
+    return report
+
+
+if __name__ == "__main__":
+    from snowflake_config import TASTY_BYTES_CONFIG
+    from snowflake_pool import connect_to_snowflake
+
+    args = sys.argv[1:]
+    source = 'information_schema'
+    if '--source' in args:
+        source = args.pop(args.index('--source') + 1)
+        args.remove('--source')
+
+    conn = connect_to_snowflake(TASTY_BYTES_CONFIG, schema='public')
+    if conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT franchise_id, city FROM franchise")
+        franchises = cursor.fetchall()
+        cursor.close()
+        # Each lookup twice, as a dashboard refresh would
+        lookups = [(franchise_id,) for franchise_id, _ in franchises] * 2
+        print("Truck lookup by franchise_id:")
+        compare_with_literals(conn, "SELECT * FROM truck WHERE franchise_id = ?", lookups, source)
+        cities = sorted({city for _, city in franchises})
+        city_sets = [(cities[:i],) for i in range(1, len(cities) + 1)] * 2
+        print("\nTruck lookup by city list:")
+        compare_with_literals(conn, f"SELECT truck_id FROM truck WHERE {in_array('primary_city')}", city_sets,
+                              source)
+        conn.close()
@@ -1,74 +1,7 @@
-import snowflake.connector
-from snowflake.connector import DictCursor
-import pandas as pd
-import os
-from dotenv import load_dotenv
+from snowflake_executor import execute_sql_script
+from snowflake_pool import connect_to_snowflake
+from snowflake_schemas import create_table_sql
 
-# Load environment variables
-load_dotenv()
-
-def connect_to_snowflake():
-    """
-    Connect to Snowflake using password authentication
-    """
-    try:
-        # Get credentials from environment variables
-        user = os.getenv('SNOWFLAKE_USER')
-        password = os.getenv('SNOWFLAKE_PASSWORD')
-        account = os.getenv('SNOWFLAKE_ACCOUNT')
-        role = os.getenv('SNOWFLAKE_ROLE', 'ACCOUNTADMIN')
-        warehouse = os.getenv('SNOWFLAKE_WAREHOUSE', 'COMPUTE_WH')
-        database = os.getenv('SNOWFLAKE_DATABASE', 'SNOWFLAKE')
-        schema = os.getenv('SNOWFLAKE_SCHEMA', 'INFORMATION_SCHEMA')
-        
-        if not all([user, password, account]):
-            raise ValueError("Missing required environment variables. Please check your .env file.")
-        
-        conn = snowflake.connector.connect(
-            user=user,
-            password=password,
-            account=account,
-            role=role,
-            warehouse=warehouse,
-            database=database,
-            schema=schema
-        )
-        print("Successfully connected to Snowflake!")
-        return conn
-    except Exception as e:
-        print(f"Error connecting to Snowflake: {e}")
-        return None
-
-def execute_sql_script(conn, sql_script, description):
-    """
-    Execute a SQL script and return results
-    """
-    try:
-        cursor = conn.cursor()
-        print(f"\n--- {description} ---")
-        print(f"Executing: {sql_script[:100]}...")
-        
-        cursor.execute(sql_script)
-        
-        # Try to fetch results if it's a SELECT statement
-        try:
-            results = cursor.fetchall()
-            if results:
-                print(f"Results: {results}")
-                return results
-            else:
-                print("Query executed successfully (no results to display)")
-                return []
-        except:
-            print("Query executed successfully (no results to display)")
-            return []
-        
-        cursor.close()
-        return True
-        
-    except Exception as e:
-        print(f"Error executing SQL: {e}")
-        return False
 
 def setup_tasty_bytes_data():
     """
@@ -97,20 +30,7 @@ def setup_tasty_bytes_data():
             "description": "Creating raw_pos schema"
         },
         {
-            "sql": """CREATE OR REPLACE TABLE tasty_bytes_sample_data.raw_pos.menu
-(
-    menu_id NUMBER(19,0),
-    menu_type_id NUMBER(38,0),
-    menu_type VARCHAR(16777216),
-    truck_brand_name VARCHAR(16777216),
-    menu_item_id NUMBER(38,0),
-    menu_item_name VARCHAR(16777216),
-    item_category VARCHAR(16777216),
-    item_subcategory VARCHAR(16777216),
-    cost_of_goods_usd NUMBER(38,4),
-    sale_price_usd NUMBER(38,4),
-    menu_item_health_metrics_obj VARIANT
-);""",
+            "sql": create_table_sql('tasty_bytes_sample_data.raw_pos.menu', 'menu') + ";",
             "description": "Creating menu table with proper structure"
         },
         {
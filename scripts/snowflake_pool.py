@@ -0,0 +1,318 @@
+"""
+Shared Snowflake connection pool
+Hands out health-checked connections configured from SNOWFLAKE_CONFIG so a
+script (or a batch of scripts run in one process) logs in once and reuses
+the session instead of paying for a new handshake every time
+"""
+
+import atexit
+import hashlib
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+from lazy_imports import lazy_import, loaded
+from snowflake_config import SNOWFLAKE_CONFIG, offline_backend_enabled
+from snowflake_metadata_cache import CACHE
+from snowflake_params import PARAMSTYLE
+from snowflake_query_tags import tag_options
+from snowflake_session import tracked_cursor
+from snowflake_timeouts import install_interrupt_handler, script_timeout
+from snowflake_token_cache import resume_session, store_tokens, token_cache_enabled
+
+# Deferred until the first connection is opened
+snowflake_connector = lazy_import('snowflake.connector')
+snowflake_offline = lazy_import('snowflake_offline')
+
+# Idle connections older than this are pinged before being handed out again
+HEALTH_CHECK_INTERVAL = 60
+
+# Session context that scripts switch with USE statements; restored on checkout
+SESSION_CONTEXT_KEYS = ('role', 'warehouse', 'database', 'schema')
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class PooledConnection:
+    """
+    Thin proxy around a snowflake.connector connection.
+    close() hands the connection back to its pool instead of logging out.
+    """
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    @property
+    def raw_connection(self):
+        return self._conn
+
+    def cursor(self, *args, **kwargs):
+        # USE statements that would not change the session are answered locally
+        return tracked_cursor(self._conn, *args, **kwargs)
+
+    def execute_string(self, *args, **kwargs):
+        # Statements sent this way bypass the tracked cursors
+        CACHE.clear()
+        return self._conn.execute_string(*args, **tag_options(kwargs))
+
+    def execute_stream(self, *args, **kwargs):
+        CACHE.clear()
+        return self._conn.execute_stream(*args, **tag_options(kwargs))
+
+    def close(self):
+        if self._conn is not None:
+            self._pool.release(self._conn)
+            self._conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class SnowflakeConnectionPool:
+    """
+    Thread-safe pool of Snowflake connections sharing one set of parameters
+    """
+
+    def __init__(self, params, max_size=4):
+        self.params = {key: value for key, value in params.items() if value is not None}
+        # Bind parameters server-side so the statement text stays the same across values
+        self.params.setdefault('paramstyle', PARAMSTYLE)
+        self.max_size = max_size
+        self.offline = offline_backend_enabled()
+        self.use_token_cache = token_cache_enabled() and not self.offline
+        self._idle = []
+        self._in_use = 0
+        self._cond = threading.Condition()
+        self._closed = False
+
+    def _connect_params(self):
+        """
+        Connection parameters; a script timeout is also set as a session
+        parameter, so the server enforces it even if this process dies
+        """
+        timeout = script_timeout()
+        if not timeout:
+            return self.params
+        session_parameters = dict(self.params.get('session_parameters') or {})
+        session_parameters.setdefault('STATEMENT_TIMEOUT_IN_SECONDS', math.ceil(timeout))
+        return dict(self.params, session_parameters=session_parameters)
+
+    def _open(self):
+        # Ctrl-C cancels running statements server-side from the first connection on
+        install_interrupt_handler()
+        params = self._connect_params()
+        if self.offline:
+            conn = loaded(snowflake_offline).connect(**params)
+            print("Successfully connected to the offline Snowflake backend!")
+            return conn
+        if not all([self.params.get('user'), self.params.get('account'), self.params.get('password')]):
+            raise ValueError("Missing required environment variables. Please check your .env file.")
+        if not self.use_token_cache:
+            conn = loaded(snowflake_connector).connect(**params)
+            print("Successfully connected to Snowflake!")
+            return conn
+
+        conn, current = resume_session(params)
+        if conn is not None:
+            self._restore_context(conn, current)
+            return conn
+        # Keep the server session alive on close so its tokens can be cached
+        conn = loaded(snowflake_connector).connect(**params, server_session_keep_alive=True)
+        print("Successfully connected to Snowflake!")
+        return conn
+
+    def _is_healthy(self, conn, idle_since):
+        """
+        Cheap liveness check: always look at the client-side flag, and only
+        spend a round trip on a ping if the connection sat idle for a while
+        """
+        if conn.is_closed():
+            return False
+        if time.monotonic() - idle_since < HEALTH_CHECK_INTERVAL:
+            return True
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+            cursor.close()
+            return True
+        except Exception:
+            return False
+
+    def _restore_context(self, conn, current=None):
+        """
+        Undo USE ROLE/WAREHOUSE/DATABASE/SCHEMA left behind by the previous
+        borrower. The connector tracks the current values client-side, so
+        only the parts that actually changed cost a round trip.
+        """
+        cursor = conn.cursor()
+        try:
+            for key in SESSION_CONTEXT_KEYS:
+                wanted = self.params.get(key)
+                value = current[key] if current else getattr(conn, key, None)
+                if wanted and (value or '').strip('"').upper() != wanted.upper():
+                    cursor.execute(f"USE {key.upper()} {wanted}")
+        finally:
+            cursor.close()
+
+    def ensure_capacity(self, size):
+        """
+        Grow the pool to at least size connections; never shrinks it
+        """
+        with self._cond:
+            if size > self.max_size:
+                self.max_size = size
+                # Borrowers waiting for room may fit now
+                self._cond.notify_all()
+
+    def acquire(self, timeout=None):
+        """
+        Borrow a healthy connection, opening a new one if the pool has room
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Connection pool is closed")
+                if self._idle:
+                    conn, idle_since = self._idle.pop()
+                    self._in_use += 1
+                    break
+                if self._in_use < self.max_size:
+                    conn = None
+                    self._in_use += 1
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError("Timed out waiting for a pooled Snowflake connection")
+                self._cond.wait(remaining)
+
+        try:
+            if conn is not None and self._is_healthy(conn, idle_since):
+                self._restore_context(conn)
+                return conn
+            if conn is not None:
+                self._discard(conn)
+            return self._open()
+        except Exception:
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+    def release(self, conn):
+        """
+        Return a borrowed connection; broken connections are dropped
+        """
+        with self._cond:
+            self._in_use -= 1
+            if self._closed or conn.is_closed():
+                keep = False
+            else:
+                self._idle.append((conn, time.monotonic()))
+                keep = True
+            self._cond.notify()
+        if not keep:
+            self._discard(conn)
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """
+        Context manager that borrows a connection as a PooledConnection and
+        always gives it back
+        """
+        with PooledConnection(self, self.acquire(timeout)) as conn:
+            yield conn
+
+    def close_all(self):
+        """
+        Close idle connections. With the token cache on, the most recently
+        used session is kept alive server-side and its tokens saved for the
+        next run; every other session is logged out.
+        """
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        if idle and self.use_token_cache:
+            conn, _ = idle.pop()
+            try:
+                if store_tokens(self.params, conn):
+                    conn.close()
+                else:
+                    self._discard(conn)
+            except Exception:
+                self._discard(conn)
+        for conn, _ in idle:
+            self._discard(conn)
+
+    @staticmethod
+    def _discard(conn):
+        try:
+            # Log the session out even if it was opened with keep-alive
+            conn._server_session_keep_alive = False
+            conn.close()
+        except Exception:
+            pass
+
+
+def get_pool(config=None, **overrides):
+    """
+    Get the shared pool for a config dict (SNOWFLAKE_CONFIG by default) with
+    the given overrides. Passing a key as None leaves that parameter out of
+    the connection.
+    """
+    params = dict(config or SNOWFLAKE_CONFIG)
+    params.update(overrides)
+    # The password is keyed by its hash, so the key never holds it in the clear,
+    # but a changed password still gets a pool of its own
+    key = tuple(sorted((k, v) for k, v in params.items() if k != 'password'))
+    if params.get('password'):
+        key += (('password_sha256', hashlib.sha256(str(params['password']).encode()).hexdigest()),)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = SnowflakeConnectionPool(params)
+            _pools[key] = pool
+        return pool
+
+
+@contextmanager
+def pooled_connection(config=None, **overrides):
+    """
+    Borrow a connection from the shared pool for the duration of a with-block
+    """
+    with get_pool(config, **overrides).connection() as conn:
+        yield conn
+
+
+def connect_to_snowflake(config=None, **overrides):
+    """
+    Drop-in replacement for the per-script connect_to_snowflake().
+    Returns a pooled connection whose close() returns it to the pool,
+    or None if the connection could not be established.
+    """
+    pool = get_pool(config, **overrides)
+    try:
+        return PooledConnection(pool, pool.acquire())
+    except Exception as e:
+        print(f"Error connecting to Snowflake: {e}")
+        return None
+
+
+@atexit.register
+def close_all_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close_all()
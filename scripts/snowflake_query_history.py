@@ -0,0 +1,205 @@
+"""
+Per-step warehouse time from QUERY_HISTORY
+Pulls the history of every statement tagged by snowflake_query_tags.py for
+one or more scripts in a single query, and reports per <script>:<step> tag
+where the time went: compilation, queueing (provisioning, repair and
+overload) and execution, plus bytes scanned and partitions pruned.
+
+Sources:
+- account_usage: SNOWFLAKE.ACCOUNT_USAGE.QUERY_HISTORY, 365 days of history,
+  but statements show up only after up to 45 minutes
+- information_schema: the INFORMATION_SCHEMA.QUERY_HISTORY table function of
+  the current database, immediate but limited to 7 days and 10,000 queries,
+  and without partition counts
+
+Without a script name every tagged statement is reported.
+
+Usage:
+    python snowflake_query_history.py [SCRIPT ...] [--source information_schema]
+        [--hours 24] [--json report.json]
+"""
+
+import json
+import sys
+
+from snowflake_executor import run_statement
+from snowflake_query_tags import TAG_SEPARATOR
+
+HISTORY_SOURCES = ('account_usage', 'information_schema')
+DEFAULT_HOURS = 24
+
+_COLUMNS = ('query_tag', 'execution_status', 'compilation_time', 'queued_provisioning_time', 'queued_repair_time',
+            'queued_overload_time', 'execution_time', 'total_elapsed_time', 'bytes_scanned', 'partitions_scanned',
+            'partitions_total')
+# Only ACCOUNT_USAGE reports how many partitions a query could have read
+_PARTITION_COLUMNS = ('partitions_scanned', 'partitions_total')
+
+_FROM = {
+    'account_usage': "snowflake.account_usage.query_history "
+                     "WHERE start_time >= DATEADD('hour', ?, CURRENT_TIMESTAMP) AND {filters}",
+    'information_schema': "TABLE(information_schema.query_history("
+                          "END_TIME_RANGE_START => DATEADD('hour', ?, CURRENT_TIMESTAMP), RESULT_LIMIT => 10000)) "
+                          "WHERE {filters}",
+}
+
+
+def _like_prefix(text):
+    # '_' is a wildcard, and script names are full of them
+    return text.replace('!', '!!').replace('%', '!%').replace('_', '!_') + '%'
+
+
+def history_query(scripts, source='account_usage', hours=DEFAULT_HOURS):
+    """
+    (sql, params) fetching the tagged statements of every script in one query;
+    with no scripts, every tagged statement
+    """
+    if source not in HISTORY_SOURCES:
+        raise ValueError(f"Unknown history source '{source}'. Choose one of: {', '.join(HISTORY_SOURCES)}")
+    columns = ', '.join(f"NULL AS {column}" if source != 'account_usage' and column in _PARTITION_COLUMNS
+                        else column for column in _COLUMNS)
+    tags = ' OR '.join("query_tag = ? OR query_tag LIKE ? ESCAPE '!'" for _ in scripts) or "query_tag <> ''"
+    # Leave out the ALTER SESSION statements that set tags inside batches
+    filters = f"query_type <> 'ALTER_SESSION' AND ({tags})"
+    params = [-hours]
+    for script in scripts:
+        params += [script, _like_prefix(script + TAG_SEPARATOR)]
+    return f"SELECT {columns} FROM {_FROM[source].format(filters=filters)} ORDER BY start_time", params
+
+
+class StepTiming:
+    """
+    Totals for the statements that ran under one tag; times are milliseconds
+    """
+
+    def __init__(self, tag):
+        self.tag = tag
+        self.queries = 0
+        self.failed = 0
+        self.compilation_ms = 0
+        self.queued_ms = 0
+        self.execution_ms = 0
+        self.elapsed_ms = 0
+        self.bytes_scanned = 0
+        # Successful statements that neither executed nor scanned: answered from the result cache
+        self.result_reuses = 0
+        self.partitions_scanned = None
+        self.partitions_total = None
+
+    def add(self, row):
+        record = dict(zip(_COLUMNS, row))
+        self.queries += 1
+        if record['execution_status'] != 'SUCCESS':
+            self.failed += 1
+        self.compilation_ms += record['compilation_time'] or 0
+        self.queued_ms += sum(record[key] or 0 for key in
+                              ('queued_provisioning_time', 'queued_repair_time', 'queued_overload_time'))
+        self.execution_ms += record['execution_time'] or 0
+        self.elapsed_ms += record['total_elapsed_time'] or 0
+        self.bytes_scanned += record['bytes_scanned'] or 0
+        if record['execution_status'] == 'SUCCESS' and not record['execution_time'] and not record['bytes_scanned']:
+            self.result_reuses += 1
+        if record['partitions_total'] is not None:
+            self.partitions_scanned = (self.partitions_scanned or 0) + (record['partitions_scanned'] or 0)
+            self.partitions_total = (self.partitions_total or 0) + record['partitions_total']
+
+    @property
+    def pruned(self):
+        """
+        Fraction of partitions skipped, or None if nothing was read from a table
+        """
+        if not self.partitions_total:
+            return None
+        return 1 - self.partitions_scanned / self.partitions_total
+
+    def as_dict(self):
+        return {
+            'tag': self.tag,
+            'queries': self.queries,
+            'failed': self.failed,
+            'compilation_ms': self.compilation_ms,
+            'queued_ms': self.queued_ms,
+            'execution_ms': self.execution_ms,
+            'elapsed_ms': self.elapsed_ms,
+            'bytes_scanned': self.bytes_scanned,
+            'result_reuses': self.result_reuses,
+            'partitions_scanned': self.partitions_scanned,
+            'partitions_total': self.partitions_total,
+            'pruned': self.pruned,
+        }
+
+
+def harvest(conn, scripts, source='account_usage', hours=DEFAULT_HOURS):
+    """
+    {tag: StepTiming} for the scripts' statements of the last hours, in the
+    order the steps first ran
+    """
+    sql, params = history_query(scripts, source, hours)
+    cursor = run_statement(conn, sql, params)
+    steps = {}
+    try:
+        while True:
+            rows = cursor.fetchmany(1000)
+            if not rows:
+                break
+            for row in rows:
+                tag = row[0]
+                if tag not in steps:
+                    steps[tag] = StepTiming(tag)
+                steps[tag].add(row)
+    finally:
+        cursor.close()
+    return steps
+
+
+def _format_bytes(value):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if value < 1024:
+            return f"{value:.0f} {unit}" if unit == 'B' else f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} TB"
+
+
+def print_report(steps):
+    if not steps:
+        print("No tagged statements found (ACCOUNT_USAGE lags by up to 45 minutes; "
+              "try --source information_schema for recent runs)")
+        return
+    total_elapsed = sum(step.elapsed_ms for step in steps.values())
+    print(f"{'Step':<42} {'Queries':>7} {'Compile ms':>10} {'Queued ms':>9} {'Execute ms':>10} "
+          f"{'Elapsed ms':>10} {'Share':>6} {'Scanned':>10} {'Pruned':>7}")
+    for step in steps.values():
+        share = step.elapsed_ms / total_elapsed if total_elapsed else 0.0
+        pruned = f"{step.pruned:.0%}" if step.pruned is not None else '-'
+        failed = f" ({step.failed} failed)" if step.failed else ''
+        print(f"{step.tag:<42} {step.queries:>7} {step.compilation_ms:>10} {step.queued_ms:>9} "
+              f"{step.execution_ms:>10} {step.elapsed_ms:>10} {share:>6.0%} {_format_bytes(step.bytes_scanned):>10} "
+              f"{pruned:>7}{failed}")
+    print(f"{'Total':<42} {sum(step.queries for step in steps.values()):>7} "
+          f"{sum(step.compilation_ms for step in steps.values()):>10} "
+          f"{sum(step.queued_ms for step in steps.values()):>9} "
+          f"{sum(step.execution_ms for step in steps.values()):>10} {total_elapsed:>10}")
+
+
+if __name__ == "__main__":
+    from snowflake_pool import connect_to_snowflake
+
+    args = sys.argv[1:]
+    options = {'--source': 'account_usage', '--hours': str(DEFAULT_HOURS), '--json': None}
+    for option in options:
+        if option in args:
+            options[option] = args.pop(args.index(option) + 1)
+            args.remove(option)
+    scripts = [arg[:-3] if arg.endswith('.py') else arg for arg in args]
+
+    conn = connect_to_snowflake()
+    if not conn:
+        sys.exit(1)
+    try:
+        steps = harvest(conn, scripts, options['--source'], int(options['--hours']))
+    finally:
+        conn.close()
+    print_report(steps)
+    if options['--json']:
+        with open(options['--json'], 'w', encoding='utf-8') as f:
+            json.dump([step.as_dict() for step in steps.values()], f, indent=2)
+        print(f"\nReport written to {options['--json']}")
@@ -0,0 +1,80 @@
+"""
+Query tags per script and step
+Every statement sent through a pooled cursor carries a QUERY_TAG of the form
+<script>:<step>, e.g. tasty_bytes_setup:step7, so its compilation, queueing
+and execution times can be looked up in QUERY_HISTORY afterwards (see
+snowflake_query_history.py). The tag travels with the request as a
+statement parameter, so tagging costs no ALTER SESSION round trip.
+
+Scripts name their steps with query_step(); statements outside any step are
+tagged with the script name alone:
+
+    with query_step('load_truck'):
+        cursor.execute("COPY INTO truck FROM @blob_stage/raw_pos/truck/")
+"""
+
+import os
+import sys
+import threading
+from contextlib import contextmanager
+
+SCRIPT_NAME = os.path.splitext(os.path.basename(sys.argv[0] or ''))[0] or 'interactive'
+TAG_SEPARATOR = ':'
+
+# The step is per thread, so parallel workers (snowflake_dag.py) tag their own statements
+_state = threading.local()
+
+
+def current_step():
+    return getattr(_state, 'step', None)
+
+
+def query_tag(step=None, script=SCRIPT_NAME):
+    """
+    Tag for a step of a script; the current step if none is given
+    """
+    step = current_step() if step is None else step
+    return f"{script}{TAG_SEPARATOR}{step}" if step else script
+
+
+def set_step(step):
+    """
+    Tag statements from this thread with step until it is changed; None clears it
+    """
+    _state.step = None if step is None else str(step)
+
+
+@contextmanager
+def query_step(step):
+    """
+    Tag the statements sent inside the with-block with step
+    """
+    previous = current_step()
+    set_step(step)
+    try:
+        yield query_tag()
+    finally:
+        _state.step = previous
+
+
+def tag_options(options):
+    """
+    cursor.execute() keyword arguments with the current tag added as a
+    statement parameter. A QUERY_TAG already given wins; a QUERY_TAG of None
+    sends none, leaving any tag set with ALTER SESSION in effect.
+    """
+    statement_params = dict(options.get('_statement_params') or {})
+    statement_params.setdefault('QUERY_TAG', query_tag())
+    if statement_params['QUERY_TAG'] is None:
+        del statement_params['QUERY_TAG']
+    return dict(options, _statement_params=statement_params or None)
+
+
+def set_tag_sql(tag):
+    """
+    ALTER SESSION statement setting the tag, for statements inside a
+    multi-statement request, which share the request's statement parameters
+    """
+    if tag is None:
+        return "ALTER SESSION UNSET QUERY_TAG"
+    return "ALTER SESSION SET QUERY_TAG = '" + str(tag).replace("'", "''") + "'"
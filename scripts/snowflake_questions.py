@@ -0,0 +1,332 @@
+"""
+Declarative, concurrent question runner
+Runs question specs - setup SQL, the question's SQL, how to read the answer
+from its result, the answer options, and teardown SQL - on up to N pooled
+connections at once, and reports every answer in one JSON document.
+
+A spec is a dict:
+
+    {
+        "id": "table.q1",
+        "title": "Bytes of an empty table",
+        "setup": ["CREATE TABLE test_table (id NUMBER, name VARCHAR(50))"],
+        "sql": "SHOW TABLES",
+        "match": {"column": "bytes", "where": {"name": "TEST_TABLE"}},
+        "options": [1536, 2048, 0, 2560],
+        "expected": 0,                # optional answer key
+        "teardown": [],               # optional; always runs
+        "error_is_answer": False,     # the question asks what error a statement raises
+    }
+
+Every spec runs in a schema of its own, created in QUESTIONS_DATABASE and
+dropped afterwards, so specs that create objects with the same names run
+side by side. In the SQL, options and "where" values, {database} and
+{schema} name that schema, and {prefix} is unique per spec and run, for
+account-level objects (databases, warehouses) that a schema cannot isolate.
+
+The answer is read from the first row (or the first row whose "where"
+columns match) at "column" (a name or an index, default 0), or computed by a
+callable match(rows). It is then matched to an option: an exact match first,
+then one that ignores case and a trailing period, then the longest option
+contained in the value.
+
+Specs are loaded from Python modules with a SPECS list (question_specs.py by
+default) or from JSON files holding a list of specs.
+
+Usage:
+    python snowflake_questions.py [question_specs | specs.json ...] [--group table,view]
+        [--only table.q1,view.q2] [--workers 4] [--json report.json]
+"""
+
+import datetime
+import importlib
+import json
+import re
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from snowflake_executor import run_statement
+from snowflake_pool import get_pool
+from snowflake_query_tags import query_step
+from snowflake_rows import named_rows
+
+QUESTIONS_DATABASE = 'question_runner'
+DEFAULT_SPECS = 'question_specs'
+DEFAULT_WORKERS = 4
+
+_PLACEHOLDER = re.compile(r'\{(database|schema|prefix)\}')
+_REQUIRED_KEYS = ('id', 'sql', 'options')
+
+
+class QuestionResult:
+    """
+    Outcome of one spec: status is answered, unmatched (a value no option
+    matches) or error
+    """
+
+    def __init__(self, spec, schema):
+        self.spec = spec
+        self.schema = schema
+        self.status = 'pending'
+        self.value = None
+        self.answer = None
+        self.error = None
+        self.teardown_errors = []
+        self.rows = 0
+        self.seconds = 0.0
+
+    @property
+    def correct(self):
+        """
+        Whether the answer is the expected one; None without an answer key
+        """
+        if 'expected' not in self.spec:
+            return None
+        return self.answer is not None and _normalise(self.answer) == _normalise(self.spec['expected'])
+
+    def as_dict(self):
+        return {
+            'id': self.spec['id'],
+            'title': self.spec.get('title'),
+            'group': self.spec.get('group'),
+            'status': self.status,
+            'value': _json_value(self.value),
+            'answer': self.answer,
+            'expected': self.spec.get('expected'),
+            'correct': self.correct,
+            'rows': self.rows,
+            'seconds': round(self.seconds, 3),
+            'schema': self.schema,
+            'error': self.error,
+            'teardown_errors': self.teardown_errors,
+        }
+
+
+def _json_value(value):
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
+
+
+def _normalise(value):
+    return str(value).strip().rstrip('.').casefold()
+
+
+def choose_option(value, options):
+    """
+    The option a result value stands for, or None if none matches
+    """
+    if value is None:
+        return None
+    for option in options:
+        if value == option or str(value) == str(option):
+            return option
+    for option in options:
+        if _normalise(value) == _normalise(option):
+            return option
+    contained = [option for option in options if _normalise(option) and _normalise(option) in _normalise(value)]
+    return max(contained, key=lambda option: len(str(option)), default=None)
+
+
+def read_value(match, rows):
+    """
+    Pick the answer value out of a result according to a spec's match
+    """
+    if callable(match):
+        return match(rows)
+    match = match or {}
+    where = {key: _normalise(value) for key, value in (match.get('where') or {}).items()}
+    for row in rows:
+        if all(_normalise(row[key]) == value for key, value in where.items()):
+            return row[match.get('column', 0)]
+    return None
+
+
+def validate_specs(specs):
+    """
+    Index specs by id; raises ValueError for missing keys or duplicate ids
+    """
+    by_id = {}
+    for spec in specs:
+        missing = [key for key in _REQUIRED_KEYS if key not in spec]
+        if missing:
+            raise ValueError(f"Question spec {spec.get('id', spec)!r} is missing {', '.join(missing)}")
+        if spec['id'] in by_id:
+            raise ValueError(f"Duplicate question spec id '{spec['id']}'")
+        by_id[spec['id']] = spec
+    return by_id
+
+
+def load_specs(sources=(DEFAULT_SPECS,)):
+    """
+    Specs from Python modules (their SPECS list) and JSON files, in order
+    """
+    specs = []
+    for source in sources:
+        if source.endswith('.json'):
+            with open(source, encoding='utf-8') as f:
+                specs.extend(json.load(f))
+        else:
+            specs.extend(importlib.import_module(source[:-3] if source.endswith('.py') else source).SPECS)
+    validate_specs(specs)
+    return specs
+
+
+def _schema_name(run_id, spec_id):
+    return f"q_{run_id}_{re.sub(r'[^0-9A-Za-z]+', '_', spec_id)}".lower()
+
+
+def _expand(sql, names):
+    return _PLACEHOLDER.sub(lambda match: names[match.group(1)], sql)
+
+
+def _expand_match(match, names):
+    if callable(match) or not match or not match.get('where'):
+        return match
+    return dict(match, where={key: _expand(str(value), names) for key, value in match['where'].items()})
+
+
+def _rows(cursor):
+    try:
+        return named_rows(cursor.fetchall(), cursor.description) if cursor.description else []
+    finally:
+        cursor.close()
+
+
+def run_question(conn, spec, result, names):
+    """
+    Set up, ask and tear down one spec on conn, filling in result
+    """
+    start = time.perf_counter()
+    try:
+        with query_step(spec['id']):
+            _rows(run_statement(conn, f"CREATE SCHEMA IF NOT EXISTS {names['database']}.{names['schema']}"))
+            _rows(run_statement(conn, f"USE SCHEMA {names['database']}.{names['schema']}"))
+            try:
+                for sql in spec.get('setup', []):
+                    _rows(run_statement(conn, _expand(sql, names)))
+                try:
+                    rows = _rows(run_statement(conn, _expand(spec['sql'], names)))
+                except Exception as e:
+                    if not spec.get('error_is_answer'):
+                        raise
+                    result.value = getattr(e, 'msg', None) or str(e)
+                else:
+                    result.rows = len(rows)
+                    result.value = read_value(_expand_match(spec.get('match'), names), rows)
+                options = [_expand(option, names) if isinstance(option, str) else option for option in spec['options']]
+                result.answer = choose_option(result.value, options)
+                result.status = 'answered' if result.answer is not None else 'unmatched'
+            finally:
+                for sql in spec.get('teardown', []):
+                    try:
+                        _rows(run_statement(conn, _expand(sql, names)))
+                    except Exception as e:
+                        result.teardown_errors.append(str(e))
+                _rows(run_statement(conn, f"DROP SCHEMA IF EXISTS {names['database']}.{names['schema']} CASCADE"))
+    except Exception as e:
+        result.status = 'error'
+        result.error = str(e)
+    finally:
+        result.seconds = time.perf_counter() - start
+    return result
+
+
+def run_questions(specs, config=None, max_workers=DEFAULT_WORKERS):
+    """
+    Run specs concurrently on connections from the shared pool for config;
+    returns the report as a dict
+    """
+    validate_specs(specs)
+    run_id = uuid.uuid4().hex[:8]
+    pool = get_pool(config)
+    pool.ensure_capacity(max_workers)
+    started = datetime.datetime.now(datetime.timezone.utc)
+    start = time.perf_counter()
+
+    with pool.connection() as conn:
+        _rows(run_statement(conn, f"CREATE DATABASE IF NOT EXISTS {QUESTIONS_DATABASE}"))
+
+    print_lock = threading.Lock()
+
+    def ask(spec):
+        schema = _schema_name(run_id, spec['id'])
+        result = QuestionResult(spec, f"{QUESTIONS_DATABASE}.{schema}")
+        names = {'database': QUESTIONS_DATABASE, 'schema': schema, 'prefix': schema}
+        # A connection per spec: the pool undoes the USE statements of the previous spec on checkout
+        with pool.connection() as conn:
+            run_question(conn, spec, result, names)
+        with print_lock:
+            outcome = result.answer if result.status == 'answered' else result.error or result.value
+            print(f"--- {spec['id']}: {spec.get('title', '')} --- {result.status}: {outcome}")
+        return result
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(ask, spec) for spec in specs]
+        for future in as_completed(futures):
+            result = future.result()
+            results[result.spec['id']] = result
+
+    wall_seconds = time.perf_counter() - start
+    ordered = [results[spec['id']].as_dict() for spec in specs]
+    return {
+        'run_id': run_id,
+        'started': started.isoformat(),
+        'workers': max_workers,
+        'wall_seconds': round(wall_seconds, 3),
+        'question_seconds': round(sum(result['seconds'] for result in ordered), 3),
+        'summary': {status: sum(1 for result in ordered if result['status'] == status)
+                    for status in ('answered', 'unmatched', 'error')},
+        'correct': sum(1 for result in ordered if result['correct']),
+        'questions': ordered,
+    }
+
+
+def print_report(report):
+    print("\n" + "=" * 70)
+    print(f"QUESTION REPORT ({report['workers']} workers)")
+    print("=" * 70)
+    print(f"{'Question':<28} {'Status':<10} {'Seconds':>8}  Answer")
+    for question in report['questions']:
+        answer = question['answer'] if question['status'] == 'answered' else question['error'] or question['value']
+        check = {True: ' (correct)', False: f" (expected {question['expected']})"}.get(question['correct'], '')
+        print(f"{question['id']:<28} {question['status']:<10} {question['seconds']:>8.2f}  "
+              f"{str(answer)[:60]}{check}")
+    summary = report['summary']
+    overlap = report['question_seconds'] / report['wall_seconds'] if report['wall_seconds'] else 0.0
+    keyed = sum(1 for question in report['questions'] if question['correct'] is not None)
+    print(f"\n{summary['answered']} answered, {summary['unmatched']} unmatched, {summary['error']} failed"
+          + (f"; {report['correct']} of {keyed} match the answer key" if keyed else ''))
+    print(f"Wall-clock time: {report['wall_seconds']:.2f}s for {report['question_seconds']:.2f}s of questions "
+          f"({overlap:.1f}x overlap)")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    options = {'--group': None, '--only': None, '--workers': str(DEFAULT_WORKERS), '--json': None}
+    for option in options:
+        if option in args:
+            options[option] = args.pop(args.index(option) + 1)
+            args.remove(option)
+
+    specs = load_specs(args or [DEFAULT_SPECS])
+    if options['--group']:
+        groups = set(options['--group'].split(','))
+        specs = [spec for spec in specs if spec.get('group') in groups]
+    if options['--only']:
+        wanted = set(options['--only'].split(','))
+        specs = [spec for spec in specs if spec['id'] in wanted]
+    if not specs:
+        print("No question specs selected")
+        sys.exit(1)
+
+    report = run_questions(specs, max_workers=int(options['--workers']))
+    print_report(report)
+    if options['--json']:
+        with open(options['--json'], 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {options['--json']}")
@@ -0,0 +1,95 @@
+"""
+Result rows addressable by column name
+Rows are still plain tuples - they print, compare and unpack as before -
+but also answer row['size'], or row.size for names that are not tuple
+methods (count, index). The column names live once per result, in a
+ResultSchema built from cursor.description and shared by every row through
+a per-result Row subclass, so a row costs no more memory than the tuple
+itself and no dict is built for it.
+
+Lookups ignore case: SHOW returns lower-case column names and SELECT
+upper-case ones for unquoted identifiers. Where a result repeats a name
+(SELECT t.*, f.* over a join), the first column with that name wins.
+"""
+
+
+class ResultSchema:
+    """
+    Column names of one result and their positions
+    """
+
+    __slots__ = ('names', '_positions')
+
+    def __init__(self, names):
+        self.names = tuple(names)
+        self._positions = {}
+        for position, name in enumerate(self.names):
+            self._positions.setdefault(name.lower(), position)
+
+    @classmethod
+    def from_description(cls, description):
+        return cls(column[0] for column in description or [])
+
+    def position(self, name):
+        """
+        Index of a column; raises KeyError naming the columns that do exist
+        """
+        try:
+            return self._positions[name.lower()]
+        except KeyError:
+            raise KeyError(f"No column '{name}' in result; columns are: {', '.join(self.names)}") from None
+
+    def __contains__(self, name):
+        return isinstance(name, str) and name.lower() in self._positions
+
+    def __len__(self):
+        return len(self.names)
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __repr__(self):
+        return f"ResultSchema({list(self.names)!r})"
+
+
+class Row(tuple):
+    """
+    A result row: a tuple that can also be indexed by column name
+    """
+
+    __slots__ = ()
+    schema = ResultSchema(())
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return tuple.__getitem__(self, self.schema.position(key))
+        return tuple.__getitem__(self, key)
+
+    def __getattr__(self, name):
+        if name.startswith('__') or name not in self.schema:
+            raise AttributeError(name)
+        return tuple.__getitem__(self, self.schema.position(name))
+
+    def get(self, name, default=None):
+        return self[name] if name in self.schema else default
+
+    def keys(self):
+        return self.schema.names
+
+    def as_dict(self):
+        return dict(zip(self.schema.names, self))
+
+
+def row_factory(description):
+    """
+    Row subclass for one result; call it on each fetched tuple
+    """
+    return type('Row', (Row,), {'__slots__': (), 'schema': ResultSchema.from_description(description)})
+
+
+def named_rows(rows, description):
+    """
+    Wrap fetched tuples as Rows sharing one schema
+    """
+    row_class = row_factory(description)
+    return [row_class(row) for row in rows]
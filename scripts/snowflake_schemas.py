@@ -0,0 +1,349 @@
+"""
+Table schema registry and local pre-load validation
+The Tasty Bytes raw_pos tables (menu, truck, franchise) are declared once,
+as columns with a Snowflake type and nullability, exactly as the scripts
+have always created them (every column nullable). The registry generates
+their DDL - columns_sql() for a column list, create_table_sql() for a whole
+CREATE TABLE - for the setup, loader, uploader and question scripts. It
+describes the existing tables; scripts whose table deliberately differs
+(the wider truck tables of ingestion_questions.py and
+check_public_schema.py) keep their own DDL.
+
+validate_file() checks a local CSV or Parquet sample against a table's
+schema before a COPY spends warehouse time on it: the column count of every
+record, that every value parses as its column's type (NUMBER precision and
+scale, FLOAT, DATE, TIMESTAMP, BOOLEAN, VARCHAR length) and that NOT NULL
+columns hold no NULLs. An empty CSV field is NULL, as in COPY's defaults.
+Records are read as Arrow string batches and each check runs on a whole
+column at once (pyarrow.compute), so a sample of 100k records takes a
+fraction of a second; VARIANT values are not parsed.
+
+Usage:
+    python snowflake_schemas.py ddl [menu truck franchise]
+    python snowflake_schemas.py validate TABLE FILE [FILE ...] [--skip-header N] [--sample-rows N]
+    python snowflake_schemas.py validate
+
+Without files, validate checks the offline stage fixtures of every table.
+"""
+
+import os
+import re
+import sys
+from dataclasses import dataclass
+
+from lazy_imports import lazy_import
+
+pa = lazy_import('pyarrow')
+pc = lazy_import('pyarrow.compute')
+pa_csv = lazy_import('pyarrow.csv')
+pq = lazy_import('pyarrow.parquet')
+
+# Records read from each file; None reads all of it
+DEFAULT_SAMPLE_ROWS = 100000
+
+FIXTURES_RAW_POS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                'fixtures', 'stage', 'sfquickstarts', 'tastybytes', 'raw_pos')
+
+# Values COPY reads as TRUE or FALSE for a BOOLEAN column
+BOOLEAN_VALUES = ('true', 'false', 't', 'f', 'yes', 'no', 'y', 'n', 'on', 'off', '1', '0')
+
+_NUMBER_TYPE = re.compile(r'^(?:NUMBER|DECIMAL|NUMERIC)(?:\((\d+)(?:,(\d+))?\))?$')
+_INTEGER_TYPES = ('INT', 'INTEGER', 'BIGINT', 'SMALLINT', 'TINYINT', 'BYTEINT')
+_TEXT_TYPE = re.compile(r'^(?:VARCHAR|STRING|TEXT|CHAR|CHARACTER)(?:\((\d+)\))?$')
+
+
+@dataclass(frozen=True)
+class Column:
+    """
+    One column of a table schema
+    """
+    name: str
+    type: str
+    nullable: bool = True
+
+    @property
+    def ddl(self):
+        return f"{self.name} {self.type}" + ('' if self.nullable else ' NOT NULL')
+
+
+SCHEMAS = {
+    'menu': (
+        Column('menu_id', 'NUMBER(19,0)'),
+        Column('menu_type_id', 'NUMBER(38,0)'),
+        Column('menu_type', 'VARCHAR(16777216)'),
+        Column('truck_brand_name', 'VARCHAR(16777216)'),
+        Column('menu_item_id', 'NUMBER(38,0)'),
+        Column('menu_item_name', 'VARCHAR(16777216)'),
+        Column('item_category', 'VARCHAR(16777216)'),
+        Column('item_subcategory', 'VARCHAR(16777216)'),
+        Column('cost_of_goods_usd', 'NUMBER(38,4)'),
+        Column('sale_price_usd', 'NUMBER(38,4)'),
+        Column('menu_item_health_metrics_obj', 'VARIANT'),
+    ),
+    'truck': (
+        Column('truck_id', 'NUMBER(38,0)'),
+        Column('menu_type_id', 'NUMBER(38,0)'),
+        Column('primary_city', 'VARCHAR(16777216)'),
+        Column('region', 'VARCHAR(16777216)'),
+        Column('iso_region', 'VARCHAR(16777216)'),
+        Column('country', 'VARCHAR(16777216)'),
+        Column('iso_country_code', 'VARCHAR(16777216)'),
+        Column('franchise_flag', 'VARCHAR(16777216)'),
+        Column('franchise_id', 'NUMBER(38,0)'),
+        Column('menu_type', 'VARCHAR(16777216)'),
+        Column('country_code_iso_2', 'VARCHAR(16777216)'),
+        Column('country_code_iso_3', 'VARCHAR(16777216)'),
+        Column('country_code_iso_numeric', 'VARCHAR(16777216)'),
+        Column('truck_brand_name', 'VARCHAR(16777216)'),
+    ),
+    'franchise': (
+        Column('franchise_id', 'NUMBER(38,0)'),
+        Column('first_name', 'VARCHAR(16777216)'),
+        Column('last_name', 'VARCHAR(16777216)'),
+        Column('city', 'VARCHAR(16777216)'),
+        Column('country', 'VARCHAR(16777216)'),
+        Column('phone_number', 'VARCHAR(16777216)'),
+        Column('email', 'VARCHAR(16777216)'),
+    ),
+}
+
+
+def table_schema(table):
+    """
+    The columns of a registered table; raises ValueError for an unknown one
+    """
+    try:
+        return SCHEMAS[table.lower()]
+    except KeyError:
+        raise ValueError(f"No schema registered for table '{table}'. Choose from: {', '.join(SCHEMAS)}")
+
+
+def columns_sql(table):
+    """
+    The parenthesised column list of a registered table, as CREATE TABLE takes it
+    """
+    return "(\n" + ",\n".join(f"    {column.ddl}" for column in table_schema(table)) + "\n)"
+
+
+def create_table_sql(name, table, replace=True):
+    """
+    CREATE [OR REPLACE] TABLE name with the columns of a registered table
+    """
+    return f"CREATE {'OR REPLACE ' if replace else ''}TABLE {name}\n{columns_sql(table)}"
+
+
+class SchemaViolation:
+    """
+    Records of a file that break one check on one column; check is
+    column_count, type, length or null. record is the 1-based number of the
+    first such record after the header - a line number for column_count,
+    and otherwise counting only the records with the right column count
+    """
+
+    def __init__(self, column, check, expected, record, value):
+        self.column = column
+        self.check = check
+        self.expected = expected
+        self.records = 0
+        self.record = record
+        self.value = value
+
+    def as_dict(self):
+        return {'column': self.column, 'check': self.check, 'expected': self.expected, 'records': self.records,
+                'first_record': self.record, 'value': self.value}
+
+    def __str__(self):
+        problem = {
+            'column_count': f"{self.records} record(s) with {self.value} columns instead of {self.expected}",
+            'type': f"{self.records} value(s) that are not {self.expected}, e.g. {self.value!r}",
+            'length': f"{self.records} value(s) longer than {self.expected} characters",
+            'null': f"{self.records} NULL(s) in a NOT NULL column",
+        }[self.check]
+        return f"{self.column or '(record)'}: {problem} (first at record {self.record})"
+
+
+class ValidationResult:
+    """
+    Outcome of checking one file against a table schema
+    """
+
+    def __init__(self, path, table):
+        self.path = path
+        self.table = table
+        self.records = 0
+        self.violations = {}
+        self.error = None
+
+    @property
+    def ok(self):
+        return self.error is None and not self.violations
+
+    def add(self, column, check, expected, count, record, value=None):
+        violation = self.violations.get((column, check))
+        if violation is None:
+            violation = self.violations[(column, check)] = SchemaViolation(column, check, expected, record, value)
+        violation.records += count
+
+    def as_dict(self):
+        return {'file': self.path, 'table': self.table, 'records': self.records, 'ok': self.ok,
+                'error': self.error, 'violations': [violation.as_dict() for violation in self.violations.values()]}
+
+    def __str__(self):
+        if self.error:
+            return f"{self.path}: cannot be read as {self.table}: {self.error}"
+        if self.ok:
+            return f"{self.path}: {self.records} record(s) match {self.table}"
+        return f"{self.path}: {self.records} record(s) checked against {self.table}\n" + \
+            "\n".join(f"  {violation}" for violation in self.violations.values())
+
+
+def _pattern(regex):
+    return lambda values: pc.invert(pc.match_substring_regex(values, regex))
+
+
+def _type_check(column_type):
+    """
+    (check, expected, function of a string array giving the mask of values
+    the type cannot hold) for a column type, or None for types not checked
+    """
+    declared = column_type.upper().replace(' ', '')
+    number = _NUMBER_TYPE.match(declared)
+    if number or declared in _INTEGER_TYPES:
+        precision = int(number.group(1) or 38) if number else 38
+        scale = int(number.group(2) or 0) if number else 0
+        # COPY rounds extra decimal places away; only too many integer digits make a value fail
+        shape = _pattern(rf'^\s*[+-]?0*\d{{0,{precision - scale}}}(\.\d*)?([eE][+-]?\d+)?\s*$')
+        return 'type', column_type, lambda values: pc.or_(shape(values), _pattern(r'\d')(values))
+    if declared in ('FLOAT', 'FLOAT4', 'FLOAT8', 'DOUBLE', 'DOUBLEPRECISION', 'REAL'):
+        return 'type', column_type, _pattern(r'^\s*[+-]?((\d+\.?\d*|\.\d+)([eE][+-]?\d+)?|(?i:inf|infinity|nan))\s*$')
+    if declared == 'DATE':
+        return 'type', column_type, _pattern(r'^\s*\d{4}-\d{2}-\d{2}\s*$')
+    if declared.startswith(('TIMESTAMP', 'DATETIME')):
+        return 'type', column_type, _pattern(r'^\s*\d{4}-\d{2}-\d{2}([ T]\d{2}:\d{2}(:\d{2}(\.\d+)?)?)?'
+                                             r'\s*([+-]\d{2}:?\d{2}|Z)?\s*$')
+    if declared == 'BOOLEAN':
+        return 'type', column_type, lambda values: pc.invert(
+            pc.is_in(pc.utf8_lower(pc.utf8_trim_whitespace(values)), value_set=pa.array(BOOLEAN_VALUES)))
+    text = _TEXT_TYPE.match(declared)
+    if text and text.group(1):
+        length = int(text.group(1))
+        return 'length', length, lambda values: pc.greater(pc.utf8_length(values), length)
+    return None
+
+
+def _csv_batches(path, columns, skip_header, delimiter, result):
+    def invalid_row(row):
+        result.add(None, 'column_count', len(columns), 1,
+                   (row.number or 0) - skip_header, row.actual_columns)
+        return 'skip'
+
+    reader = pa_csv.open_csv(
+        pa.input_stream(path, compression='detect'),
+        read_options=pa_csv.ReadOptions(column_names=[column.name for column in columns], skip_rows=skip_header,
+                                        use_threads=False),
+        parse_options=pa_csv.ParseOptions(delimiter=delimiter, newlines_in_values=True,
+                                          invalid_row_handler=invalid_row),
+        convert_options=pa_csv.ConvertOptions(column_types={column.name: pa.string() for column in columns},
+                                              null_values=[''], strings_can_be_null=True,
+                                              quoted_strings_can_be_null=False))
+    yield from reader
+
+
+def _parquet_batches(path, columns, result):
+    source = pq.ParquetFile(path)
+    if len(source.schema_arrow) != len(columns):
+        result.add(None, 'column_count', len(columns), source.metadata.num_rows, 1, len(source.schema_arrow))
+        return
+    for batch in source.iter_batches():
+        yield pa.RecordBatch.from_arrays([pc.cast(array, pa.string()) for array in batch.columns],
+                                         names=[column.name for column in columns])
+
+
+def validate_file(path, table, skip_header=0, delimiter=',', sample_rows=DEFAULT_SAMPLE_ROWS):
+    """
+    Check up to sample_rows records of a local CSV (optionally compressed)
+    or Parquet file against a registered table's schema
+    """
+    columns = table_schema(table)
+    checks = [(column, _type_check(column.type)) for column in columns]
+    result = ValidationResult(path, table)
+    if path.endswith('.parquet'):
+        batches = _parquet_batches(path, columns, result)
+    else:
+        batches = _csv_batches(path, columns, skip_header, delimiter, result)
+    try:
+        for batch in batches:
+            if sample_rows is not None:
+                batch = batch.slice(0, sample_rows - result.records)
+            for column, check in checks:
+                values = batch.column(column.name)
+                if not column.nullable and values.null_count:
+                    _record_failures(result, column.name, 'null', None, pc.is_null(values), values)
+                if check is not None:
+                    name, expected, invalid = check
+                    # NULL is a value of every type, so only non-NULL values can fail
+                    _record_failures(result, column.name, name, expected,
+                                     pc.and_kleene(invalid(values), pc.is_valid(values)), values)
+            result.records += batch.num_rows
+            if sample_rows is not None and result.records >= sample_rows:
+                break
+    except (pa.ArrowInvalid, OSError) as e:
+        result.error = str(e).splitlines()[0]
+    return result
+
+
+def _record_failures(result, column, check, expected, mask, values):
+    count = pc.sum(mask).as_py() or 0
+    if count:
+        first = pc.index(mask, True).as_py()
+        result.add(column, check, expected, count, result.records + first + 1, values[first].as_py())
+
+
+def validate_files(paths, table, **options):
+    """
+    validate_file() for each path; raises ValueError listing every problem
+    unless all of them match
+    """
+    results = [validate_file(path, table, **options) for path in paths]
+    failed = [result for result in results if not result.ok]
+    if failed:
+        raise ValueError(f"{len(failed)} of {len(results)} file(s) do not match the {table} schema:\n"
+                         + "\n".join(str(result) for result in failed))
+    return results
+
+
+def fixture_files(table):
+    directory = os.path.join(FIXTURES_RAW_POS, table)
+    if not os.path.isdir(directory):
+        return []
+    return [os.path.join(directory, name) for name in sorted(os.listdir(directory))]
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    options = {'--skip-header': '0', '--sample-rows': str(DEFAULT_SAMPLE_ROWS)}
+    for option in options:
+        if option in args:
+            options[option] = args.pop(args.index(option) + 1)
+            args.remove(option)
+    command = args.pop(0) if args else 'ddl'
+
+    if command == 'ddl':
+        for table in args or SCHEMAS:
+            print(create_table_sql(table, table) + ";\n")
+    elif command == 'validate':
+        if args:
+            targets = [(args[0], args[1:])]
+        else:
+            targets = [(table, fixture_files(table)) for table in SCHEMAS]
+        all_ok = True
+        for table, paths in targets:
+            for path in paths:
+                result = validate_file(path, table, skip_header=int(options['--skip-header']),
+                                       sample_rows=int(options['--sample-rows']) or None)
+                all_ok = all_ok and result.ok
+                print(result)
+        sys.exit(0 if all_ok else 1)
+    else:
+        print(__doc__)
+        sys.exit(1)
@@ -0,0 +1,219 @@
+"""
+Client-side session context tracking
+The connector keeps the session's current role, warehouse, database and
+schema on the connection object and refreshes them from every server
+response. Pooled cursors consult those values and answer USE statements
+that would change nothing locally, saving a round trip each. A summary of
+what was skipped is printed when the script exits.
+
+The same cursors serve repeated SHOW/DESCRIBE statements from the metadata
+cache (snowflake_metadata_cache.py) and invalidate it ahead of statements
+that can make it stale. Every statement they send carries the current
+query tag (snowflake_query_tags.py) and the statement timeout
+(snowflake_timeouts.py), and is registered as in flight so Ctrl-C can
+cancel it server-side.
+"""
+
+import atexit
+import re
+import threading
+
+from snowflake_metadata_cache import CACHE
+from snowflake_query_tags import tag_options
+from snowflake_timeouts import in_flight, statement_timeout
+from snowflake_tracing import wrap_cursor
+
+SKIPPED_STATUS = 'Statement executed successfully.'
+STATUS_DESCRIPTION = [('status', 2, None, None, None, None, True)]
+
+# Keyword arguments of execute() that shape how a statement runs rather than what it returns
+EXECUTION_OPTIONS = ('timeout', '_statement_params')
+
+_USE = re.compile(
+    r'^\s*USE\s+(?:(?P<kind>ROLE|WAREHOUSE|DATABASE|SCHEMA)\s+)?'
+    r'(?P<name>(?:"[^"]+"|[\w$]+)(?:\.(?:"[^"]+"|[\w$]+))?)\s*;?\s*$',
+    re.I
+)
+
+STATS = {'use_statements': 0, 'skipped': 0}
+_stats_lock = threading.Lock()
+
+
+def _ident(part):
+    part = part.strip()
+    if part.startswith('"') and part.endswith('"'):
+        return part[1:-1]
+    return part.upper()
+
+
+def _current(conn, key):
+    value = getattr(conn, key, None)
+    return value.strip('"') if value else None
+
+
+def requested_context(sql):
+    """
+    {key: value} a USE statement would set, or None if sql is not a plain USE
+    """
+    match = _USE.match(sql)
+    if not match:
+        return None
+    kind = (match.group('kind') or 'DATABASE').upper()
+    parts = [_ident(part) for part in re.findall(r'"[^"]+"|[^.]+', match.group('name'))]
+    if kind == 'SCHEMA':
+        if len(parts) == 2:
+            return {'database': parts[0], 'schema': parts[1]}
+        return {'schema': parts[0]}
+    if len(parts) != 1:
+        return None
+    if kind == 'DATABASE':
+        # USE DATABASE also makes PUBLIC the current schema
+        return {'database': parts[0], 'schema': 'PUBLIC'}
+    return {kind.lower(): parts[0]}
+
+
+def is_redundant(conn, sql):
+    """
+    True if sql is a USE statement that would leave the session unchanged
+    """
+    wanted = requested_context(sql)
+    if wanted is None:
+        return False
+    with _stats_lock:
+        STATS['use_statements'] += 1
+    return all(_current(conn, key) == value for key, value in wanted.items())
+
+
+class SessionCursor:
+    """
+    Cursor wrapper that skips redundant USE statements, answers cached
+    metadata queries locally and tags what it sends
+    """
+
+    def __init__(self, conn, cursor):
+        self._conn = conn
+        self._cursor = cursor
+        # (description, rows, query_id) of a result answered locally
+        self._local = None
+
+    def __getattr__(self, name):
+        if name.startswith('fetch') and self.__dict__.get('_local') is not None:
+            # e.g. fetch_arrow_batches(): the wrapped cursor holds no result to convert
+            raise AttributeError(name)
+        return getattr(self._cursor, name)
+
+    def _answer(self, description, rows, query_id=None):
+        self._local = (description, list(rows), query_id)
+        self._local_rowcount = len(self._local[1])
+        return self
+
+    def _send(self, command, *args, **kwargs):
+        timeout = statement_timeout(kwargs.pop('timeout', None))
+        if timeout is not None:
+            kwargs['timeout'] = timeout
+        with in_flight(self._conn):
+            result = self._cursor.execute(command, *args, **tag_options(kwargs))
+        return self if result is self._cursor else result
+
+    def execute(self, command, *args, **kwargs):
+        self._local = None
+        options = {key: kwargs.pop(key) for key in EXECUTION_OPTIONS if key in kwargs}
+        if args or kwargs:
+            # Bound parameters or a multi-statement block: run as is
+            if kwargs.get('num_statements') is not None:
+                CACHE.clear()
+            else:
+                CACHE.invalidate(command)
+            return self._send(command, *args, **kwargs, **options)
+        if is_redundant(self._conn, command):
+            with _stats_lock:
+                STATS['skipped'] += 1
+            return self._answer(STATUS_DESCRIPTION, [(SKIPPED_STATUS,)])
+        key = CACHE.key(self._conn, command)
+        if key is not None:
+            cached = CACHE.get(key)
+            if cached is not None:
+                return self._answer(*cached)
+        else:
+            CACHE.invalidate(command)
+        result = self._send(command, **options)
+        if key is not None:
+            # Metadata results are small; keep them for the next identical statement
+            description, rows = self._cursor.description, self._cursor.fetchall()
+            CACHE.put(key, description, rows)
+            return self._answer(description, rows, self._cursor.sfqid)
+        return result
+
+    def execute_async(self, command, *args, **kwargs):
+        CACHE.invalidate(command)
+        # The server enforces the timeout here; nobody waits on the client side
+        timeout = statement_timeout(kwargs.pop('timeout', None))
+        if timeout is not None:
+            statement_params = dict(kwargs.get('_statement_params') or {})
+            statement_params.setdefault('STATEMENT_TIMEOUT_IN_SECONDS', timeout)
+            kwargs['_statement_params'] = statement_params
+        return self._cursor.execute_async(command, *args, **tag_options(kwargs))
+
+    @property
+    def description(self):
+        return self._local[0] if self._local is not None else self._cursor.description
+
+    @property
+    def rowcount(self):
+        return self._local_rowcount if self._local is not None else self._cursor.rowcount
+
+    @property
+    def sfqid(self):
+        # None when no statement was sent
+        return self._local[2] if self._local is not None else self._cursor.sfqid
+
+    def fetchone(self):
+        if self._local is not None:
+            rows = self._local[1]
+            return rows.pop(0) if rows else None
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size=None):
+        if self._local is not None:
+            rows = self._local[1]
+            batch = rows[:size or getattr(self._cursor, 'arraysize', 1)]
+            del rows[:len(batch)]
+            return batch
+        return self._cursor.fetchmany(size) if size is not None else self._cursor.fetchmany()
+
+    def fetchall(self):
+        if self._local is not None:
+            rows = self._local[1]
+            self._local = (self._local[0], [], self._local[2])
+            return rows
+        return self._cursor.fetchall()
+
+    def __iter__(self):
+        while True:
+            row = self.fetchone()
+            if row is None:
+                return
+            yield row
+
+    def close(self):
+        return self._cursor.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def tracked_cursor(conn, *args, **kwargs):
+    """
+    Open a cursor on a raw connection with tracing and USE skipping applied
+    """
+    return SessionCursor(conn, wrap_cursor(conn.cursor(*args, **kwargs)))
+
+
+@atexit.register
+def print_session_summary():
+    if STATS['use_statements']:
+        print(f"\nSession tracking: skipped {STATS['skipped']} of {STATS['use_statements']} USE statements "
+              f"({STATS['skipped']} round trips saved)")
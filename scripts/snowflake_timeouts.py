@@ -0,0 +1,244 @@
+"""
+Statement timeouts, run budgets and cancellation
+Three limits bound how long a pooled statement may run; the tightest wins:
+
+- per call: run_statement(..., timeout=30), execute_query(..., timeout=30)
+  or cursor.execute(sql, timeout=30)
+- per script: set_script_timeout(300), or SNOWFLAKE_STATEMENT_TIMEOUT
+- per run: a wall-clock budget for a whole batch run, from
+  SNOWFLAKE_RUN_BUDGET or set_run_budget(). Batch runners pass what is left
+  of it to the scripts they start through SNOWFLAKE_RUN_DEADLINE.
+
+The limit goes to cursor.execute(timeout=...), so the connector cancels the
+statement server-side once it runs over. Connections opened with a script
+timeout also set STATEMENT_TIMEOUT_IN_SECONDS, so the server enforces it
+even if the client is gone. Once the run budget is spent, statements are
+refused with RunBudgetExceeded before they are sent.
+
+Ctrl-C cancels whatever is still running server-side before the
+KeyboardInterrupt goes through: asynchronous queries by query ID
+(SYSTEM$CANCEL_QUERY), and statements still waiting for their query ID
+through their session (SYSTEM$CANCEL_ALL_QUERIES). A second Ctrl-C
+interrupts at once.
+"""
+
+import atexit
+import math
+import os
+import signal
+import threading
+import time
+from contextlib import contextmanager
+
+from snowflake_config import get_settings
+
+DEADLINE_ENV = 'SNOWFLAKE_RUN_DEADLINE'
+
+# How long the cancel requests sent on Ctrl-C may take before the process gives up on them
+CANCEL_TIMEOUT = 10
+
+
+class RunBudgetExceeded(RuntimeError):
+    """
+    Raised instead of sending a statement once the run's wall-clock budget is spent
+    """
+
+
+def _initial_deadline():
+    deadline = os.getenv(DEADLINE_ENV)
+    if deadline:
+        return float(deadline)
+    budget = get_settings().run_budget
+    return time.time() + budget if budget else None
+
+
+_limits = {'script_timeout': get_settings().statement_timeout, 'deadline': _initial_deadline()}
+
+STATS = {'timeouts': 0, 'cancelled': 0, 'refused': 0}
+
+# Statements on their way to the server: key -> (connection, query ID or None)
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+
+# Set by Ctrl-C until the KeyboardInterrupt has reached the script
+_interrupted = threading.Event()
+
+
+def set_script_timeout(seconds):
+    """
+    Limit every statement this script sends to seconds; None removes the limit
+    """
+    _limits['script_timeout'] = seconds or None
+
+
+def script_timeout():
+    return _limits['script_timeout']
+
+
+def set_run_budget(seconds):
+    """
+    Start a wall-clock budget for the rest of the run; None removes it
+    """
+    _limits['deadline'] = time.time() + seconds if seconds else None
+
+
+def remaining_budget():
+    """
+    Seconds left in the run budget, or None without one
+    """
+    if _limits['deadline'] is None:
+        return None
+    return max(0.0, _limits['deadline'] - time.time())
+
+
+def deadline_env():
+    """
+    Environment entries handing the run budget on to a child process
+    """
+    return {DEADLINE_ENV: repr(_limits['deadline'])} if _limits['deadline'] is not None else {}
+
+
+def statement_timeout(timeout=None):
+    """
+    Whole seconds the next statement may run - the tightest of the per-call
+    timeout, the script timeout and the remaining run budget - or None for
+    no limit. Raises RunBudgetExceeded if the budget is already spent.
+    """
+    limits = [value for value in (timeout, _limits['script_timeout']) if value]
+    remaining = remaining_budget()
+    if remaining is not None:
+        if remaining <= 0:
+            STATS['refused'] += 1
+            raise RunBudgetExceeded("Run budget spent; statement not sent")
+        limits.append(remaining)
+    # The connector takes whole seconds; rounding down to 0 would mean no limit
+    return max(1, math.ceil(min(limits))) if limits else None
+
+
+def is_timeout(error):
+    """
+    True for the error of a statement canceled because it ran over its timeout
+    """
+    if getattr(error, 'errno', None) == 630:
+        return True
+    # The connector reports its own client-side timeout as a cancellation mentioning it
+    return getattr(error, 'sqlstate', None) == '57014' and 'timeout' in str(error).lower()
+
+
+@contextmanager
+def in_flight(conn, query_id=None):
+    """
+    Register a statement as running on conn for as long as the with-block lasts
+    """
+    key = object()
+    with _in_flight_lock:
+        _in_flight[key] = (conn, query_id)
+    try:
+        yield
+    except Exception as e:
+        if _interrupted.is_set():
+            # The driver turned the KeyboardInterrupt into an error of the cancelled statement
+            _interrupted.clear()
+            raise KeyboardInterrupt from e
+        if is_timeout(e):
+            STATS['timeouts'] += 1
+        raise
+    except KeyboardInterrupt:
+        _interrupted.clear()
+        raise
+    finally:
+        with _in_flight_lock:
+            _in_flight.pop(key, None)
+
+
+def track_query(conn, query_id):
+    """
+    Register an asynchronously submitted query until untrack_query()
+    """
+    with _in_flight_lock:
+        _in_flight[query_id] = (conn, query_id)
+
+
+def untrack_query(query_id):
+    with _in_flight_lock:
+        _in_flight.pop(query_id, None)
+
+
+def cancel_query(conn, query_id):
+    """
+    Cancel one query server-side; False if the request failed
+    """
+    # A raw cursor: the cancel itself must not be refused for lack of run budget
+    cursor = getattr(conn, 'raw_connection', conn).cursor()
+    try:
+        cursor.execute("SELECT SYSTEM$CANCEL_QUERY(?)", (query_id,))
+        cursor.fetchall()
+        return True
+    except Exception:
+        return False
+    finally:
+        cursor.close()
+
+
+def cancel_in_flight():
+    """
+    Cancel every registered statement server-side; returns how many requests went out
+    """
+    with _in_flight_lock:
+        entries = list(_in_flight.values())
+        _in_flight.clear()
+    query_ids = {query_id: conn for conn, query_id in entries if query_id}
+    # Without a query ID the statement can only be reached through its session
+    sessions = {getattr(conn, 'session_id', None): conn for conn, query_id in entries if not query_id}
+    sessions.pop(None, None)
+    sent = 0
+    for query_id, conn in query_ids.items():
+        sent += cancel_query(conn, query_id)
+    for session_id, conn in sessions.items():
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT SYSTEM$CANCEL_ALL_QUERIES(?)", (session_id,))
+            cursor.fetchall()
+            sent += 1
+        except Exception:
+            pass
+        finally:
+            cursor.close()
+    STATS['cancelled'] += sent
+    return sent
+
+
+def _interrupt(signum, frame):
+    # Restore the default first, so a second Ctrl-C interrupts at once
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+    with _in_flight_lock:
+        pending = len(_in_flight)
+    if pending:
+        _interrupted.set()
+        print(f"\nInterrupted: cancelling {pending} running statement(s) server-side...")
+        # Not from inside the handler: the interrupted frame may be halfway through a request.
+        # A non-daemon thread still finishes while the KeyboardInterrupt unwinds the program.
+        canceller = threading.Thread(target=cancel_in_flight, name='snowflake-cancel')
+        canceller.start()
+        canceller.join(CANCEL_TIMEOUT)
+    raise KeyboardInterrupt
+
+
+def install_interrupt_handler():
+    """
+    Cancel running statements on Ctrl-C; only possible from the main thread,
+    and only if nothing else has claimed SIGINT
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return False
+    if signal.getsignal(signal.SIGINT) is not signal.default_int_handler:
+        return signal.getsignal(signal.SIGINT) is _interrupt
+    signal.signal(signal.SIGINT, _interrupt)
+    return True
+
+
+@atexit.register
+def print_timeout_summary():
+    if any(STATS.values()):
+        print(f"\nTimeouts: {STATS['timeouts']} statement(s) timed out, {STATS['cancelled']} cancelled on interrupt, "
+              f"{STATS['refused']} refused after the run budget was spent")
@@ -0,0 +1,212 @@
+"""
+On-disk Snowflake login token cache
+Keeps the session/master tokens of the last pooled connection, encrypted at
+rest and keyed by account/user/role, so the next script run can resume that
+session instead of doing a full password login.
+
+Usage:
+    python snowflake_token_cache.py --benchmark [runs]
+    python snowflake_token_cache.py --clear
+"""
+
+import base64
+import hashlib
+import json
+import os
+import sys
+import time
+
+from lazy_imports import lazy_import, loaded
+from snowflake_config import CACHE_DIR, get_settings
+
+# Deferred until the first connection is opened
+snowflake_connector = lazy_import('snowflake.connector')
+
+TOKEN_CACHE_DIR = os.path.join(CACHE_DIR, 'tokens')
+
+# Snowflake master tokens are valid for 4 hours unless the server says otherwise
+DEFAULT_MASTER_VALIDITY = 4 * 60 * 60
+
+# Stop reusing a token this long before it expires
+EXPIRY_MARGIN = 5 * 60
+
+# Key derivation has to stay well below the cost of the login it replaces
+KDF_ITERATIONS = 50000
+
+
+def token_cache_enabled():
+    return get_settings().token_cache
+
+
+def _cache_path(params):
+    identity = '|'.join((params.get(key) or '').lower() for key in ('account', 'user', 'role'))
+    digest = hashlib.sha256(identity.encode('utf-8')).hexdigest()[:32]
+    return os.path.join(TOKEN_CACHE_DIR, f"{digest}.bin")
+
+
+def _write_private(path, data):
+    os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _fernet(params, salt):
+    """
+    Build the cipher for a cache entry. The key is derived from the account
+    password, so the file is useless to anyone who does not already have it.
+    """
+    from cryptography.fernet import Fernet
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+
+    kdf = PBKDF2HMAC(algorithm=hashes.SHA256(), length=32, salt=salt, iterations=KDF_ITERATIONS)
+    key = kdf.derive((params.get('password') or '').encode('utf-8'))
+    return Fernet(base64.urlsafe_b64encode(key))
+
+
+def _extract_tokens(conn):
+    rest = conn.rest
+    session_token = getattr(rest, 'token', None)
+    master_token = getattr(rest, 'master_token', None)
+    if not session_token or not master_token:
+        return None
+    validity = getattr(rest, 'master_validity_in_seconds', None) or DEFAULT_MASTER_VALIDITY
+    return {
+        'session_token': session_token,
+        'master_token': master_token,
+        'master_validity_in_seconds': validity,
+        'expires_at': time.time() + validity,
+    }
+
+
+def store_tokens(params, conn):
+    """
+    Save the tokens of an open connection. The connection must have been
+    opened with server_session_keep_alive so closing it keeps the session.
+    """
+    tokens = _extract_tokens(conn)
+    if tokens is None:
+        return False
+    salt = os.urandom(16)
+    payload = _fernet(params, salt).encrypt(json.dumps(tokens).encode('utf-8'))
+    _write_private(_cache_path(params), salt + payload)
+    return True
+
+
+def claim_tokens(params):
+    """
+    Take the cached tokens for these parameters, if any are still valid.
+    The entry is removed so two processes never share one server session.
+    """
+    path = _cache_path(params)
+    claimed_path = f"{path}.{os.getpid()}.claimed"
+    try:
+        os.replace(path, claimed_path)
+    except OSError:
+        return None
+    try:
+        with open(claimed_path, 'rb') as f:
+            data = f.read()
+        tokens = json.loads(_fernet(params, data[:16]).decrypt(data[16:]))
+    except Exception:
+        return None
+    finally:
+        os.remove(claimed_path)
+    if tokens.get('expires_at', 0) - EXPIRY_MARGIN <= time.time():
+        return None
+    return tokens
+
+
+def clear_tokens():
+    removed = 0
+    if os.path.isdir(TOKEN_CACHE_DIR):
+        for name in os.listdir(TOKEN_CACHE_DIR):
+            os.remove(os.path.join(TOKEN_CACHE_DIR, name))
+            removed += 1
+    return removed
+
+
+def resume_session(params):
+    """
+    Open a connection on a cached session without re-authenticating.
+    Returns (connection, current_context) or (None, None) on a cache miss.
+    """
+    tokens = claim_tokens(params)
+    if tokens is None:
+        return None, None
+    try:
+        conn = loaded(snowflake_connector).connect(
+            **{key: value for key, value in params.items() if key != 'password'},
+            session_token=tokens['session_token'],
+            master_token=tokens['master_token'],
+            master_validity_in_seconds=tokens['master_validity_in_seconds'],
+            server_session_keep_alive=True
+        )
+        # The session keeps whatever context the previous run left behind;
+        # reading it also proves the tokens are still accepted
+        cursor = conn.cursor()
+        cursor.execute("SELECT CURRENT_ROLE(), CURRENT_WAREHOUSE(), CURRENT_DATABASE(), CURRENT_SCHEMA()")
+        current = dict(zip(('role', 'warehouse', 'database', 'schema'), cursor.fetchone()))
+        cursor.close()
+        print("Resumed cached Snowflake session")
+        return conn, current
+    except Exception as e:
+        print(f"Cached Snowflake session rejected, logging in again: {e}")
+        return None, None
+
+
+def _time_first_query():
+    """
+    Run in a child process: cold start up to the first query result
+    """
+    from snowflake_pool import connect_to_snowflake
+
+    conn = connect_to_snowflake()
+    cursor = conn.cursor()
+    cursor.execute("SELECT 1")
+    cursor.fetchone()
+    cursor.close()
+    conn.close()
+
+
+def benchmark(runs=5):
+    """
+    Compare cold-start-to-first-query latency with and without cached tokens
+    """
+    import statistics
+    import subprocess
+
+    command = [sys.executable, os.path.abspath(__file__), '--first-query']
+    cwd = os.path.dirname(os.path.abspath(__file__))
+
+    def timed_run():
+        start = time.perf_counter()
+        subprocess.run(command, cwd=cwd, check=True, stdout=subprocess.DEVNULL)
+        return time.perf_counter() - start
+
+    cold, warm = [], []
+    for _ in range(runs):
+        clear_tokens()
+        cold.append(timed_run())
+        warm.append(timed_run())
+
+    cold_median = statistics.median(cold)
+    warm_median = statistics.median(warm)
+    print(f"Full login     : median {cold_median:.2f}s over {runs} runs")
+    print(f"Cached tokens  : median {warm_median:.2f}s over {runs} runs")
+    print(f"Improvement    : {cold_median - warm_median:.2f}s ({(1 - warm_median / cold_median) * 100:.0f}%)")
+
+
+if __name__ == "__main__":
+    if '--first-query' in sys.argv:
+        _time_first_query()
+    elif '--clear' in sys.argv:
+        print(f"Removed {clear_tokens()} cached token file(s)")
+    elif '--benchmark' in sys.argv:
+        args = [arg for arg in sys.argv[1:] if arg.isdigit()]
+        benchmark(int(args[0]) if args else 5)
+    else:
+        print(__doc__)
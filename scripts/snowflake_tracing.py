@@ -0,0 +1,341 @@
+"""
+Per-query tracing for Snowflake cursors
+When SNOWFLAKE_TRACE is set, every pooled cursor records one JSON line per
+statement: normalised SQL fingerprint, query ID, client-side latency split
+into submit/execute/fetch, rows and (estimated) bytes fetched, and the
+calling script. Records go to a size-rotated JSONL file.
+
+SNOWFLAKE_TRACE=1 writes to <CACHE_DIR>/traces/queries.jsonl; any other
+value is used as the trace file path.
+
+Usage:
+    python snowflake_tracing.py summarize [trace.jsonl] [--script NAME]
+"""
+
+import atexit
+import json
+import logging
+import math
+import os
+import re
+import sys
+import threading
+import time
+from logging.handlers import RotatingFileHandler
+
+from snowflake_config import CACHE_DIR, get_settings
+
+DEFAULT_TRACE_FILE = os.path.join(CACHE_DIR, 'traces', 'queries.jsonl')
+TRACE_MAX_BYTES = 10 * 1024 * 1024
+TRACE_BACKUPS = 5
+
+# Bytes fetched are estimated from this many rows and scaled to the row count
+BYTES_SAMPLE_ROWS = 100
+
+# Modules whose frames are skipped when looking for the calling code
+_INTERNAL_MODULES = ('snowflake_tracing.py', 'snowflake_session.py', 'snowflake_pool.py', 'snowflake_async.py')
+
+_logger = None
+_logger_lock = threading.Lock()
+
+# Async submissions waiting for their results: query_id -> (submitted_at, record);
+# submitted and collected from any thread
+_pending_async = {}
+_pending_lock = threading.Lock()
+
+_COMMENT = re.compile(r'--[^\n]*|/\*.*?\*/', re.S)
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'(?<![\w.])-?\d+(?:\.\d+)?(?![\w.])')
+_IN_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """
+    Normalise SQL so statements that differ only in literals group together
+    """
+    text = _COMMENT.sub(' ', sql)
+    text = _STRING.sub('?', text)
+    text = _NUMBER.sub('?', text)
+    text = _IN_LIST.sub('(?)', text)
+    text = _WHITESPACE.sub(' ', text).strip().rstrip(';').strip()
+    return text.upper()
+
+
+def trace_path():
+    value = get_settings().trace
+    if value is None:
+        return None
+    return DEFAULT_TRACE_FILE if value == '1' else value
+
+
+def tracing_enabled():
+    return trace_path() is not None
+
+
+def _get_logger():
+    global _logger
+    with _logger_lock:
+        if _logger is None:
+            path = trace_path()
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            handler = RotatingFileHandler(path, maxBytes=TRACE_MAX_BYTES, backupCount=TRACE_BACKUPS, encoding='utf-8')
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            logger = logging.getLogger('snowflake_trace')
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            logger.addHandler(handler)
+            _logger = logger
+        return _logger
+
+
+def _caller():
+    """
+    First frame outside the shared connection modules, as file:function:line
+    """
+    frame = sys._getframe(2)
+    while frame is not None and os.path.basename(frame.f_code.co_filename) in _INTERNAL_MODULES:
+        frame = frame.f_back
+    if frame is None:
+        return None
+    return f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_code.co_name}:{frame.f_lineno}"
+
+
+def _estimate_bytes(rows):
+    sample = rows[:BYTES_SAMPLE_ROWS]
+    if not sample:
+        return 0
+    sampled = sum(len(str(value)) for row in sample for value in row)
+    return int(sampled * len(rows) / len(sample))
+
+
+def write_record(record):
+    _get_logger().info(json.dumps(record, default=str))
+
+
+class TracingCursor:
+    """
+    Cursor wrapper that records one trace line per executed statement
+    """
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self._record = None
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def _start(self, sql):
+        self._flush()
+        self._record = {
+            'ts': time.time(),
+            'script': os.path.basename(sys.argv[0]) if sys.argv and sys.argv[0] else None,
+            'caller': _caller(),
+            'fingerprint': fingerprint(sql),
+            'sql': sql[:500],
+            'query_id': None,
+            'submit_ms': None,
+            'execute_ms': None,
+            'fetch_ms': 0.0,
+            'rows': 0,
+            'bytes_fetched': 0,
+            'error': None,
+        }
+        return self._record
+
+    def _flush(self):
+        if self._record is not None:
+            write_record(self._record)
+            self._record = None
+
+    def execute(self, command, *args, **kwargs):
+        record = self._start(command)
+        start = time.perf_counter()
+        try:
+            result = self._cursor.execute(command, *args, **kwargs)
+        except Exception as e:
+            record['error'] = str(e)[:500]
+            record['query_id'] = getattr(self._cursor, 'sfqid', None)
+            raise
+        finally:
+            # A synchronous execute() is one round trip: submit and server
+            # execution are not separable client-side, so both land in execute_ms
+            record['execute_ms'] = round((time.perf_counter() - start) * 1000, 3)
+        record['query_id'] = self._cursor.sfqid
+        return self if result is self._cursor else result
+
+    def execute_async(self, command, *args, **kwargs):
+        record = self._start(command)
+        start = time.perf_counter()
+        try:
+            result = self._cursor.execute_async(command, *args, **kwargs)
+        except Exception as e:
+            record['error'] = str(e)[:500]
+            self._flush()
+            raise
+        record['submit_ms'] = round((time.perf_counter() - start) * 1000, 3)
+        record['query_id'] = self._cursor.sfqid
+        # Finished by whichever cursor later collects the results
+        with _pending_lock:
+            _pending_async[record['query_id']] = (time.perf_counter(), record)
+        self._record = None
+        return result
+
+    def get_results_from_sfqid(self, query_id, *args, **kwargs):
+        with _pending_lock:
+            pending = _pending_async.pop(query_id, None)
+        try:
+            return self._cursor.get_results_from_sfqid(query_id, *args, **kwargs)
+        finally:
+            if pending is not None:
+                submitted_at, record = pending
+                record['execute_ms'] = round((time.perf_counter() - submitted_at) * 1000, 3)
+                self._flush()
+                self._record = record
+
+    def _fetched(self, start, rows):
+        if self._record is not None:
+            self._record['fetch_ms'] = round(self._record['fetch_ms'] + (time.perf_counter() - start) * 1000, 3)
+            self._record['rows'] += len(rows)
+            self._record['bytes_fetched'] += _estimate_bytes(rows)
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = self._cursor.fetchone()
+        self._fetched(start, [row] if row is not None else [])
+        return row
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        rows = self._cursor.fetchmany(size) if size is not None else self._cursor.fetchmany()
+        self._fetched(start, rows)
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = self._cursor.fetchall()
+        self._fetched(start, rows)
+        return rows
+
+    def __iter__(self):
+        while True:
+            row = self.fetchone()
+            if row is None:
+                return
+            yield row
+
+    def close(self):
+        self._flush()
+        return self._cursor.close()
+
+    def __del__(self):
+        # Many scripts return without closing their cursor
+        try:
+            self._flush()
+        except Exception:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+@atexit.register
+def _flush_pending_async():
+    """
+    Record async submissions whose results were never collected
+    """
+    with _pending_lock:
+        records = [record for _, record in _pending_async.values()]
+        _pending_async.clear()
+    for record in records:
+        write_record(record)
+
+
+def wrap_cursor(cursor):
+    """
+    Wrap a cursor for tracing when SNOWFLAKE_TRACE is set
+    """
+    return TracingCursor(cursor) if tracing_enabled() else cursor
+
+
+def load_trace(path):
+    """
+    Read a trace file together with its rotated backups, oldest first
+    """
+    paths = [f"{path}.{i}" for i in range(TRACE_BACKUPS, 0, -1)] + [path]
+    records = []
+    for candidate in paths:
+        if not os.path.exists(candidate):
+            continue
+        with open(candidate, encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    records.append(json.loads(line))
+    return records
+
+
+def percentile(values, pct):
+    """
+    Nearest-rank percentile of a list of numbers
+    """
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def summarize(records):
+    """
+    Aggregate trace records into per-fingerprint latency statistics
+    """
+    groups = {}
+    for record in records:
+        groups.setdefault(record['fingerprint'], []).append(record)
+
+    summary = []
+    for fp, group in groups.items():
+        totals = [(r.get('submit_ms') or 0) + (r.get('execute_ms') or 0) + (r.get('fetch_ms') or 0) for r in group]
+        summary.append({
+            'fingerprint': fp,
+            'count': len(group),
+            'errors': sum(1 for r in group if r.get('error')),
+            'p50_ms': round(percentile(totals, 50), 1),
+            'p95_ms': round(percentile(totals, 95), 1),
+            'total_ms': round(sum(totals), 1),
+            'rows': sum(r.get('rows') or 0 for r in group),
+            'scripts': sorted({r.get('script') or '?' for r in group}),
+        })
+    return sorted(summary, key=lambda s: -s['total_ms'])
+
+
+def print_summary(summary):
+    print(f"{'Count':>6} {'p50 ms':>9} {'p95 ms':>9} {'Total ms':>10} {'Rows':>8}  Fingerprint")
+    print("-" * 110)
+    for row in summary:
+        errors = f" [{row['errors']} errors]" if row['errors'] else ''
+        print(f"{row['count']:>6} {row['p50_ms']:>9} {row['p95_ms']:>9} {row['total_ms']:>10} {row['rows']:>8}  "
+              f"{row['fingerprint'][:70]}{errors}")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if not args or args[0] != 'summarize':
+        print(__doc__)
+        sys.exit(1)
+    args = args[1:]
+    script = None
+    if '--script' in args:
+        script = args.pop(args.index('--script') + 1)
+        args.remove('--script')
+    path = args[0] if args else (trace_path() or DEFAULT_TRACE_FILE)
+    records = load_trace(path)
+    if script:
+        records = [r for r in records if r.get('script') == script]
+    if not records:
+        print(f"No trace records found in {path}")
+        sys.exit(1)
+    print(f"{len(records)} statements traced in {path}\n")
+    print_summary(summarize(records))
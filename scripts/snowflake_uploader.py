@@ -0,0 +1,445 @@
+"""
+Chunked, compressed, parallel PUT + COPY uploader
+Pushes local CSV and Parquet extracts into an internal stage and loads them
+with a single COPY. COPY loads a stage fastest from many files of roughly
+100-250 MB compressed, one per load thread, and PUT sends one file on one
+thread, so large files are split first:
+
+- CSV is split on record boundaries (a quoted newline stays inside its
+  record), the header is repeated in every chunk, and each chunk is written
+  through a streaming gzip encoder - or zstd, with the optional zstandard
+  package installed.
+- Parquet is split by record batches (pyarrow) into chunk files that carry
+  their own column compression, since PUT does not compress Parquet.
+
+Each chunk is handed to one of up to max_workers PUT threads, each on its
+own pooled connection, as soon as it is written, and deleted once staged.
+Splitting waits while 2 x max_workers chunks are queued, and reading and
+compressing work a block (or a record batch) at a time, so peak memory
+stays flat however large the input is. All chunks of one upload go under
+one stage prefix, which the COPY (snowflake_loader.py) then loads.
+
+Given a registered table schema (snowflake_schemas.py), the files are
+checked against it locally first - column count, types, NOT NULL - and
+nothing is staged if any of them would fail the COPY.
+
+Usage:
+    python snowflake_uploader.py FILE [FILE ...] --stage db.schema.stage --table db.schema.table
+        [--schema truck] [--chunk-mb 512] [--workers 4] [--compression gzip|zstd|none] [--no-header]
+    python snowflake_uploader.py [--rows 40000]
+
+Without files it benchmarks a generated truck extract against the stage of
+the current backend. Against the local stand-in (SNOWFLAKE_PROFILE=offline)
+there is no network to overlap, so it measures what the client spends on
+splitting and compressing, and shows that peak memory stays flat.
+"""
+
+import csv
+import gzip
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from lazy_imports import lazy_import
+from snowflake_executor import run_statement
+from snowflake_load_report import load_metrics
+from snowflake_loader import TableLoad, load_table
+from snowflake_pool import get_pool
+from snowflake_query_tags import query_step
+from snowflake_rows import named_rows
+from snowflake_schemas import columns_sql, table_schema, validate_files
+
+pq = lazy_import('pyarrow.parquet')
+
+DEFAULT_WORKERS = 4
+
+# Input bytes per chunk: CSV gzips 2-4x, which lands chunks in the 100-250 MB COPY loads fastest
+DEFAULT_CHUNK_BYTES = 512 * 1024 * 1024
+
+# Read and write block size; together with one record batch this bounds what a chunk holds in memory
+BLOCK_SIZE = 1024 * 1024
+
+COMPRESSION_LEVELS = {'gzip': 6, 'zstd': 3}
+EXTENSIONS = {'gzip': '.gz', 'zstd': '.zst', 'none': ''}
+
+# Parquet chunks compress their own columns; 'none' keeps Snowflake's default, snappy
+PARQUET_CODECS = {'gzip': 'gzip', 'zstd': 'zstd', 'none': 'snappy'}
+PARQUET_BATCH_ROWS = 65536
+
+# Threads the connector uses for one PUT's own transfer
+PUT_PARALLEL = 4
+
+BENCHMARK_ROWS = 40000
+BENCHMARK_STAGE = 'tasty_bytes_sample_data.public.upload_stage'
+BENCHMARK_TABLE = 'tasty_bytes_sample_data.public.upload_benchmark'
+
+
+class UploadResult:
+    """
+    What one upload staged and loaded, and where the time went. split and
+    PUT seconds are summed over threads; stage_seconds is the wall-clock
+    time of splitting and PUT together, wall_seconds that plus the COPY.
+    """
+
+    def __init__(self, stage, prefix, copy_options):
+        self.stage = stage
+        self.prefix = prefix
+        self.copy_options = copy_options
+        self.files = 0
+        self.chunks = 0
+        self.input_bytes = 0
+        self.staged_bytes = 0
+        self.split_seconds = 0.0
+        self.put_seconds = 0.0
+        self.stage_seconds = 0.0
+        self.wall_seconds = 0.0
+        self.put_rows = []
+        self.load = None
+
+    @property
+    def location(self):
+        return f"@{self.stage}/{self.prefix}/"
+
+    @property
+    def staging_megabytes_per_second(self):
+        return self.input_bytes / 1024 / 1024 / self.stage_seconds if self.stage_seconds else 0.0
+
+    @property
+    def megabytes_per_second(self):
+        return self.input_bytes / 1024 / 1024 / self.wall_seconds if self.wall_seconds else 0.0
+
+
+def _rows(cursor):
+    try:
+        return named_rows(cursor.fetchall(), cursor.description) if cursor.description else []
+    finally:
+        cursor.close()
+
+
+def _open_chunk(path, compression):
+    """
+    A binary writer that compresses as it goes
+    """
+    if compression == 'gzip':
+        return gzip.open(path, 'wb', compresslevel=COMPRESSION_LEVELS['gzip'])
+    if compression == 'zstd':
+        try:
+            import zstandard
+        except ImportError:
+            raise ValueError("zstd compression needs the zstandard package (pip install zstandard)") from None
+        return zstandard.open(path, 'wb', cctx=zstandard.ZstdCompressor(level=COMPRESSION_LEVELS['zstd']))
+    if compression == 'none':
+        return open(path, 'wb')
+    raise ValueError(f"Unknown compression '{compression}'. Choose from: {', '.join(EXTENSIONS)}")
+
+
+def _csv_records(f):
+    """
+    Lines of a CSV joined into whole records: a line that leaves a quote
+    open continues on the next ("" inside a field counts twice, so it never
+    changes the parity)
+    """
+    record, quotes = [], 0
+    for line in f:
+        record.append(line)
+        quotes += line.count(b'"')
+        if quotes % 2 == 0:
+            yield b''.join(record)
+            record, quotes = [], 0
+    if record:
+        yield b''.join(record)
+
+
+def _chunk_name(path, index, extension):
+    stem = os.path.basename(path)
+    for suffix in ('.gz', '.csv', '.parquet'):
+        if stem.lower().endswith(suffix):
+            stem = stem[:-len(suffix)]
+    return f"{stem}_{index:04d}{extension}"
+
+
+def split_csv(path, out_dir, chunk_bytes=DEFAULT_CHUNK_BYTES, compression='gzip', header=True):
+    """
+    Write path as compressed chunks of about chunk_bytes of input each into
+    out_dir, one at a time; yields (chunk path, input bytes) as each is closed
+    """
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rb') as source:
+        records = _csv_records(source)
+        first = next(records, None) if header else None
+        index, chunk, written = 0, None, 0
+        for record in records:
+            if chunk is None:
+                chunk_path = os.path.join(out_dir, _chunk_name(path, index, '.csv' + EXTENSIONS[compression]))
+                chunk = _open_chunk(chunk_path, compression)
+                if first is not None:
+                    chunk.write(first)
+            chunk.write(record)
+            written += len(record)
+            if written >= chunk_bytes:
+                chunk.close()
+                yield chunk_path, written
+                index, chunk, written = index + 1, None, 0
+        if chunk is not None:
+            chunk.close()
+            yield chunk_path, written
+
+
+def split_parquet(path, out_dir, chunk_bytes=DEFAULT_CHUNK_BYTES, compression='gzip'):
+    """
+    Rewrite path as Parquet chunks of about chunk_bytes of uncompressed data
+    each; yields (chunk path, input bytes) as each is closed
+    """
+    source = pq.ParquetFile(path)
+    index, writer, written = 0, None, 0
+    for batch in source.iter_batches(batch_size=PARQUET_BATCH_ROWS):
+        if writer is None:
+            chunk_path = os.path.join(out_dir, _chunk_name(path, index, '.parquet'))
+            writer = pq.ParquetWriter(chunk_path, source.schema_arrow, compression=PARQUET_CODECS[compression])
+        writer.write_batch(batch)
+        written += batch.nbytes
+        if written >= chunk_bytes:
+            writer.close()
+            yield chunk_path, written
+            index, writer, written = index + 1, None, 0
+    if writer is not None:
+        writer.close()
+        yield chunk_path, written
+
+
+def split_file(path, out_dir, chunk_bytes=DEFAULT_CHUNK_BYTES, compression='gzip', header=True):
+    if path.lower().endswith('.parquet'):
+        return split_parquet(path, out_dir, chunk_bytes, compression)
+    return split_csv(path, out_dir, chunk_bytes, compression, header)
+
+
+def default_copy_options(paths, header=True):
+    """
+    FILE_FORMAT for the chunks split_file() writes from paths
+    """
+    kinds = {path.lower().endswith('.parquet') for path in paths}
+    if len(kinds) > 1:
+        raise ValueError("One upload loads one file format; upload CSV and Parquet files separately")
+    if kinds == {True}:
+        return "FILE_FORMAT = (TYPE = PARQUET) MATCH_BY_COLUMN_NAME = CASE_INSENSITIVE"
+    return f"FILE_FORMAT = (TYPE = CSV SKIP_HEADER = {1 if header else 0} FIELD_OPTIONALLY_ENCLOSED_BY = '\"')"
+
+
+def stage_files(paths, stage, config=None, max_workers=DEFAULT_WORKERS, chunk_bytes=DEFAULT_CHUNK_BYTES,
+                compression='gzip', header=True, **overrides):
+    """
+    Split, compress and PUT local files into a fresh prefix of an internal
+    stage (created if missing) on up to max_workers pooled connections.
+    Returns an UploadResult; raises the first PUT error.
+    """
+    paths = list(paths)
+    stage = stage.lstrip('@').rstrip('/')
+    result = UploadResult(stage, f"upload_{uuid.uuid4().hex[:8]}", default_copy_options(paths, header))
+    pool = get_pool(config, **overrides)
+    pool.ensure_capacity(max_workers)
+    start = time.perf_counter()
+
+    with pool.connection() as conn, query_step('create_stage'):
+        _rows(run_statement(conn, f"CREATE STAGE IF NOT EXISTS {stage}"))
+
+    # Chunks written but not yet staged; splitting waits for a free slot
+    slots = threading.BoundedSemaphore(2 * max_workers)
+    lock = threading.Lock()
+
+    def put(chunk_path):
+        try:
+            started = time.perf_counter()
+            location = chunk_path.replace(os.sep, '/')
+            with pool.connection() as conn, query_step('put'):
+                rows = _rows(run_statement(
+                    conn, f"PUT 'file://{location}' {result.location} AUTO_COMPRESS = FALSE OVERWRITE = TRUE "
+                          f"PARALLEL = {PUT_PARALLEL}", idempotent=True))
+            with lock:
+                result.put_seconds += time.perf_counter() - started
+                result.staged_bytes += os.path.getsize(chunk_path)
+                result.put_rows.extend(rows)
+        finally:
+            os.remove(chunk_path)
+            slots.release()
+
+    futures = []
+    with tempfile.TemporaryDirectory(prefix='snowflake_upload_') as out_dir, \
+            ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for path in paths:
+            result.files += 1
+            chunks = split_file(path, out_dir, chunk_bytes, compression, header)
+            while not any(future.done() and future.exception() for future in futures):
+                slots.acquire()
+                started = time.perf_counter()
+                chunk = next(chunks, None)
+                result.split_seconds += time.perf_counter() - started
+                if chunk is None:
+                    slots.release()
+                    break
+                result.chunks += 1
+                result.input_bytes += chunk[1]
+                futures.append(executor.submit(put, chunk[0]))
+            chunks.close()
+    for future in futures:
+        future.result()
+    result.stage_seconds = result.wall_seconds = time.perf_counter() - start
+    return result
+
+
+def copy_upload(result, table, config=None, columns=None, copy_options=None, **overrides):
+    """
+    Load everything an upload staged into table with one COPY, creating the
+    table from columns first if given. As in load_tables(), a COPY that
+    raises leaves result.load failed with its error; per-file outcomes
+    (PARTIALLY_LOADED, LOAD_FAILED) are in result.load.reports.
+    """
+    pool = get_pool(config, **overrides)
+    load = {'table': table, 'stage': result.location, 'columns': columns,
+            'copy_options': copy_options or result.copy_options}
+    result.load = TableLoad(load)
+    # Offsets into the upload, as load_tables() times tables from the start of its run
+    start = time.perf_counter() - result.wall_seconds
+    result.load.started = time.perf_counter() - start
+    try:
+        with pool.connection() as conn:
+            # An empty manifest makes load_table() LIST the chunks, so the reports carry their sizes
+            load_table(conn, load, result.load, previous={})
+        result.load.status = 'loaded'
+    except Exception as e:
+        result.load.error = e
+        result.load.status = 'failed'
+    finally:
+        result.load.finished = time.perf_counter() - start
+    result.wall_seconds += result.load.duration
+    return result
+
+
+def upload_files(paths, stage, table=None, config=None, max_workers=DEFAULT_WORKERS,
+                 chunk_bytes=DEFAULT_CHUNK_BYTES, compression='gzip', header=True, columns=None,
+                 copy_options=None, schema=None, **overrides):
+    """
+    stage_files() and then, given a table, copy_upload(). With schema (a
+    registered table schema) the files are validated first - raising
+    ValueError before anything is staged - and the table is created from it
+    unless columns are given.
+    """
+    if schema:
+        validate_files(paths, schema, skip_header=1 if header else 0)
+        columns = columns or columns_sql(schema)
+    result = stage_files(paths, stage, config, max_workers, chunk_bytes, compression, header, **overrides)
+    if table:
+        copy_upload(result, table, config, columns, copy_options, **overrides)
+    return result
+
+
+def print_upload(result):
+    mb = 1024 * 1024
+    print(f"\nStaged {result.files} file(s) as {result.chunks} chunk(s) under {result.location}")
+    print(f"Input:        {result.input_bytes / mb:.1f} MB, staged {result.staged_bytes / mb:.1f} MB "
+          f"({result.input_bytes / result.staged_bytes if result.staged_bytes else 0:.1f}x compression)")
+    print(f"Staging:      {result.stage_seconds:.2f}s ({result.staging_megabytes_per_second:.1f} MB/s); "
+          f"split {result.split_seconds:.2f}s and PUT {result.put_seconds:.2f}s over all threads")
+    if result.load is not None and result.load.status != 'loaded':
+        print(f"COPY:         {result.load.status} after {result.load.duration:.2f}s: {result.load.error}")
+    elif result.load is not None:
+        metrics = load_metrics(result.load.reports, result.load.copy_seconds)
+        print(f"COPY:         {result.load.rows_loaded} rows from {result.load.files} file(s) "
+              f"in {result.load.duration:.2f}s ({metrics['mb_per_second'] or 0:.1f} MB/s staged)")
+        for report in result.load.reports:
+            if report.status not in ('LOADED', 'LOAD_SKIPPED'):
+                print(f"  {report}")
+    print(f"Wall-clock:   {result.wall_seconds:.2f}s ({result.megabytes_per_second:.1f} MB/s)")
+
+
+def write_benchmark_extract(path, rows):
+    """
+    A truck-shaped CSV with a header, written row by row
+    """
+    cities = [('Cairo', 'Cairo Governorate', 'EG-C', 'Egypt', 'EG', 'EGY', '818'),
+              ('Seoul', 'Seoul Capital', 'KR-11', 'South Korea', 'KR', 'KOR', '410'),
+              ('Denver', 'Colorado', 'US-CO', 'United States', 'US', 'USA', '840')]
+    brands = [('Ice Cream', 'Freezing Point'), ('BBQ', 'Smoky BBQ'), ('Tacos', "Guac n' Roll")]
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow([column.name for column in table_schema('truck')])
+        for truck_id in range(1, rows + 1):
+            city, region, iso_region, country, iso2, iso3, numeric = cities[truck_id % len(cities)]
+            menu_type, brand = brands[truck_id % len(brands)]
+            writer.writerow([truck_id, truck_id % len(brands) + 1, city, region, iso_region, country, iso2,
+                             truck_id % 2, truck_id % 50 + 1, menu_type, iso2, iso3, numeric, brand])
+
+
+def benchmark(rows=BENCHMARK_ROWS, config=None):
+    """
+    Time one whole-file PUT against chunked parallel PUTs for extracts of
+    rows / 4 and rows rows. Peak memory is traced while splitting and PUT
+    run, not during the COPY, which the offline backend runs in this process.
+    """
+    mb = 1024 * 1024
+    results = []
+    with tempfile.TemporaryDirectory(prefix='snowflake_upload_benchmark_') as tmp:
+        for size in (rows // 4, rows):
+            path = os.path.join(tmp, f"trucks_{size}.csv")
+            write_benchmark_extract(path, size)
+            input_bytes = os.path.getsize(path)
+            # One chunk on one thread, then about 8 chunks on 4 threads
+            for label, chunk_bytes, workers in (('single PUT', input_bytes + 1, 1),
+                                                ('chunked', max(input_bytes // 8, 1), 4)):
+                tracemalloc.start()
+                result = stage_files([path], BENCHMARK_STAGE, config, max_workers=workers, chunk_bytes=chunk_bytes)
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                copy_upload(result, BENCHMARK_TABLE, config, columns=columns_sql('truck'))
+                if result.load.status != 'loaded':
+                    print(f"--- {size} rows, {label}: COPY failed: {result.load.error}")
+                results.append((size, label, workers, result, peak / mb))
+
+    print("\n" + "=" * 86)
+    print("UPLOAD BENCHMARK")
+    print("=" * 86)
+    print(f"{'Rows':>8} {'MB':>6} {'Mode':<11} {'Thr':>3} {'Chunks':>6} {'Stage s':>8} {'Stage MB/s':>10} "
+          f"{'COPY s':>7} {'Wall s':>7} {'Loaded':>8} {'Peak MB':>8}")
+    for size, label, workers, result, peak in results:
+        print(f"{size:>8} {result.input_bytes / mb:>6.1f} {label:<11} {workers:>3} {result.chunks:>6} "
+              f"{result.stage_seconds:>8.2f} {result.staging_megabytes_per_second:>10.1f} "
+              f"{result.load.duration:>7.2f} {result.wall_seconds:>7.2f} {result.load.rows_loaded:>8} {peak:>8.1f}")
+    print("\nPeak MB is the Python memory traced while splitting and staging; it should not grow with the extract.")
+    return results
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    options = {'--stage': None, '--table': None, '--chunk-mb': str(DEFAULT_CHUNK_BYTES // 1024 // 1024),
+               '--workers': str(DEFAULT_WORKERS), '--compression': 'gzip', '--rows': str(BENCHMARK_ROWS),
+               '--schema': None}
+    for option in options:
+        if option in args:
+            options[option] = args.pop(args.index(option) + 1)
+            args.remove(option)
+    header = '--no-header' not in args
+    if not header:
+        args.remove('--no-header')
+
+    if not args:
+        benchmark(int(options['--rows']))
+        sys.exit(0)
+    if not options['--stage']:
+        print("Usage: python snowflake_uploader.py FILE [FILE ...] --stage db.schema.stage [--table db.schema.table]")
+        sys.exit(1)
+    try:
+        upload = upload_files(args, options['--stage'], options['--table'], max_workers=int(options['--workers']),
+                              chunk_bytes=int(float(options['--chunk-mb']) * 1024 * 1024),
+                              compression=options['--compression'], header=header, schema=options['--schema'])
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
+    print_upload(upload)
+    if upload.load is not None and (upload.load.status != 'loaded'
+                                    or any(report.status not in ('LOADED', 'LOAD_SKIPPED')
+                                           for report in upload.load.reports)):
+        sys.exit(1)
@@ -6,11 +6,7 @@ Note: This is adapted from Jupyter notebook code to run as a Python script.
 The original code requires Jupyter notebook environment.
 """
 
-import os
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
+from snowflake_config import connection_config
 
 def create_neighborhood_pattern():
     """
@@ -74,16 +70,8 @@ def run_snowpark_ml_assignment():
             from snowflake.ml.modeling import preprocessing
             from snowflake.ml.modeling.preprocessing import LabelEncoder
             
-            # Create connection parameters from environment variables
-            params = {
-                "account": os.getenv('SNOWFLAKE_ACCOUNT'),
-                "user": os.getenv('SNOWFLAKE_USER'),
-                "password": os.getenv('SNOWFLAKE_PASSWORD'),
-                "role": os.getenv('SNOWFLAKE_ROLE', 'ACCOUNTADMIN'),
-                "warehouse": os.getenv('SNOWFLAKE_WAREHOUSE', 'COMPUTE_WH'),
-                "database": os.getenv('SNOWFLAKE_DATABASE', 'SNOWFLAKE'),
-                "schema": os.getenv('SNOWFLAKE_SCHEMA', 'PUBLIC')
-            }
+            # Create connection parameters from the shared settings
+            params = connection_config(workload='ml')
             
             # Create a Session with the necessary connection info
             session = Session.builder.configs(params).create()
@@ -3,47 +3,14 @@ Snowpipe Assignment Script
 Creates a storage integration, database, table, stage, and Snowpipe for automatic data ingestion from S3
 """
 
-import snowflake.connector
-import os
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
-
-def connect_to_snowflake():
-    """
-    Connect to Snowflake using environment variables
-    """
-    try:
-        user = os.getenv('SNOWFLAKE_USER')
-        account = os.getenv('SNOWFLAKE_ACCOUNT')
-        password = os.getenv('SNOWFLAKE_PASSWORD')
-        role = os.getenv('SNOWFLAKE_ROLE', 'ACCOUNTADMIN')
-        warehouse = os.getenv('SNOWFLAKE_WAREHOUSE', 'COMPUTE_WH')
-        
-        if not all([user, account, password]):
-            raise ValueError("Missing required environment variables. Please check your .env file.")
-        
-        conn = snowflake.connector.connect(
-            user=user,
-            account=account,
-            password=password,
-            role=role,
-            warehouse=warehouse
-        )
-        
-        print("Successfully connected to Snowflake!")
-        return conn
-        
-    except Exception as e:
-        print(f"Error connecting to Snowflake: {e}")
-        return None
+from snowflake_config import connection_config, get_settings
+from snowflake_pool import connect_to_snowflake
 
 def execute_snowpipe_assignment(aws_role_arn=None):
     """
     Execute the complete Snowpipe assignment
     """
-    conn = connect_to_snowflake()
+    conn = connect_to_snowflake(connection_config(workload='load'), database=None, schema=None)
     if not conn:
         return
     
@@ -269,7 +236,7 @@ def execute_snowpipe_assignment(aws_role_arn=None):
 
 if __name__ == "__main__":
     # You can provide the AWS Role ARN as an environment variable or pass it here
-    aws_role_arn = os.getenv('AWS_ROLE_ARN')  # Optional: set this in .env if needed
+    aws_role_arn = get_settings().aws_role_arn  # Optional: set AWS_ROLE_ARN in .env if needed
     
     print("Starting Snowpipe Assignment...")
     print("Note: If AWS Role ARN is 'REMOVED', you'll need to configure it properly.")
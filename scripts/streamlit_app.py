@@ -1,11 +1,20 @@
 # Import Python Packages
-import pandas as pd
 import streamlit as st
-from snowflake.snowpark.context import get_active_session
 import altair as alt
+# Deployed alongside the app: these modules import only the standard library up front
+from lazy_imports import lazy_import
+from snowflake_arrow import fetch_pandas
+from snowflake_params import in_array, render_literals
 
-# Get the Current Credentials
-session = get_active_session()
+# pandas and Snowpark load on first query, after the page header has rendered
+pd = lazy_import('pandas')
+snowpark = lazy_import('snowflake.snowpark')
+
+
+@st.cache_resource
+def get_session():
+    # Get the Current Credentials
+    return snowpark.context.get_active_session()
 
 # Streamlit App
 st.title(":snowflake: Tasty Bytes Streamlit App :snowflake:")
@@ -20,19 +29,23 @@ st.divider()
 
 @st.cache_data
 def get_city_sales_data(city_names: list, start_year: int = 2020, end_year: int = 2023):
+    # The cities and years are bound, so every selection reuses the same statement text
     sql = f"""
         SELECT
             date,
             primary_city,
             SUM(order_total) AS sum_orders
         FROM tasty_bytes.analytics.orders_v
-        WHERE primary_city in ({city_names})
-            and year(date) between {start_year} and {end_year}
+        WHERE {in_array('primary_city')}
+            and year(date) between ? and ?
         GROUP BY date, primary_city
         ORDER BY date DESC
     """
-    sales_data = session.sql(sql).to_pandas()
-    return sales_data, sql
+    params = [list(city_names), start_year, end_year]
+    # Arrow batches keep DATE and the order sum as native datetime/float columns
+    sales_data = fetch_pandas(get_session(), sql, params)
+    # Shown with the values the query was run with
+    return sales_data, render_literals(sql, params)
 
 @st.cache_data
 def get_unique_cities():
@@ -41,13 +54,10 @@ def get_unique_cities():
         FROM tasty_bytes.analytics.orders_v
         ORDER BY primary_city
     """
-    city_data = session.sql(sql).to_pandas()
+    city_data = fetch_pandas(get_session().sql(sql))
     return city_data
 
-def get_city_sales_chart(sales_data: pd.DataFrame):
-    sales_data["SUM_ORDERS"] = pd.to_numeric(sales_data["SUM_ORDERS"])
-    sales_data["DATE"] = pd.to_datetime(sales_data["DATE"])
-    
+def get_city_sales_chart(sales_data: "pd.DataFrame"):
     # Create an Altair chart object
     chart = (
         alt.Chart(sales_data)
@@ -80,14 +90,7 @@ with second_col:
         default="Cairo",
     )
 
-if len(selected_city) == 0:
-    city_selection = ""
-else:
-    city_selection = selected_city
-
-city_selection_list = ("'" + "','".join(city_selection) + "'") if city_selection else ""
-
-sales_data, sales_sql = get_city_sales_data(city_selection_list, start_year, end_year)
+sales_data, sales_sql = get_city_sales_data(selected_city, start_year, end_year)
 sales_fig = get_city_sales_chart(sales_data)
 
 chart_tab, dataframe_tab, query_tab = st.tabs(["Chart", "Raw Data", "SQL Query"])
@@ -1,73 +1,13 @@
-import snowflake.connector
-from snowflake.connector import DictCursor
-import os
-from dotenv import load_dotenv
+from snowflake_config import TASTY_BYTES_CONFIG
+from snowflake_executor import execute_query
+from snowflake_pool import connect_to_snowflake
 
-# Load environment variables
-load_dotenv()
-
-def connect_to_snowflake():
-    """
-    Connect to Snowflake using password authentication
-    """
-    try:
-        # Get credentials from environment variables
-        user = os.getenv('SNOWFLAKE_USER')
-        password = os.getenv('SNOWFLAKE_PASSWORD')
-        account = os.getenv('SNOWFLAKE_ACCOUNT')
-        role = os.getenv('SNOWFLAKE_ROLE', 'ACCOUNTADMIN')
-        warehouse = os.getenv('SNOWFLAKE_WAREHOUSE', 'COMPUTE_WH')
-        database = os.getenv('SNOWFLAKE_DATABASE', 'tasty_bytes_sample_data')
-        schema = os.getenv('SNOWFLAKE_SCHEMA', 'raw_pos')
-        
-        if not all([user, password, account]):
-            raise ValueError("Missing required environment variables. Please check your .env file.")
-        
-        conn = snowflake.connector.connect(
-            user=user,
-            password=password,
-            account=account,
-            role=role,
-            warehouse=warehouse,
-            database=database,
-            schema=schema
-        )
-        print("Successfully connected to Snowflake!")
-        return conn
-    except Exception as e:
-        print(f"Error connecting to Snowflake: {e}")
-        return None
-
-def execute_query(conn, query, description):
-    """
-    Execute a query and return results
-    """
-    try:
-        cursor = conn.cursor()
-        print(f"\n--- {description} ---")
-        print(f"Query: {query}")
-        
-        cursor.execute(query)
-        results = cursor.fetchall()
-        
-        if results:
-            print(f"Results: {results}")
-            return results
-        else:
-            print("Query executed successfully (no results to display)")
-            return []
-        
-        cursor.close()
-        
-    except Exception as e:
-        print(f"Error executing query: {e}")
-        return []
 
 def answer_table_questions():
     """
     Answer the Snowflake table management questions by executing SQL commands
     """
-    conn = connect_to_snowflake()
+    conn = connect_to_snowflake(TASTY_BYTES_CONFIG)
     if not conn:
         return
     
@@ -102,10 +42,9 @@ def answer_table_questions():
     if results1:
         print("Analyzing bytes column...")
         for row in results1:
-            if 'test_table' in str(row).lower():
-                # Find the bytes column (typically index 4)
+            if row['name'].lower() == 'test_table':
                 try:
-                    bytes_value = row[4] if len(row) > 4 else None
+                    bytes_value = row['bytes']
                     print(f"\nAnswer for Question 1: bytes = {bytes_value}")
                     if bytes_value == 1536:
                         print("✅ Correct! Answer is 1536")
@@ -140,10 +79,9 @@ def answer_table_questions():
     if results2:
         print("Analyzing bytes column for test_table2...")
         for row in results2:
-            if 'test_table2' in str(row).lower():
-                # Find the bytes column (typically index 4)
+            if row['name'].lower() == 'test_table2':
                 try:
-                    bytes_value = row[4] if len(row) > 4 else None
+                    bytes_value = row['bytes']
                     print(f"\nAnswer for Question 2: bytes = {bytes_value}")
                     if bytes_value == 2048:
                         print("✅ Correct! Answer is 2048")
@@ -1,62 +1,18 @@
-import snowflake.connector
-from snowflake.connector import DictCursor
-import pandas as pd
-from snowflake_config import SNOWFLAKE_CONFIG
+import sys
 
-def connect_to_snowflake():
-    """
-    Connect to Snowflake using the configuration
-    """
-    try:
-        # Use environment variables for secure connection
-        conn = snowflake.connector.connect(
-            user=SNOWFLAKE_CONFIG['user'],
-            account=SNOWFLAKE_CONFIG['account'],
-            password=SNOWFLAKE_CONFIG['password'],
-            role=SNOWFLAKE_CONFIG['role'],
-            warehouse=SNOWFLAKE_CONFIG['warehouse'],
-            database=SNOWFLAKE_CONFIG['database'],
-            schema=SNOWFLAKE_CONFIG['schema']
-        )
-        print("Successfully connected to Snowflake!")
-        return conn
-    except Exception as e:
-        print(f"Error connecting to Snowflake: {e}")
-        return None
-
-def execute_sql_script(conn, sql_script, description):
-    """
-    Execute a SQL script and return results
-    """
-    try:
-        cursor = conn.cursor()
-        print(f"\n--- {description} ---")
-        print(f"Executing: {sql_script[:100]}...")
-        
-        cursor.execute(sql_script)
-        
-        # Try to fetch results if it's a SELECT statement
-        try:
-            results = cursor.fetchall()
-            if results:
-                print(f"Results: {results}")
-            else:
-                print("Query executed successfully (no results to display)")
-        except:
-            print("Query executed successfully (no results to display)")
-        
-        cursor.close()
-        return True
-        
-    except Exception as e:
-        print(f"Error executing SQL: {e}")
-        return False
+from snowflake_async import AsyncQueryRunner
+from snowflake_config import connection_config
+from snowflake_executor import compare_batch_modes, execute_batch
+from snowflake_loader import load_tables, raw_pos_loads
+from snowflake_pool import connect_to_snowflake
+from snowflake_schemas import create_table_sql
 
-def setup_tasty_bytes_data():
+def setup_tasty_bytes_data(compare_batch=False, incremental=False):
     """
-    Complete setup for Tasty Bytes sample data
+    Complete setup for Tasty Bytes sample data; incremental keeps the
+    database and menu table and copies only new stage files into it
     """
-    conn = connect_to_snowflake()
+    conn = connect_to_snowflake(connection_config(workload='load'))
     if not conn:
         return False
     
@@ -71,28 +27,17 @@ def setup_tasty_bytes_data():
             "description": "Setting warehouse to compute_wh"
         },
         {
-            "sql": "CREATE OR REPLACE DATABASE tasty_bytes_sample_data;",
+            "sql": ("CREATE DATABASE IF NOT EXISTS tasty_bytes_sample_data;" if incremental
+                    else "CREATE OR REPLACE DATABASE tasty_bytes_sample_data;"),
             "description": "Creating Tasty Bytes database"
         },
         {
-            "sql": "CREATE OR REPLACE SCHEMA tasty_bytes_sample_data.raw_pos;",
+            "sql": ("CREATE SCHEMA IF NOT EXISTS tasty_bytes_sample_data.raw_pos;" if incremental
+                    else "CREATE OR REPLACE SCHEMA tasty_bytes_sample_data.raw_pos;"),
             "description": "Creating raw_pos schema"
         },
         {
-            "sql": """CREATE OR REPLACE TABLE tasty_bytes_sample_data.raw_pos.menu
-(
-    menu_id NUMBER(19,0),
-    menu_type_id NUMBER(38,0),
-    menu_type VARCHAR(16777216),
-    truck_brand_name VARCHAR(16777216),
-    menu_item_id NUMBER(38,0),
-    menu_item_name VARCHAR(16777216),
-    item_category VARCHAR(16777216),
-    item_subcategory VARCHAR(16777216),
-    cost_of_goods_usd NUMBER(38,4),
-    sale_price_usd NUMBER(38,4),
-    menu_item_health_metrics_obj VARIANT
-);""",
+            "sql": create_table_sql('tasty_bytes_sample_data.raw_pos.menu', 'menu') + ";",
             "description": "Creating menu table with proper structure"
         },
         {
@@ -112,12 +57,21 @@ FROM @tasty_bytes_sample_data.public.blob_stage/raw_pos/menu/;""",
         }
     ]
     
-    # Execute all SQL scripts
-    success_count = 0
-    for script in sql_scripts:
-        if execute_sql_script(conn, script["sql"], script["description"]):
-            success_count += 1
-    
+    if incremental:
+        # The loader creates the menu table only if it is missing and copies only new files
+        sql_scripts = [script for script in sql_scripts
+                       if not script["sql"].startswith(("CREATE OR REPLACE TABLE", "COPY INTO"))]
+
+    # Execute all SQL scripts as one multi-statement request
+    results = execute_batch(conn, sql_scripts)
+    success_count = sum(1 for result in results if result.ok)
+    total_count = len(results)
+
+    if incremental:
+        loads = load_tables(raw_pos_loads(['menu']), connection_config(workload='load'), incremental=True)
+        success_count += sum(1 for load in loads.values() if load.status == 'loaded')
+        total_count += len(loads)
+
     # Verification queries
     verification_queries = [
         {
@@ -146,19 +100,42 @@ ORDER BY 3 DESC;""",
             "description": "Grouping by truck brand name and menu type"
         }
     ]
+
+    if compare_batch:
+        # Timed on read-only statements only: re-running the setup would drop and reload the data
+        print("\n" + "="*50)
+        print("BATCH TIMING COMPARISON")
+        print("="*50)
+        read_only = [script["sql"] for script in sql_scripts if script["sql"].startswith(("USE ", "LIST "))]
+        compare_batch_modes(conn, read_only + [query["sql"] for query in verification_queries])
     
     print("\n" + "="*50)
     print("VERIFICATION QUERIES")
     print("="*50)
     
-    for query in verification_queries:
-        execute_sql_script(conn, query["sql"], query["description"])
+    # The verification queries are independent, so let them overlap on the warehouse
+    for index, query in enumerate(verification_queries, len(sql_scripts) + 1):
+        query["step"] = f"step{index}"
+    runner = AsyncQueryRunner(conn)
+    futures = runner.map(verification_queries)
+    for future in futures:
+        print(f"\n--- {future.description} ---")
+        print(f"Executing: {future.sql[:100]}...")
+        try:
+            results = future.result()
+            if results:
+                print(f"Results: {results}")
+            else:
+                print("Query executed successfully (no results to display)")
+        except Exception as e:
+            print(f"Error executing SQL: {e}")
     
-    print(f"\nSetup completed! {success_count}/{len(sql_scripts)} SQL scripts executed successfully.")
+    print(f"\nSetup completed! {success_count}/{total_count} SQL scripts executed successfully.")
     
     conn.close()
     return True
 
 if __name__ == "__main__":
     print("Starting Tasty Bytes Sample Data Setup...")
-    setup_tasty_bytes_data()
+    setup_tasty_bytes_data(compare_batch='--compare-batch' in sys.argv[1:],
+                           incremental='--incremental' in sys.argv[1:])
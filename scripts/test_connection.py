@@ -1,22 +1,18 @@
 import snowflake.connector
-from snowflake.connector import DictCursor
-import os
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
+from snowflake_config import get_settings
 
 def test_connection():
     """
     Test different connection methods to find the correct account format
     """
     
-    # Get credentials from environment variables
-    user = os.getenv('SNOWFLAKE_USER')
-    password = os.getenv('SNOWFLAKE_PASSWORD')
-    account = os.getenv('SNOWFLAKE_ACCOUNT')
-    role = os.getenv('SNOWFLAKE_ROLE', 'ACCOUNTADMIN')
-    warehouse = os.getenv('SNOWFLAKE_WAREHOUSE', 'COMPUTE_WH')
+    # Get credentials from the shared settings
+    settings = get_settings()
+    user = settings.user
+    password = settings.password
+    account = settings.account
+    role = settings.role
+    warehouse = settings.warehouse
     
     if not all([user, password, account]):
         print("Missing required environment variables. Please check your .env file.")
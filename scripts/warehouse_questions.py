@@ -1,73 +1,13 @@
-import snowflake.connector
-from snowflake.connector import DictCursor
-import os
-from dotenv import load_dotenv
+from snowflake_config import TASTY_BYTES_CONFIG
+from snowflake_executor import execute_query
+from snowflake_pool import connect_to_snowflake
 
-# Load environment variables
-load_dotenv()
-
-def connect_to_snowflake():
-    """
-    Connect to Snowflake using password authentication
-    """
-    try:
-        # Get credentials from environment variables
-        user = os.getenv('SNOWFLAKE_USER')
-        password = os.getenv('SNOWFLAKE_PASSWORD')
-        account = os.getenv('SNOWFLAKE_ACCOUNT')
-        role = os.getenv('SNOWFLAKE_ROLE', 'ACCOUNTADMIN')
-        warehouse = os.getenv('SNOWFLAKE_WAREHOUSE', 'COMPUTE_WH')
-        database = os.getenv('SNOWFLAKE_DATABASE', 'tasty_bytes_sample_data')
-        schema = os.getenv('SNOWFLAKE_SCHEMA', 'raw_pos')
-        
-        if not all([user, password, account]):
-            raise ValueError("Missing required environment variables. Please check your .env file.")
-        
-        conn = snowflake.connector.connect(
-            user=user,
-            password=password,
-            account=account,
-            role=role,
-            warehouse=warehouse,
-            database=database,
-            schema=schema
-        )
-        print("Successfully connected to Snowflake!")
-        return conn
-    except Exception as e:
-        print(f"Error connecting to Snowflake: {e}")
-        return None
-
-def execute_query(conn, query, description):
-    """
-    Execute a query and return results
-    """
-    try:
-        cursor = conn.cursor()
-        print(f"\n--- {description} ---")
-        print(f"Query: {query}")
-        
-        cursor.execute(query)
-        results = cursor.fetchall()
-        
-        if results:
-            print(f"Results: {results}")
-            return results
-        else:
-            print("No results found")
-            return []
-        
-        cursor.close()
-        
-    except Exception as e:
-        print(f"Error executing query: {e}")
-        return []
 
 def answer_warehouse_questions():
     """
     Answer the warehouse management questions by executing SQL commands
     """
-    conn = connect_to_snowflake()
+    conn = connect_to_snowflake(TASTY_BYTES_CONFIG)
     if not conn:
         return
     
@@ -91,15 +31,9 @@ def answer_warehouse_questions():
     if results1:
         # Find warehouse_one in the results
         for row in results1:
-            if 'warehouse_one' in str(row).lower():
-                print(f"Warehouse_one details: {row}")
-                # The size is typically in a specific column position
-                # Let's get the column names first
-                cursor = conn.cursor()
-                cursor.execute("SHOW WAREHOUSES;")
-                columns = [desc[0] for desc in cursor.description]
-                print(f"Column names: {columns}")
-                cursor.close()
+            if row['name'].lower() == 'warehouse_one':
+                print(f"Warehouse_one details: {row.as_dict()}")
+                print(f"\nAnswer for Question 1: size = {row['size']}")
                 break
     
     # Question 2: Create warehouse_two, switch to it, and check is_current
@@ -122,7 +56,7 @@ def answer_warehouse_questions():
     if results2:
         print("Analyzing is_current status...")
         for row in results2:
-            print(f"Warehouse details: {row}")
+            print(f"Warehouse {row['name']}: is_current = {row['is_current']}")
     
     # Question 3: Drop warehouse_two
     print("\n" + "="*50)
@@ -147,7 +81,7 @@ def answer_warehouse_questions():
     if results4:
         print("Analyzing size column...")
         for row in results4:
-            print(f"Warehouse details: {row}")
+            print(f"Warehouse {row['name']}: size = {row['size']}")
     
     # Question 5: Set auto_suspend to 2 minutes
     print("\n" + "="*50)
@@ -164,7 +98,7 @@ def answer_warehouse_questions():
     if results5:
         print("Analyzing auto_suspend column...")
         for row in results5:
-            print(f"Warehouse details: {row}")
+            print(f"Warehouse {row['name']}: auto_suspend = {row['auto_suspend']}")
     
     # Question 6: This is a knowledge question about warehouse sizes
     print("\n" + "="*50)
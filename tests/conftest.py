@@ -0,0 +1,38 @@
+"""
+Shared fixtures: every test runs against a fresh offline backend
+(snowflake_offline.py) in a temporary directory, never a live account.
+"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts')
+sys.path.insert(0, SCRIPTS_DIR)
+
+# Settings are read once, on the first import of snowflake_config, so set them before any script module loads
+_STATE_DIR = tempfile.mkdtemp(prefix='snowflake_tests_')
+os.environ['SNOWFLAKE_PROFILE'] = 'offline'
+os.environ['SNOWFLAKE_CACHE_DIR'] = _STATE_DIR
+os.environ['SNOWFLAKE_OFFLINE_DB'] = os.path.join(_STATE_DIR, 'offline.db')
+os.environ.pop('SNOWFLAKE_BACKEND', None)
+
+
+@pytest.fixture
+def conn():
+    """
+    A pooled connection to the offline backend, in a scratch schema that is dropped afterwards
+    """
+    from snowflake_pool import connect_to_snowflake
+
+    connection = connect_to_snowflake()
+    cursor = connection.cursor()
+    cursor.execute("CREATE OR REPLACE DATABASE test_db")
+    cursor.close()
+    yield connection
+    cursor = connection.cursor()
+    cursor.execute("DROP DATABASE IF EXISTS test_db")
+    cursor.close()
+    connection.close()
@@ -0,0 +1,62 @@
+"""
+Status polling of asynchronously submitted queries in snowflake_async.py
+"""
+
+import pytest
+
+from snowflake_async import MAX_POLL_ERRORS, AsyncQueryRunner
+from snowflake_offline import OperationalError, ProgrammingError
+
+LOST_RESPONSE = OperationalError("Failed to get the response", errno=250003, sqlstate=None)
+
+
+class FlakyStatus:
+    """
+    Wraps a connection so that the next `failures` status polls raise `error`
+    """
+
+    def __init__(self, conn, error, failures):
+        self._conn = conn
+        self.error = error
+        self.failures = failures
+        self.polls = 0
+
+    def get_query_status_throw_if_error(self, query_id):
+        self.polls += 1
+        if self.polls <= self.failures:
+            raise self.error
+        return self._conn.get_query_status_throw_if_error(query_id)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+def submit(conn, sql, error, failures):
+    future = AsyncQueryRunner(conn).submit(sql)
+    future.conn = FlakyStatus(conn, error, failures)
+    return future
+
+
+def test_transient_poll_errors_are_retried(conn):
+    future = submit(conn, "SELECT 42", LOST_RESPONSE, failures=2)
+    assert not future.done()
+    assert future.result() == [(42,)]
+    assert future.conn.polls == 3
+
+
+def test_poll_errors_are_raised_once_they_persist(conn):
+    future = submit(conn, "SELECT 42", LOST_RESPONSE, failures=MAX_POLL_ERRORS)
+    for _ in range(MAX_POLL_ERRORS - 1):
+        assert not future.done()
+    with pytest.raises(OperationalError):
+        future.done()
+    # The query was never marked finished; the next poll gets its real status
+    assert future.result() == [(42,)]
+
+
+def test_query_failure_is_the_result(conn):
+    future = AsyncQueryRunner(conn).submit("SELECT * FROM no_such_table")
+    assert future.done()
+    assert isinstance(future.exception(), ProgrammingError)
+    with pytest.raises(ProgrammingError):
+        future.result()
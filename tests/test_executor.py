@@ -0,0 +1,209 @@
+"""
+Error classification, idempotency and the circuit breaker in snowflake_executor.py
+"""
+
+import time
+
+import pytest
+
+import snowflake_executor
+from snowflake_executor import (FATAL, TRANSIENT, WAREHOUSE, CircuitBreaker, RetryPolicy, classify_error,
+                                is_idempotent, run_statement)
+from snowflake_offline import OperationalError, ProgrammingError
+
+NO_WAIT = RetryPolicy(max_attempts=3, base_delay=0)
+
+
+class FlakyConnection:
+    """
+    Wraps a connection so that the first `failures` statements raise `error`
+    before they reach the backend
+    """
+
+    def __init__(self, conn, error, failures=1):
+        self._conn = conn
+        self.error = error
+        self.failures = failures
+        self.attempts = 0
+        self.warehouse = 'FLAKY_WH'
+
+    def cursor(self):
+        return FlakyCursor(self, self._conn.cursor())
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+class FlakyCursor:
+    def __init__(self, flaky, cursor):
+        self._flaky = flaky
+        self._cursor = cursor
+        self.sfqid = None
+
+    def execute(self, *args, **kwargs):
+        self._flaky.attempts += 1
+        if self._flaky.attempts <= self._flaky.failures:
+            raise self._flaky.error
+        return self._cursor.execute(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+def offline_error(conn, sql):
+    with pytest.raises(ProgrammingError) as raised:
+        conn.cursor().execute(sql)
+    return raised.value
+
+
+def test_statement_errors_are_fatal(conn):
+    assert classify_error(offline_error(conn, "SELECT * FROM no_such_table")) == FATAL
+    assert classify_error(offline_error(conn, "SELEC 1")) == FATAL
+
+
+@pytest.mark.parametrize('error', [
+    OperationalError("Could not connect to Snowflake backend", errno=250001, sqlstate='08001'),
+    OperationalError("Failed to get the response", errno=250003, sqlstate=None),
+    OperationalError("Session token expired", errno=390114, sqlstate=None),
+    ConnectionResetError("Connection reset by peer"),
+    TimeoutError("timed out"),
+])
+def test_wire_errors_are_transient(error):
+    assert classify_error(error) == TRANSIENT
+
+
+def test_unavailable_warehouse_is_its_own_kind():
+    error = ProgrammingError("No active warehouse selected", errno=606, sqlstate='57P03')
+    assert classify_error(error) == WAREHOUSE
+
+
+@pytest.mark.parametrize('sql, expected', [
+    ("SELECT * FROM orders", True),
+    ("-- refresh\nCREATE OR REPLACE TABLE t (id INT)", True),
+    ("CREATE TABLE IF NOT EXISTS t (id INT)", True),
+    ("DROP TABLE IF EXISTS t", True),
+    ("COPY INTO t FROM @stage", True),
+    ("INSERT INTO t VALUES (1)", False),
+    ("MERGE INTO t USING s ON t.id = s.id WHEN MATCHED THEN DELETE", False),
+    ("CREATE TABLE t AS SELECT * FROM s", False),
+    ("COPY INTO @stage FROM t", False),
+    ("DELETE FROM t", False),
+])
+def test_idempotent_statements(sql, expected):
+    assert is_idempotent(sql) is expected
+
+
+def test_markers_override_the_statement():
+    assert is_idempotent("/* idempotent */ INSERT INTO t SELECT 1 WHERE NOT EXISTS (SELECT 1 FROM t)")
+    assert not is_idempotent("/* not idempotent */ SELECT SYSTEM$LOG('x')")
+
+
+def test_breaker_opens_after_threshold_and_half_opens():
+    breaker = CircuitBreaker('TEST_WH', failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.state == 'closed' and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == 'open'
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert breaker.state == 'half-open'
+    # Only the one trial statement is let through while half-open
+    assert not breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == 'open' and not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == 'closed' and breaker.failures == 0
+
+
+@pytest.fixture
+def table(conn):
+    cursor = conn.cursor()
+    cursor.execute("CREATE OR REPLACE TABLE retry_test (id INT)")
+    yield 'retry_test'
+    cursor.execute("DROP TABLE IF EXISTS retry_test")
+
+
+def count_rows(conn, table):
+    return conn.cursor().execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def test_insert_is_not_rerun_after_response_was_lost(conn, table):
+    error = OperationalError("Failed to get the response", errno=250003, sqlstate=None)
+    flaky = FlakyConnection(conn, error)
+    with pytest.raises(OperationalError):
+        run_statement(flaky, f"INSERT INTO {table} VALUES (1)", policy=NO_WAIT)
+    assert flaky.attempts == 1
+
+
+def test_insert_is_retried_when_it_was_never_sent(conn, table):
+    error = OperationalError("Could not connect to Snowflake backend", errno=250001, sqlstate='08001')
+    flaky = FlakyConnection(conn, error)
+    run_statement(flaky, f"INSERT INTO {table} VALUES (1)", policy=NO_WAIT)
+    assert flaky.attempts == 2
+    assert count_rows(conn, table) == 1
+
+
+def test_select_is_retried_after_transient_error(conn, table):
+    error = OperationalError("Failed to get the response", errno=250003, sqlstate=None)
+    flaky = FlakyConnection(conn, error, failures=2)
+    cursor = run_statement(flaky, f"SELECT COUNT(*) FROM {table}", policy=NO_WAIT)
+    assert cursor.fetchone()[0] == 0
+    assert flaky.attempts == 3
+
+
+def test_fatal_error_is_not_retried(conn):
+    flaky = FlakyConnection(conn, ProgrammingError("SQL compilation error"))
+    with pytest.raises(ProgrammingError):
+        run_statement(flaky, "SELECT 1", policy=NO_WAIT)
+    assert flaky.attempts == 1
+
+
+def test_retries_stop_at_max_attempts(conn):
+    error = OperationalError("Failed to get the response", errno=250003, sqlstate=None)
+    flaky = FlakyConnection(conn, error, failures=10)
+    retries = snowflake_executor.STATS['retries']
+    with pytest.raises(OperationalError):
+        run_statement(flaky, "SELECT 1", policy=NO_WAIT)
+    assert flaky.attempts == NO_WAIT.max_attempts
+    assert snowflake_executor.STATS['retries'] - retries == NO_WAIT.max_attempts - 1
+
+
+@pytest.mark.parametrize('statements', [
+    # All idempotent: re-run with 'stream' after the multi-statement request fails
+    ["SELECT 1", "SELECT * FROM no_such_table", "SELECT 3"],
+    # Not idempotent: every statement carries the error
+    ["INSERT INTO retry_test VALUES (1)", "SELECT * FROM no_such_table"],
+])
+def test_failed_batch_leaves_no_step_tag_on_the_session(conn, table, statements):
+    steps = [f"step_{i}" for i in range(len(statements))]
+    results = snowflake_executor.run_batch(conn, statements, steps=steps)
+    assert any(result.error is not None for result in results)
+    assert not conn.session_parameters.get('QUERY_TAG')
+
+
+def test_execute_query_always_returns_a_query_result(conn, table):
+    for sql in (f"SELECT * FROM {table}", "SELECT * FROM no_such_table"):
+        result = snowflake_executor.execute_query(conn, sql, "Empty result")
+        assert isinstance(result, snowflake_executor.QueryResult)
+        assert not result and list(result) == [] and result.preview() == []
+
+
+def test_unconsumed_streaming_result_closes_its_cursor(conn):
+    sql = "SELECT 1 UNION ALL SELECT 2 UNION ALL SELECT 3"
+    with snowflake_executor.execute_query(conn, sql, "Streamed", batch_size=2) as result:
+        assert not result.complete
+        assert [row[0] for row in result.preview()] == [1, 2]
+    with pytest.raises(RuntimeError, match='closed'):
+        list(result)
+
+    result = snowflake_executor.execute_query(conn, sql, "Abandoned", batch_size=2)
+    closed = []
+    close = result.cursor.close
+    result.cursor.close = lambda: closed.append(close())
+    del result
+    assert len(closed) == 1
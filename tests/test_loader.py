@@ -0,0 +1,88 @@
+"""
+Incremental planning and table checks in snowflake_loader.py
+"""
+
+import datetime
+
+import pytest
+
+from snowflake_loader import _table_exists, load_tables, plan_incremental
+from snowflake_offline import OperationalError
+
+STAGE = 's3://tastybytes/raw_pos/menu'
+NOW = datetime.datetime.now(datetime.timezone.utc)
+
+
+def listing(*files):
+    """
+    {name: LIST row} for (file, md5, size[, last_modified]) tuples
+    """
+    rows = {}
+    for file, md5, size, *modified in files:
+        name = f"{STAGE}/{file}"
+        rows[name] = {'name': name, 'md5': md5, 'size': size,
+                      'last_modified': (modified or [NOW - datetime.timedelta(days=1)])[0].isoformat()}
+    return rows
+
+
+def manifest(*files, loaded_on=NOW):
+    return {f"{STAGE}/{file}": {'md5': md5, 'size': size, 'loaded_on': loaded_on.isoformat()}
+            for file, md5, size in files}
+
+
+def test_first_load_plans_every_file_as_new():
+    plan = plan_incremental(listing(('a.csv', 'm1', 10), ('b.csv', 'm2', 20)), {}, history=None)
+    assert sorted(plan['new']) == [f"{STAGE}/a.csv", f"{STAGE}/b.csv"]
+    assert plan['changed'] == plan['unchanged'] == plan['removed'] == []
+
+
+def test_manifest_sorts_new_changed_unchanged_and_removed():
+    listed = listing(('a.csv', 'm1', 10), ('b.csv', 'm2-edited', 21), ('c.csv', 'm3', 30))
+    previous = manifest(('a.csv', 'm1', 10), ('b.csv', 'm2', 20), ('gone.csv', 'm9', 90))
+    plan = plan_incremental(listed, previous, history=None)
+    assert plan == {'new': [f"{STAGE}/c.csv"], 'changed': [f"{STAGE}/b.csv"],
+                    'unchanged': [f"{STAGE}/a.csv"], 'removed': [f"{STAGE}/gone.csv"]}
+
+
+def test_file_the_table_forgot_is_loaded_again():
+    # In the manifest, but the table's load history (which matches on the relative name) does not have it
+    listed = listing(('a.csv', 'm1', 10), ('b.csv', 'm2', 20))
+    previous = manifest(('a.csv', 'm1', 10), ('b.csv', 'm2', 20))
+    plan = plan_incremental(listed, previous, history={'raw_pos/menu/a.csv': NOW})
+    assert plan['unchanged'] == [f"{STAGE}/a.csv"]
+    assert plan['new'] == [f"{STAGE}/b.csv"]
+
+
+def test_history_older_than_its_retention_is_not_trusted_to_forget():
+    listed = listing(('a.csv', 'm1', 10))
+    previous = manifest(('a.csv', 'm1', 10), loaded_on=NOW - datetime.timedelta(days=30))
+    assert plan_incremental(listed, previous, history={})['unchanged'] == [f"{STAGE}/a.csv"]
+
+
+def test_history_alone_spots_a_file_modified_after_its_load():
+    loaded = NOW - datetime.timedelta(hours=2)
+    listed = listing(('a.csv', 'm1', 10, NOW - datetime.timedelta(days=1)), ('b.csv', 'm2', 20, NOW))
+    plan = plan_incremental(listed, {}, history={'a.csv': loaded, 'b.csv': loaded})
+    assert plan['unchanged'] == [f"{STAGE}/a.csv"]
+    assert plan['changed'] == [f"{STAGE}/b.csv"]
+
+
+def test_incremental_load_needs_a_manifest():
+    with pytest.raises(ValueError, match='manifest_file'):
+        load_tables([], incremental=True, manifest_file=None)
+
+
+def test_table_exists_only_treats_missing_objects_as_missing(conn):
+    cursor = conn.cursor()
+    cursor.execute("CREATE OR REPLACE TABLE exists_test (id INT)")
+    assert _table_exists(conn, 'exists_test')
+    assert not _table_exists(conn, 'no_such_table')
+
+    class LostSession:
+        warehouse = 'LOST_WH'
+
+        def cursor(self):
+            raise OperationalError("Connection is closed", errno=250002, sqlstate='08003')
+
+    with pytest.raises(OperationalError):
+        _table_exists(LostSession(), 'exists_test')
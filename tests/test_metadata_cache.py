@@ -0,0 +1,111 @@
+"""
+Keys and invalidation of the SHOW/DESCRIBE cache in snowflake_metadata_cache.py
+"""
+
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from snowflake_metadata_cache import MetadataCache, affected_kinds, cached_kind
+
+SESSION = SimpleNamespace(account='acct', user='me', role='sysadmin', warehouse='wh', database='db', schema='public')
+
+
+def cache_with(*statements, **options):
+    cache = MetadataCache(**options)
+    keys = {}
+    for sql in statements:
+        keys[sql] = MetadataCache.key(SESSION, sql)
+        cache.put(keys[sql], (('name',),), [(sql,)])
+    return cache, keys
+
+
+@pytest.mark.parametrize('sql, kind', [
+    ("SHOW TABLES", 'TABLE'),
+    ("show terse  tables in schema db.public", 'TABLE'),
+    ("SHOW FILE FORMATS", 'FILE FORMAT'),
+    ("SHOW POLICIES", 'POLICY'),
+    ("SHOW MATERIALIZED VIEWS", 'MATERIALIZED VIEW'),
+    ("SHOW DATABASES", 'DATABASE'),
+    ("SHOW CLASSES", 'CLASS'),
+    ("SHOW INDEXES", 'INDEX'),
+    ("DESCRIBE TABLE orders", 'TABLE'),
+    ("-- columns\nDESC VIEW orders_v", 'VIEW'),
+    ("SELECT 1", None),
+])
+def test_cached_kind(sql, kind):
+    assert cached_kind(sql) == kind
+
+
+def test_key_ignores_case_whitespace_and_comments_but_not_context():
+    key = MetadataCache.key(SESSION, "show tables /* all */ in  db.public")
+    assert key == MetadataCache.key(SESSION, "SHOW TABLES IN DB.PUBLIC;")
+    other_schema = SimpleNamespace(**{**vars(SESSION), 'schema': 'raw'})
+    assert key != MetadataCache.key(other_schema, "SHOW TABLES IN DB.PUBLIC")
+    assert MetadataCache.key(SESSION, "SELECT * FROM t") is None
+
+
+@pytest.mark.parametrize('sql, kinds', [
+    ("SELECT * FROM t", set()),
+    ("SHOW TABLES", set()),
+    ("ALTER SESSION SET QUERY_TAG = 'x'", set()),
+    ("INSERT INTO t VALUES (1)", {'TABLE', 'COLUMN', 'OBJECT'}),
+    ("CREATE OR REPLACE TRANSIENT TABLE t (id INT)", {'TABLE', 'COLUMN', 'OBJECT'}),
+    ("CREATE OR REPLACE SECURE VIEW v AS SELECT 1", {'VIEW', 'COLUMN', 'OBJECT'}),
+    ("DROP FILE FORMAT IF EXISTS csv", {'FILE FORMAT'}),
+    ("CREATE SCHEMA raw", None),
+    ("GRANT SELECT ON t TO ROLE r", None),
+])
+def test_affected_kinds(sql, kinds):
+    assert affected_kinds(sql) == kinds
+
+
+def test_ddl_drops_only_the_kinds_it_touches():
+    cache, keys = cache_with("SHOW TABLES", "DESCRIBE TABLE t", "SHOW VIEWS", "SHOW WAREHOUSES")
+    cache.invalidate("CREATE OR REPLACE TABLE t (id INT)")
+    assert cache.get(keys["SHOW TABLES"]) is None
+    assert cache.get(keys["DESCRIBE TABLE t"]) is None
+    assert cache.get(keys["SHOW VIEWS"]) is not None
+    assert cache.get(keys["SHOW WAREHOUSES"]) is not None
+
+
+def test_dml_drops_table_listings():
+    cache, keys = cache_with("SHOW TABLES", "SHOW VIEWS")
+    cache.invalidate("INSERT INTO t VALUES (1)")
+    assert cache.get(keys["SHOW TABLES"]) is None
+    assert cache.get(keys["SHOW VIEWS"]) is not None
+
+
+def test_read_only_statements_keep_everything():
+    cache, keys = cache_with("SHOW TABLES", "SHOW VIEWS")
+    cache.invalidate("SELECT * FROM t")
+    cache.invalidate("USE SCHEMA raw")
+    assert all(cache.get(key) is not None for key in keys.values())
+
+
+def test_container_ddl_and_unknown_statements_drop_everything():
+    for sql in ("DROP SCHEMA raw", "GRANT USAGE ON WAREHOUSE wh TO ROLE r"):
+        cache, keys = cache_with("SHOW TABLES", "SHOW WAREHOUSES")
+        cache.invalidate(sql)
+        assert all(cache.get(key) is None for key in keys.values())
+
+
+def test_entries_expire_and_the_oldest_is_evicted():
+    cache, keys = cache_with("SHOW TABLES", ttl=0.05)
+    time.sleep(0.06)
+    assert cache.get(keys["SHOW TABLES"]) is None
+
+    cache, keys = cache_with("SHOW TABLES", "SHOW VIEWS", "SHOW STAGES", max_entries=2)
+    assert cache.get(keys["SHOW TABLES"]) is None
+    assert cache.get(keys["SHOW STAGES"]) is not None
+
+
+def test_pooled_cursor_sees_a_new_table(conn):
+    cursor = conn.cursor()
+    cursor.execute("CREATE OR REPLACE SCHEMA cache_test")
+    cursor.execute("SHOW TABLES IN SCHEMA cache_test")
+    assert cursor.fetchall() == []
+    cursor.execute("CREATE TABLE cache_test.added (id INT)")
+    cursor.execute("SHOW TABLES IN SCHEMA cache_test")
+    assert [row[1].upper() for row in cursor.fetchall()] == ['ADDED']
@@ -0,0 +1,44 @@
+"""
+Pool sharing and sizing in snowflake_pool.py
+"""
+
+import threading
+
+from snowflake_pool import SnowflakeConnectionPool, get_pool
+
+CONFIG = {'account': 'offline', 'user': 'offline', 'database': 'pool_test'}
+
+
+def test_pools_are_shared_per_password_without_keeping_it_in_the_key():
+    first = get_pool(CONFIG, password='one')
+    assert get_pool(CONFIG, password='one') is first
+    assert get_pool(CONFIG, password='two') is not first
+    assert get_pool(CONFIG) is not first
+
+
+def test_ensure_capacity_only_grows():
+    pool = SnowflakeConnectionPool(CONFIG, max_size=4)
+    pool.ensure_capacity(2)
+    assert pool.max_size == 4
+    threads = [threading.Thread(target=pool.ensure_capacity, args=(size,)) for size in range(1, 17)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert pool.max_size == 16
+
+
+def test_ensure_capacity_wakes_waiting_borrowers():
+    pool = SnowflakeConnectionPool(CONFIG, max_size=1)
+    first = pool.acquire()
+    borrowed = []
+    waiter = threading.Thread(target=lambda: borrowed.append(pool.acquire(timeout=5)))
+    waiter.start()
+    waiter.join(0.1)
+    assert not borrowed
+    pool.ensure_capacity(2)
+    waiter.join(5)
+    assert len(borrowed) == 1
+    for conn in [first] + borrowed:
+        pool.release(conn)
+    pool.close_all()
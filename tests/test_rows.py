@@ -0,0 +1,61 @@
+"""
+Rows addressable by column name, from snowflake_rows.py
+"""
+
+import pytest
+
+from snowflake_executor import execute_query
+from snowflake_rows import ResultSchema, Row, named_rows, row_factory
+
+DESCRIPTION = [('NAME',), ('SIZE',), ('count',), ('name',)]
+
+
+def test_row_is_still_a_tuple():
+    row = row_factory(DESCRIPTION)(('menu.csv', 10, 2, 'dup'))
+    assert row == ('menu.csv', 10, 2, 'dup')
+    assert row[1] == 10 and row[-1] == 'dup' and row[1:3] == (10, 2)
+    name, size, *_ = row
+    assert (name, size) == ('menu.csv', 10)
+
+
+def test_names_ignore_case_and_the_first_duplicate_wins():
+    row = row_factory(DESCRIPTION)(('menu.csv', 10, 2, 'dup'))
+    assert row['name'] == row['NAME'] == row.name == 'menu.csv'
+    assert row['Size'] == row.size == 10
+    assert row.keys() == ('NAME', 'SIZE', 'count', 'name')
+
+
+def test_tuple_methods_are_not_shadowed():
+    row = row_factory(DESCRIPTION)(('menu.csv', 10, 2, 'dup'))
+    assert row.count(10) == 1
+    assert row['count'] == 2
+
+
+def test_unknown_column_names_the_existing_ones():
+    row = row_factory(DESCRIPTION)(('menu.csv', 10, 2, 'dup'))
+    with pytest.raises(KeyError, match="No column 'bytes' in result; columns are: NAME, SIZE, count, name"):
+        row['bytes']
+    with pytest.raises(AttributeError):
+        row.bytes
+    assert row.get('bytes', 0) == 0 and row.get('size') == 10
+
+
+def test_rows_of_one_result_share_their_schema():
+    rows = named_rows([('a', 1, 0, 'x'), ('b', 2, 0, 'y')], DESCRIPTION)
+    assert type(rows[0]) is type(rows[1])
+    assert rows[0].schema is rows[1].schema
+    assert not hasattr(rows[0], '__dict__')
+    assert [row.size for row in rows] == [1, 2]
+
+
+def test_schema_from_an_empty_description():
+    schema = ResultSchema.from_description(None)
+    assert len(schema) == 0 and 'x' not in schema and 1 not in schema
+    assert Row(()).keys() == ()
+
+
+def test_query_results_are_named(conn):
+    result = execute_query(conn, "SELECT 1 AS id, 'Cairo' AS primary_city", "Named columns")
+    row = result[0]
+    assert row['ID'] == 1 and row.primary_city == 'Cairo'
+    assert result.columns == ('ID', 'PRIMARY_CITY')
@@ -0,0 +1,108 @@
+"""
+Pre-load validation of local files in snowflake_schemas.py
+"""
+
+import gzip
+
+import pytest
+
+pytest.importorskip('pyarrow')
+
+from snowflake_schemas import SCHEMAS, Column, fixture_files, validate_file, validate_files
+
+MENU_ROW = '1,2,Ice Cream,Freezing Point,10,Lemonade,Beverage,Cold Option,0.65,3.50,"{""a"": 1}"'
+
+
+@pytest.fixture
+def orders_table(monkeypatch):
+    # A table that exercises every check, registered for the test only
+    monkeypatch.setitem(SCHEMAS, 'orders', (
+        Column('order_id', 'NUMBER(5,0)', nullable=False),
+        Column('amount', 'NUMBER(6,2)'),
+        Column('rate', 'FLOAT'),
+        Column('ordered_on', 'DATE'),
+        Column('shipped', 'BOOLEAN'),
+        Column('code', 'VARCHAR(3)'),
+    ))
+    return 'orders'
+
+
+def write(tmp_path, name, *lines):
+    path = tmp_path / name
+    text = '\n'.join(lines) + '\n'
+    if name.endswith('.gz'):
+        path.write_bytes(gzip.compress(text.encode()))
+    else:
+        path.write_text(text)
+    return str(path)
+
+
+def violations(result):
+    return {key: (violation.records, violation.record, violation.value)
+            for key, violation in result.violations.items()}
+
+
+@pytest.mark.parametrize('table', list(SCHEMAS))
+def test_offline_fixtures_match_their_tables(table):
+    paths = fixture_files(table)
+    assert paths
+    assert all(result.ok for result in validate_files(paths, table))
+
+
+def test_matching_file_with_header_and_compression(tmp_path):
+    path = write(tmp_path, 'menu.csv.gz', ','.join(column.name for column in SCHEMAS['menu']), MENU_ROW, MENU_ROW)
+    result = validate_file(path, 'menu', skip_header=1)
+    assert result.ok, str(result)
+    assert result.records == 2
+
+
+def test_every_check_reports_count_and_first_record(tmp_path, orders_table):
+    path = write(tmp_path, 'orders.csv',
+                 '1,12.5,0.5,2024-01-31,true,abc',
+                 ',1234.567,1e3,2024-02-01,NO,',
+                 '3,12345.6,fast,31/01/2024,maybe,abcd',
+                 '4,1,2',
+                 '123456,-0.5,-inf,2024-03-01,1,xy')
+    result = validate_file(path, orders_table)
+    assert result.records == 4
+    assert violations(result) == {
+        (None, 'column_count'): (1, 4, 3),
+        ('order_id', 'null'): (1, 2, None),
+        ('order_id', 'type'): (1, 4, '123456'),
+        ('amount', 'type'): (1, 3, '12345.6'),
+        ('rate', 'type'): (1, 3, 'fast'),
+        ('ordered_on', 'type'): (1, 3, '31/01/2024'),
+        ('shipped', 'type'): (1, 3, 'maybe'),
+        ('code', 'length'): (1, 3, 'abcd'),
+    }
+    assert not result.ok
+    assert "1 NULL(s) in a NOT NULL column" in str(result)
+
+
+def test_sample_rows_limits_the_records_read(tmp_path, orders_table):
+    path = write(tmp_path, 'orders.csv', '1,1,1,2024-01-01,t,a', 'x,1,1,2024-01-01,t,a')
+    assert validate_file(path, orders_table, sample_rows=1).ok
+    assert not validate_file(path, orders_table, sample_rows=None).ok
+
+
+def test_parquet_column_count(tmp_path, orders_table):
+    pa = pytest.importorskip('pyarrow')
+    pq = pytest.importorskip('pyarrow.parquet')
+    path = str(tmp_path / 'orders.parquet')
+    pq.write_table(pa.table({'order_id': [1, 2], 'amount': [1.5, 2.5]}), path)
+    result = validate_file(path, orders_table)
+    assert violations(result) == {(None, 'column_count'): (2, 1, 2)}
+
+
+def test_unreadable_file_and_unknown_table(tmp_path):
+    result = validate_file(str(tmp_path / 'missing.csv'), 'menu')
+    assert result.error and not result.ok
+    with pytest.raises(ValueError, match='No schema registered'):
+        validate_file(str(tmp_path / 'missing.csv'), 'no_such_table')
+
+
+def test_validate_files_lists_every_failure(tmp_path):
+    good = write(tmp_path, 'good.csv', MENU_ROW)
+    bad = write(tmp_path, 'bad.csv', '1,2,3')
+    with pytest.raises(ValueError, match=r'1 of 2 file\(s\) do not match the menu schema'):
+        validate_files([good, bad], 'menu')